@@ -1,34 +1,24 @@
 import heapq
 import os
-import psutil
+import sys
 from collections import deque
 import time
-
-def is_deadlock(pos, goals, grid):
-    """Phát hiện deadlock đơn giản: thùng bị kẹt trong góc tường (2 tường vuông góc)."""
-    x, y = pos
-    rows, cols = len(grid), len(grid[0])
-
-    # Nếu nằm trên goal thì không kẹt
-    if pos in goals:
-        return False
-
-    def wall(nx, ny):
-        if not (0 <= nx < rows and 0 <= ny < cols):
-            return True  # ngoài bản đồ coi như tường
-        return grid[nx][ny] == '#'
-
-    up = wall(x - 1, y)
-    down = wall(x + 1, y)
-    left = wall(x, y - 1)
-    right = wall(x, y + 1)
-
-    # Nếu bị kẹt trong góc bởi 2 tường thật
-    if (up and left) or (up and right) or (down and left) or (down and right):
-        return True
-
-    return False
-
+from budget import SearchBudget, budget_exhausted, budget_limits, budget_line, result_status
+from closedset import make_closed_set, report_closed_set
+from corral import CorralPruner
+from deadlock import DeadlockDetector
+from instrument import METRIC_COLUMNS, SolveMonitor, metric_columns, metric_lines
+from level import INF, Level, bits
+from macro import MacroMoves, add_pushes
+from matching import replace_row, solve
+from movegen import encode_push, is_solved, normalize, pull_moves, push_moves, reachable, rebuild_path, regions, step_moves, step_path
+from nodestore import NodeStore
+from openlist import make_open_list
+from pattern_db import load_or_build
+from solution_cache import SolutionCache, cache_options, entry_result, make_entry
+from testcases import testcase_path
+from transposition import TranspositionTable
+from zobrist import ZobristTable
 
 # Heuristic: tổng khoảng cách Manhattan từ mỗi thùng đến goal gần nhất
 def heuristic(player, boxes, goals):
@@ -66,15 +56,170 @@ def heuristic(player, boxes, goals):
     return total + 0.5 * min_player_box
 
 
-def a_star_sokoban(grid, start, boxes, goals):
-    rows, cols = len(grid), len(grid[0])
-    start_state = (start, tuple(sorted(boxes)))
+class GreedyEstimator:
+    """heuristic() ở trên: greedy Manhattan + 0.5 * khoảng cách người chơi (không admissible)."""
+
+    def __init__(self, level):
+        self.coords = [level.cell(i) for i in range(level.size)]
+        self.goals = [level.cell(g) for g in level.goal_list]
+
+    def expand(self, boxes):
+        pass
+
+    def estimate(self, player, boxes, box_from=None, box_to=None):
+        coords = self.coords
+        return heuristic(coords[player], [coords[b] for b in bits(boxes)], self.goals)
+
+
+class MatchingEstimator:
+    """
+    Ghép cặp thùng-goal chi phí nhỏ nhất (Hungarian) trên bảng số cú đẩy tối thiểu
+    level.distance. Là cận dưới của số cú đẩy còn lại nên admissible; INF nghĩa là
+    không có cách ghép hữu hạn => deadlock.
+    expand() giải đầy đủ cho node cha (có cache theo tập thùng, vì ở mức bước đi
+    nhiều node chỉ khác vị trí người chơi), estimate() cho node con chỉ cập nhật
+    hàng của thùng vừa đẩy.
+    """
+
+    CACHE_SIZE = 1 << 14
+
+    def __init__(self, level):
+        self.rows = {b: [dist[b] for dist in level.distance] for b in level.cells}
+        self.cache = {}
+
+    def expand(self, boxes):
+        entry = self.cache.get(boxes)
+        if entry is None:
+            if len(self.cache) >= self.CACHE_SIZE:
+                self.cache.clear()
+            order = list(bits(boxes))
+            cost, state = solve([self.rows[b] for b in order])
+            entry = self.cache[boxes] = (order, self.bound(order, cost), state)
+        self.order, self.cost, self.state = entry
+
+    def bound(self, order, cost):
+        return cost
+
+    def estimate(self, player, boxes, box_from=None, box_to=None):
+        if box_from is None:
+            return self.cost
+        cost, _ = replace_row(self.state, self.order.index(box_from), self.rows[box_to])
+        return cost
+
+
+class PatternEstimator(MatchingEstimator):
+    """
+    max(Hungarian, tổng PDB theo phân hoạch thùng rời nhau – xem pattern_db.py).
+    Max của hai cận dưới vẫn admissible; PDB còn bắt được deadlock giữa 2–3 thùng
+    mà từng thùng riêng lẻ không bị kẹt.
+    """
+
+    def __init__(self, level, pdb):
+        super().__init__(level)
+        self.pdb = pdb
+        self.min_distance = level.min_distance
+
+    def bound(self, order, cost):
+        return max(cost, self.pdb.partition_cost(order, self.min_distance))
+
+    def estimate(self, player, boxes, box_from=None, box_to=None):
+        if box_from is None:
+            return self.cost
+        cost = super().estimate(player, boxes, box_from, box_to)
+        if cost >= INF:
+            return cost
+        return self.bound(list(bits(boxes)), cost)
+
 
-    pq = []
-    heapq.heappush(pq, (heuristic(start, boxes, goals), 0, 0, start_state, ""))  # (f = g+h, g, pushes, state, path)
+def make_estimator(level, heuristic_mode, stats=None):
+    if heuristic_mode == 'greedy':
+        return GreedyEstimator(level)
+    if heuristic_mode == 'matching':
+        return MatchingEstimator(level)
+    if heuristic_mode in ('pdb', 'pdb3'):
+        pdb = load_or_build(level, 3 if heuristic_mode == 'pdb3' else 2)
+        source = "cache" if pdb.cached else f"dựng trong {pdb.build_time:.3f}s"
+        print(f"📚 PDB k={pdb.size}: {len(pdb)} mục ({source})")
+        if stats is not None:
+            stats.update(pdb_size=pdb.size, pdb_entries=len(pdb), pdb_build_time=pdb.build_time, pdb_cached=pdb.cached)
+        return PatternEstimator(level, pdb)
+    raise ValueError(f"Unknown heuristic: {heuristic_mode}")
 
-    visited = set()
-    moves = [(1,0,'D'),(-1,0,'U'),(0,1,'R'),(0,-1,'L')]
+
+def report_deadlocks(deadlocks, stats):
+    print(f"🧱 Deadlock đã cắt: {deadlocks.summary()}")
+    if stats is not None:
+        stats.update(deadlocks.pruned)
+
+
+def report_macros(macro, stats):
+    if macro is not None:
+        print(f"🚇 Macro: {macro.summary()}")
+        macro.report(stats)
+
+
+def report_closed(closed, stats):
+    print(f"🗃️ Closed set: {report_closed_set(closed, stats)}")
+
+
+def report_corrals(corrals, stats):
+    if corrals is not None:
+        print(f"🧺 PI-corral: {corrals.summary()}")
+        corrals.report(stats)
+
+
+# Tham số mặc định của các chế độ tìm nhanh (lời giải không tối ưu)
+WEIGHT = 2
+BEAM_WIDTH = 500
+
+
+def priority_weights(weight, open_list):
+    """(hệ số của g, hệ số của h) trong f; bucket queue cần f nguyên nên weight phải nguyên."""
+    if weight is None:
+        return 0, 1
+    if open_list == 'bucket' and weight != int(weight):
+        raise ValueError(f"bucket open list needs an integer weight, got {weight}")
+    return 1, int(weight) if weight == int(weight) else weight
+
+
+def a_star_sokoban(level, push_level=False, stats=None, heuristic_mode='matching', budget=None, monitor=None, macros=False, corral=False, open_list='heap', weight=1, closed='builtin'):
+    """
+    level: Level (Level.from_file), giải từ level.start / level.start_boxes.
+    stats: dict tùy chọn, được ghi thêm số node bị cắt theo từng luật deadlock.
+    heuristic_mode: 'matching' (Hungarian trên số cú đẩy, admissible), 'pdb'/'pdb3'
+    (thêm pattern database cặp/bộ ba thùng, cache trong Cache/pdb) hoặc 'greedy'.
+    budget: SearchBudget tùy chọn (budget.py); hết node/thời gian/bộ nhớ thì dừng và trả
+    về như không có lời giải, lý do cùng số liệu lúc dừng nằm trong stats.
+    monitor: SolveMonitor tùy chọn (instrument.py) nhận kích thước frontier/visited.
+    macros: dùng macro tunnel / goal room (macro.py); macro là chuỗi cú đẩy nên
+    luôn tìm ở mức cú đẩy.
+    corral: cắt tỉa successor theo PI-corral (corral.py), cũng ở mức cú đẩy.
+    open_list: 'heap' hoặc 'bucket' (openlist.py).
+    weight: f = g + weight * h (weighted A*, weight > 1 nhanh hơn nhưng lời giải có thể
+    dài hơn tối ưu tới weight lần); None là greedy best-first, f = h. Xem priority_weights.
+    closed: tập đã duyệt 'builtin' (dict) hoặc 'packed' (closedset.py, ít bộ nhớ hơn);
+    stats nhận closed_states và closed_bytes_per_state.
+    """
+    if push_level or macros or corral:
+        return a_star_pushes(level, stats, heuristic_mode, budget, monitor, macros, corral, open_list, weight, closed)
+    monitor = monitor or SolveMonitor(trace=False)
+    g_weight, h_weight = priority_weights(weight, open_list)
+
+    deadlocks = DeadlockDetector(level)
+    estimator = make_estimator(level, heuristic_mode, stats)
+    zobrist = ZobristTable(level.cells)
+    player = level.start
+    boxes = level.start_boxes
+    boxes_key = zobrist.boxes_key(bits(boxes))
+    store = NodeStore()
+    estimator.expand(boxes)
+
+    pq = make_open_list(open_list)
+    pq.push(estimator.estimate(player, boxes), 0, (0, zobrist.state_key(boxes_key, player), store.add(-1, 0), player, boxes, boxes_key))  # f = g+h, g, (pushes, key, node, player, boxes, boxes_key)
+
+    # khóa -> g tốt nhất đã duyệt; PDB không nhất quán (consistent) nên một trạng thái
+    # có thể được mở lại khi tìm thấy đường ngắn hơn
+    visited = make_closed_set(closed, values=True)
 
     # 🧮 Thống kê node
     nodes_generated = 1   # trạng thái khởi tạo
@@ -82,104 +227,493 @@ def a_star_sokoban(grid, start, boxes, goals):
     nodes_explored = 0
 
     while pq:
-        f, g, pushes, (player, boxes), path = heapq.heappop(pq)
+        if budget_exhausted(budget, nodes_generated, stats):
+            break
+        f, g, (pushes, key, node, player, boxes, boxes_key) = pq.pop()
+        monitor.observe(len(pq), len(visited))
 
         # Mỗi lần lấy ra khỏi hàng đợi => 1 node được explore
         nodes_explored += 1
 
         # Kiểm tra đích
-        if all(b in goals for b in boxes):
+        if is_solved(level, boxes):
+            monitor.solution_found()
+            path = step_path(level, store.moves(node))
             print(f"✅ Giải thành công sau {nodes_explored} trạng thái duyệt, {nodes_generated} node sinh ra.")
+            report_deadlocks(deadlocks, stats)
+            report_closed(visited, stats)
             return path, pushes, nodes_generated, nodes_repeated, nodes_explored
 
-        if (player, boxes) in visited:
+        if visited.get(key, INF) <= g:
             nodes_repeated += 1
             continue
-        visited.add((player, boxes))
+        visited[key] = g
 
-        px, py = player
-        for dx, dy, move in moves:
-            nx, ny = px + dx, py + dy
-            if not (0 <= nx < rows and 0 <= ny < cols):
-                continue
-            if grid[nx][ny] == '#':
-                continue
-
-            new_boxes = set(boxes)
+        estimator.expand(boxes)
+        for d, new_player, new_boxes, box_from, box_to in step_moves(level, player, boxes):
+            new_boxes_key = boxes_key
             is_pushed = 0
-            # Nếu gặp thùng ở ô kế tiếp → thử đẩy
-            if (nx, ny) in new_boxes:
+            if box_from is not None:
                 is_pushed = 1
-                bx, by = nx + dx, ny + dy
-                if not (0 <= bx < rows and 0 <= by < cols):
-                    continue
-                if grid[bx][by] == '#' or (bx, by) in new_boxes:
-                    continue
-                new_boxes.remove((nx, ny))
-                new_boxes.add((bx, by))
-                if any(is_deadlock(b, goals, grid) for b in new_boxes):
+                # Chỉ thùng vừa đẩy có thể rơi vào dead square
+                if level.dead >> box_to & 1 or deadlocks.is_deadlock(new_boxes, box_to):
                     continue
+                # Chỉ một thùng đổi chỗ → cập nhật khóa bằng XOR
+                new_boxes_key = zobrist.move_box(boxes_key, box_from, box_to)
 
-            new_state = ((nx, ny), tuple(sorted(new_boxes)))
-            if new_state in visited:
+            new_key = zobrist.state_key(new_boxes_key, new_player)
+            if visited.get(new_key, INF) <= g + 1:
                 nodes_repeated += 1
                 continue
 
+            h_val = estimator.estimate(new_player, new_boxes, box_from, box_to)
+            if h_val >= INF:
+                deadlocks.count('matching')
+                continue
+
             new_g = g + 1
             new_pushes = pushes + 1 if is_pushed else pushes
-            h_val = heuristic((nx, ny), new_boxes, goals)
-            heapq.heappush(pq, (new_g + h_val, new_g, new_pushes, new_state, path + move))
+            pq.push(g_weight * new_g + h_weight * h_val, new_g, (new_pushes, new_key, store.add(node, d), new_player, new_boxes, new_boxes_key))
+            nodes_generated += 1
+
+    print(f"❌ Không tìm được lời giải. Tổng explored: {nodes_explored}, generated: {nodes_generated}")
+    report_deadlocks(deadlocks, stats)
+    report_closed(visited, stats)
+    return None, 0, nodes_generated, nodes_repeated, nodes_explored
+
+
+def a_star_pushes(level, stats=None, heuristic_mode='matching', budget=None, monitor=None, macros=False, corral=False, open_list='heap', weight=1, closed='builtin'):
+    """
+    A* mức cú đẩy: node = (ô chuẩn hóa của vùng người chơi, thùng), successor chỉ là
+    các cú đẩy. Đường đi bộ giữa các cú đẩy chỉ được dựng lại cho lời giải cuối.
+    Với macros, một successor có thể là cả chuỗi cú đẩy (g tăng theo số cú đẩy);
+    với corral, chỉ giữ các cú đẩy vào PI-corral khi có.
+    """
+    monitor = monitor or SolveMonitor(trace=False)
+    g_weight, h_weight = priority_weights(weight, open_list)
+    deadlocks = DeadlockDetector(level)
+    estimator = make_estimator(level, heuristic_mode, stats)
+    zobrist = ZobristTable(level.cells)
+    start = level.start
+    start_boxes = level.start_boxes
+    boxes_key = zobrist.boxes_key(bits(start_boxes))
+    _, canon = normalize(level, start, start_boxes)
+    store = NodeStore('I')
+    macro = MacroMoves(level) if macros else None
+    corrals = CorralPruner(level) if corral else None
+    estimator.expand(start_boxes)
+
+    pq = make_open_list(open_list)
+    pq.push(estimator.estimate(canon, start_boxes), 0, (zobrist.state_key(boxes_key, canon), store.add(-1, 0), start, start_boxes, boxes_key))  # f, g = pushes, (key, node, player, boxes, boxes_key)
+
+    # khóa -> g tốt nhất đã duyệt; PDB không nhất quán (consistent) nên một trạng thái
+    # có thể được mở lại khi tìm thấy đường ngắn hơn
+    visited = make_closed_set(closed, values=True)
+
+    nodes_generated = 1
+    nodes_repeated = 0
+    nodes_explored = 0
+
+    while pq:
+        if budget_exhausted(budget, nodes_generated, stats):
+            break
+        f, g, (key, node, player, boxes, boxes_key) = pq.pop()
+        monitor.observe(len(pq), len(visited))
+        nodes_explored += 1
+
+        if is_solved(level, boxes):
+            monitor.solution_found()
+            path = rebuild_path(level, start, start_boxes, store.moves(node))
+            print(f"✅ Giải thành công sau {nodes_explored} trạng thái duyệt, {nodes_generated} node sinh ra.")
+            report_deadlocks(deadlocks, stats)
+            report_macros(macro, stats)
+            report_corrals(corrals, stats)
+            report_closed(visited, stats)
+            return path, g, nodes_generated, nodes_repeated, nodes_explored
+
+        if visited.get(key, INF) <= g:
+            nodes_repeated += 1
+            continue
+        visited[key] = g
+
+        estimator.expand(boxes)
+        region, _ = normalize(level, player, boxes)
+        pushes = push_moves(level, region, boxes)
+        if corrals is not None:
+            pushes = corrals.prune(region, boxes, pushes)
+        for box_pos, d, target in pushes:
+            if level.dead >> target & 1:
+                continue
+            new_boxes = boxes ^ (1 << box_pos) ^ (1 << target)
+            codes, new_player = [encode_push(box_pos, d)], box_pos
+            if macro is not None:
+                codes, new_player, target, new_boxes = macro.extend(new_boxes, box_pos, d, target)
+            if deadlocks.is_deadlock(new_boxes, target):
+                continue
+
+            new_g = g + len(codes)
+            new_boxes_key = zobrist.move_box(boxes_key, box_pos, target)
+            _, new_canon = normalize(level, new_player, new_boxes)
+            new_key = zobrist.state_key(new_boxes_key, new_canon)
+            if visited.get(new_key, INF) <= new_g:
+                nodes_repeated += 1
+                continue
+
+            h_val = estimator.estimate(new_canon, new_boxes, box_pos, target)
+            if h_val >= INF:
+                deadlocks.count('matching')
+                continue
+
+            pq.push(g_weight * new_g + h_weight * h_val, new_g, (new_key, add_pushes(store, node, codes), new_player, new_boxes, new_boxes_key))
             nodes_generated += 1
 
     print(f"❌ Không tìm được lời giải. Tổng explored: {nodes_explored}, generated: {nodes_generated}")
+    report_deadlocks(deadlocks, stats)
+    report_macros(macro, stats)
+    report_corrals(corrals, stats)
+    report_closed(visited, stats)
     return None, 0, nodes_generated, nodes_repeated, nodes_explored
 
 
-def read_sokoban_map(filename):
-    """
-    Đọc bản đồ Sokoban từ file .txt với các ký hiệu:
-    # = tường, . = sàn, x = box, ? = goal, @ = player,
-    - = player trên goal, + = box trên goal.
-    Trả về: grid (list[str]), start (tuple), boxes (set), goals (set)
-    """
-    grid = []
-    boxes = set()
-    goals = set()
-    start = None
-
-    with open(filename, "r", encoding="utf-8") as f:
-        lines = [line.rstrip('\n') for line in f]
-
-    max_len = max(len(line) for line in lines)
-    for y, line in enumerate(lines):
-        # Chuẩn hóa độ dài dòng
-        if len(line) < max_len:
-            line += " " * (max_len - len(line))
-        grid.append(line)
-
-        for x, ch in enumerate(line):
-            if ch == '#':
-                continue  # tường, bỏ qua
-            elif ch in ('.', ' '):
-                continue  # sàn, không cần lưu
-            elif ch == '@':
-                start = (y, x)
-            elif ch == '-':
-                start = (y, x)
-                goals.add((y, x))
-            elif ch == 'x':
-                boxes.add((y, x))
-            elif ch == '+':
-                boxes.add((y, x))
-                goals.add((y, x))
-            elif ch == '?':
-                goals.add((y, x))
-
-    return grid, start, boxes, goals
+def weighted_a_star(level, weight=WEIGHT, push_level=False, stats=None, heuristic_mode='matching', budget=None, monitor=None, open_list='heap'):
+    """Weighted A*: f = g + weight * h, lời giải dài không quá weight lần tối ưu (h admissible)."""
+    return a_star_sokoban(level, push_level, stats, heuristic_mode, budget, monitor, open_list=open_list, weight=weight)
+
+
+def greedy_best_first(level, push_level=False, stats=None, heuristic_mode='matching', budget=None, monitor=None, open_list='heap'):
+    """Greedy best-first: chỉ theo h (f = h), thường nhanh nhất nhưng không đảm bảo độ dài."""
+    return a_star_sokoban(level, push_level, stats, heuristic_mode, budget, monitor, open_list=open_list, weight=None)
+
+
+def beam_search(level, width=BEAM_WIDTH, stats=None, heuristic_mode='matching', budget=None, monitor=None):
+    """
+    Beam search mức cú đẩy: duyệt theo tầng (số cú đẩy) như BFS nhưng mỗi tầng chỉ
+    giữ width node có h nhỏ nhất. Bộ nhớ frontier bị chặn bởi width; không đầy đủ
+    (có thể bỏ lỡ lời giải khi beam quá hẹp). Cùng kiểu trả về với a_star_sokoban;
+    stats nhận beam_width và beam_layers.
+    """
+    monitor = monitor or SolveMonitor(trace=False)
+    deadlocks = DeadlockDetector(level)
+    estimator = make_estimator(level, heuristic_mode, stats)
+    zobrist = ZobristTable(level.cells)
+    start = level.start
+    start_boxes = level.start_boxes
+    boxes_key = zobrist.boxes_key(bits(start_boxes))
+    _, canon = normalize(level, start, start_boxes)
+    store = NodeStore('I')
+    start_key = zobrist.state_key(boxes_key, canon)
+    estimator.expand(start_boxes)
+    layer = [(estimator.estimate(canon, start_boxes), start_key, store.add(-1, 0), start, start_boxes, boxes_key)]
+    seen = {start_key}
+
+    nodes_generated = 1
+    nodes_repeated = 0
+    nodes_explored = 0
+    depth = 0
+
+    def finish(path, pushes):
+        if stats is not None:
+            stats.update(beam_width=width, beam_layers=depth)
+        report_deadlocks(deadlocks, stats)
+        return path, pushes, nodes_generated, nodes_repeated, nodes_explored
+
+    while layer:
+        children = []
+        for _, key, node, player, boxes, boxes_key in layer:
+            if budget_exhausted(budget, nodes_generated, stats):
+                print(f"❌ Không tìm được lời giải. Tổng explored: {nodes_explored}, generated: {nodes_generated}")
+                return finish(None, 0)
+            monitor.observe(len(layer) + len(children), len(seen))
+            nodes_explored += 1
+
+            if is_solved(level, boxes):
+                monitor.solution_found()
+                path = rebuild_path(level, start, start_boxes, store.moves(node))
+                print(f"✅ Giải thành công sau {nodes_explored} trạng thái duyệt, {nodes_generated} node sinh ra.")
+                return finish(path, depth)
+
+            estimator.expand(boxes)
+            region, _ = normalize(level, player, boxes)
+            for box_pos, d, target in push_moves(level, region, boxes):
+                if level.dead >> target & 1:
+                    continue
+                new_boxes = boxes ^ (1 << box_pos) ^ (1 << target)
+                if deadlocks.is_deadlock(new_boxes, target):
+                    continue
+                new_boxes_key = zobrist.move_box(boxes_key, box_pos, target)
+                _, new_canon = normalize(level, box_pos, new_boxes)
+                new_key = zobrist.state_key(new_boxes_key, new_canon)
+                if new_key in seen:
+                    nodes_repeated += 1
+                    continue
+                h_val = estimator.estimate(new_canon, new_boxes, box_pos, target)
+                if h_val >= INF:
+                    deadlocks.count('matching')
+                    continue
+                seen.add(new_key)
+                children.append((h_val, new_key, store.add(node, encode_push(box_pos, d)), box_pos, new_boxes, new_boxes_key))
+                nodes_generated += 1
+        # Khóa Zobrist là duy nhất trong tầng nên so sánh tuple không đi quá phần tử thứ hai
+        layer = heapq.nsmallest(width, children)
+        depth += 1
+
+    print(f"❌ Không tìm được lời giải. Tổng explored: {nodes_explored}, generated: {nodes_generated}")
+    return finish(None, 0)
+
+
+def ida_star_sokoban(level, stats=None, heuristic_mode='matching', table_bits=18, budget=None, monitor=None):
+    """
+    IDA* mức cú đẩy: DFS theo ngưỡng f tăng dần, chỉ giữ đường đi hiện tại cùng
+    một bảng chuyển vị cố định 2**table_bits ô, nên bộ nhớ không tăng theo số
+    trạng thái như A*. Cùng kiểu trả về với a_star_sokoban; số cú đẩy tối ưu khi
+    heuristic admissible ('matching', 'pdb', 'pdb3').
+    Với monitor, frontier là độ sâu đường đi hiện tại, visited là số ô bảng đã dùng.
+    """
+    monitor = monitor or SolveMonitor(trace=False)
+    deadlocks = DeadlockDetector(level)
+    estimator = make_estimator(level, heuristic_mode, stats)
+    zobrist = ZobristTable(level.cells)
+    table = TranspositionTable(table_bits)
+    start = level.start
+    start_boxes = level.start_boxes
+    start_boxes_key = zobrist.boxes_key(bits(start_boxes))
+    _, canon = normalize(level, start, start_boxes)
+    estimator.expand(start_boxes)
+
+    pushes = []  # các cú đẩy đã mã hóa trên đường đi hiện tại
+    counts = {'generated': 1, 'repeated': 0, 'explored': 0, 'aborted': False}
+
+    def search(player, boxes, boxes_key, key, g, h, bound):
+        """Trả về None nếu tìm được lời giải, ngược lại f nhỏ nhất vượt ngưỡng."""
+        if g + h > bound:
+            return g + h
+        if is_solved(level, boxes):
+            monitor.solution_found()
+            return None
+        if counts['aborted']:
+            return INF
+        if budget_exhausted(budget, counts['generated'], stats):
+            counts['aborted'] = True
+            return INF
+        if not table.visit(key, g):
+            counts['repeated'] += 1
+            return INF
+        counts['explored'] += 1
+        monitor.observe(len(pushes), table.used)
+
+        # Tính h của mọi con trước khi đệ quy (estimator giữ trạng thái của node đang
+        # expand), rồi duyệt con có h nhỏ trước
+        estimator.expand(boxes)
+        region, _ = normalize(level, player, boxes)
+        children = []
+        for box_pos, d, target in push_moves(level, region, boxes):
+            if level.dead >> target & 1:
+                continue
+            new_boxes = boxes ^ (1 << box_pos) ^ (1 << target)
+            if deadlocks.is_deadlock(new_boxes, target):
+                continue
+            new_boxes_key = zobrist.move_box(boxes_key, box_pos, target)
+            _, new_canon = normalize(level, box_pos, new_boxes)
+            h_val = estimator.estimate(new_canon, new_boxes, box_pos, target)
+            if h_val >= INF:
+                deadlocks.count('matching')
+                continue
+            counts['generated'] += 1
+            children.append((h_val, encode_push(box_pos, d), box_pos, new_boxes, new_boxes_key, zobrist.state_key(new_boxes_key, new_canon)))
+        children.sort()
+
+        minimum = INF
+        for h_val, code, box_pos, new_boxes, new_boxes_key, new_key in children:
+            pushes.append(code)
+            t = search(box_pos, new_boxes, new_boxes_key, new_key, g + 1, h_val, bound)
+            if t is None:
+                return None
+            pushes.pop()
+            minimum = min(minimum, t)
+        return minimum
+
+    start_key = zobrist.state_key(start_boxes_key, canon)
+    start_h = bound = estimator.estimate(canon, start_boxes)
+    while bound is not None and bound < INF:
+        table.new_iteration()
+        bound = search(start, start_boxes, start_boxes_key, start_key, 0, start_h, bound)
+
+    print(f"🔁 IDA*: {table.iteration} lượt, bảng chuyển vị {table.nbytes} byte ({table.replaced} lần thay thế)")
+    if stats is not None:
+        stats.update(iterations=table.iteration, table_bytes=table.nbytes, table_replaced=table.replaced)
+    report_deadlocks(deadlocks, stats)
+    if bound is None:
+        path = rebuild_path(level, start, start_boxes, pushes)
+        print(f"✅ Giải thành công sau {counts['explored']} trạng thái duyệt, {counts['generated']} node sinh ra.")
+        return path, len(pushes), counts['generated'], counts['repeated'], counts['explored']
+
+    print(f"❌ Không tìm được lời giải. Tổng explored: {counts['explored']}, generated: {counts['generated']}")
+    return None, 0, counts['generated'], counts['repeated'], counts['explored']
+
+
+def bidirectional_sokoban(level, stats=None, budget=None, monitor=None):
+    """
+    Tìm kiếm hai chiều mức cú đẩy: BFS xuôi (đẩy) từ trạng thái đầu và BFS ngược
+    (kéo, xem pull_moves) từ trạng thái đích với mọi vùng người chơi có thể. Mỗi
+    lượt mở rộng trọn một tầng của phía có frontier nhỏ hơn và dừng khi hai phía
+    gặp nhau trên cùng khóa Zobrist (thùng + ô chuẩn hóa). Vì tầng được mở rộng
+    trọn vẹn nên điểm gặp đầu tiên cho số cú đẩy tối ưu.
+    Cùng kiểu trả về với a_star_sokoban.
+    """
+    monitor = monitor or SolveMonitor(trace=False)
+    deadlocks = DeadlockDetector(level)
+    zobrist = ZobristTable(level.cells)
+    start = level.start
+    start_boxes = level.start_boxes
+    counts = {'generated': 0, 'repeated': 0, 'explored': 0}
+
+    # Mỗi phía: cây node (mã cú đẩy/kéo), seen: khóa -> node, frontier của tầng hiện tại
+    forward = {'store': NodeStore('I'), 'seen': {}, 'frontier': [], 'depth': 0, 'pull': False}
+    backward = {'store': NodeStore('I'), 'seen': {}, 'frontier': [], 'depth': 0, 'pull': True}
+
+    def add_root(side, player, boxes, boxes_key):
+        key = zobrist.state_key(boxes_key, player)
+        if key not in side['seen']:
+            node = side['seen'][key] = side['store'].add(-1, 0)
+            side['frontier'].append((player, boxes, boxes_key, node))
+            counts['generated'] += 1
+
+    add_root(forward, normalize(level, start, start_boxes)[1], start_boxes, zobrist.boxes_key(bits(start_boxes)))
+    goal_key = zobrist.boxes_key(level.goal_list)
+    for region in regions(level, level.goals):
+        add_root(backward, region, level.goals, goal_key)
+
+    def expand(side, other):
+        """Mở rộng một tầng của side; trả về (node của side, node của other) nếu gặp nhau."""
+        store, seen, pull = side['store'], side['seen'], side['pull']
+        next_frontier = []
+        meeting = None
+        for player, boxes, boxes_key, node in side['frontier']:
+            if budget_exhausted(budget, counts['generated'], stats):
+                return None
+            counts['explored'] += 1
+            reach = reachable(level, player, boxes)
+            for box, d, target in (pull_moves if pull else push_moves)(level, reach, boxes):
+                new_boxes = boxes ^ (1 << box) ^ (1 << target)
+                # Trạng thái ngược luôn đưa được thùng về goal, chỉ phía xuôi cần cắt deadlock
+                if not pull and (level.dead >> target & 1 or deadlocks.is_deadlock(new_boxes, target)):
+                    continue
+                new_boxes_key = zobrist.move_box(boxes_key, box, target)
+                _, new_canon = normalize(level, 2 * target - box if pull else box, new_boxes)
+                new_key = zobrist.state_key(new_boxes_key, new_canon)
+                if new_key in seen:
+                    counts['repeated'] += 1
+                    continue
+                child = seen[new_key] = store.add(node, encode_push(box, d))
+                counts['generated'] += 1
+                if meeting is None and new_key in other['seen']:
+                    meeting = (child, other['seen'][new_key])
+                next_frontier.append((new_canon, new_boxes, new_boxes_key, child))
+        side['frontier'] = next_frontier
+        side['depth'] += 1
+        return meeting
+
+    meeting = None
+    key = next(iter(forward['seen']))
+    if key in backward['seen']:
+        meeting = (forward['seen'][key], backward['seen'][key])
+    while meeting is None and forward['frontier'] and backward['frontier']:
+        if budget_exhausted(budget, counts['generated'], stats):
+            break
+        monitor.observe(len(forward['frontier']) + len(backward['frontier']),
+                        len(forward['seen']) + len(backward['seen']))
+        if len(forward['frontier']) <= len(backward['frontier']):
+            meeting = expand(forward, backward)
+        else:
+            meeting = expand(backward, forward)
+            if meeting is not None:
+                meeting = meeting[::-1]
+
+    if stats is not None:
+        stats.update(forward_nodes=len(forward['store']), backward_nodes=len(backward['store']),
+                     forward_depth=forward['depth'], backward_depth=backward['depth'])
+    report_deadlocks(deadlocks, stats)
+    if meeting is None:
+        print(f"❌ Không tìm được lời giải. Tổng explored: {counts['explored']}, generated: {counts['generated']}")
+        return None, 0, counts['generated'], counts['repeated'], counts['explored']
+
+    monitor.solution_found()
+    # Nửa ngược: đi từ điểm gặp về goal, mỗi cú kéo (box, d) đảo thành cú đẩy thùng
+    # từ box + offset về box theo hướng ngược lại (d ^ 1: U<->D, L<->R)
+    pushes = forward['store'].moves(meeting[0])
+    for code in reversed(backward['store'].moves(meeting[1])):
+        box, d = code >> 2, code & 3
+        pushes.append(encode_push(box + level.dirs[d][0], d ^ 1))
+    path = rebuild_path(level, start, start_boxes, pushes)
+    print(f"✅ Giải thành công sau {counts['explored']} trạng thái duyệt, {counts['generated']} node sinh ra "
+          f"(xuôi {forward['depth']} tầng, ngược {backward['depth']} tầng).")
+    return path, len(pushes), counts['generated'], counts['repeated'], counts['explored']
+
 
 # =============================== MAIN ===============================
 if __name__ == '__main__':
     map_list = ['MINI COSMOS', 'MICRO COSMOS']
+    # --push: tìm kiếm mức cú đẩy
+    push_level = "--push" in sys.argv
+    # --greedy: heuristic greedy Manhattan cũ thay cho Hungarian
+    # --pdb / --pdb3: Hungarian kết hợp pattern database cặp / bộ ba thùng
+    heuristic_mode = "matching"
+    for mode in ("greedy", "pdb", "pdb3"):
+        if f"--{mode}" in sys.argv:
+            heuristic_mode = mode
+    # --ida: IDA* mức cú đẩy với bảng chuyển vị cố định (bộ nhớ không tăng theo độ sâu)
+    use_ida = "--ida" in sys.argv
+    # --bidir: BFS hai chiều (đẩy xuôi từ đầu, kéo ngược từ goal), không dùng heuristic
+    use_bidir = "--bidir" in sys.argv
+    # Chế độ tìm nhanh, lời giải không tối ưu:
+    # --weighted[=W]: weighted A*, f = g + W*h (mặc định WEIGHT); --gbfs: greedy best-first, f = h;
+    # --beam[=N]: beam search mức cú đẩy giữ N node mỗi tầng (mặc định BEAM_WIDTH)
+    def flag_value(flag):
+        """(có flag hay không, giá trị sau '=' hoặc None)."""
+        for arg in sys.argv[1:]:
+            name, _, value = arg.partition("=")
+            if name == flag:
+                return True, (int(value) if value.isdigit() else float(value)) if value else None
+        return False, None
+    use_beam, beam_width = flag_value("--beam")
+    use_gbfs = "--gbfs" in sys.argv
+    use_weighted, weight = flag_value("--weighted")
+    best_first = not (use_ida or use_bidir or use_beam)
+    # --macro: A* mức cú đẩy với macro tunnel / goal room (macro.py)
+    use_macros = "--macro" in sys.argv and best_first
+    # --corral: A* mức cú đẩy với cắt tỉa PI-corral (corral.py)
+    use_corral = "--corral" in sys.argv and best_first
+    # --bucket: open list của A* là bucket queue theo f (openlist.py) thay cho heap
+    open_list = "bucket" if "--bucket" in sys.argv and best_first else "heap"
+    # --packed: tập đã duyệt của A* là bảng khóa 64 bit đóng gói (closedset.py) thay cho dict
+    closed = "packed" if "--packed" in sys.argv and best_first else "builtin"
+    push_search = push_level or use_macros or use_corral
+    # --no-trace: không bật tracemalloc (thời gian sạch hơn, bộ nhớ lấy theo đỉnh RSS)
+    trace_memory = "--no-trace" not in sys.argv
+    # --no-cache: luôn giải lại, không đọc/ghi Cache/solutions
+    cache = None if "--no-cache" in sys.argv else SolutionCache()
+    # --max-nodes=N, --timeout=S, --max-memory=MB: giới hạn cho mỗi level (budget.py)
+    limits = budget_limits()
+    engine = ("bidir" if use_bidir else "ida" if use_ida else "beam" if use_beam else "gbfs" if use_gbfs
+              else "wastar" if use_weighted else "astar")
+    algo_name = {'bidir': "Bidirectional", 'ida': "IDA*", 'beam': "Beam search", 'gbfs': "Greedy BFS",
+                 'wastar': "Weighted A*", 'astar': "A*"}[engine]
+    if push_search and best_first:
+        algo_name += "-push"
+    if use_weighted and best_first and not use_gbfs:
+        algo_name += f" (w={weight or WEIGHT})"
+    if use_beam:
+        algo_name += f" (width {beam_width or BEAM_WIDTH})"
+    if heuristic_mode != "matching" and not use_bidir:
+        algo_name += f" ({heuristic_mode})"
+    if use_macros:
+        algo_name += " + macro"
+    if use_corral:
+        algo_name += " + corral"
+    if open_list != "heap":
+        algo_name += f" + {open_list}"
+    if closed != "builtin":
+        algo_name += f" + {closed}"
     
     # Kiểm tra file CSV
     output_csv = "A_star.csv"
@@ -189,7 +723,8 @@ if __name__ == '__main__':
          header_mode = "w"  # Ghi đè file cũ
 
     with open(output_csv, header_mode) as f:
-        f.write("Map,Level,Algorithm,Node generated,Node explored,Step,Time (s),Memory (MB)\n")
+        f.write("Map,Level,Algorithm,Node generated,Node explored,Step,Status,Cached,Time (s),Memory (MB),"
+                "PDB entries,PDB build (s),Node reduction (%)," + ",".join(METRIC_COLUMNS) + "\n")
 
     # Mở file kết quả chi tiết
     result_file = "result_A_star.txt"
@@ -197,53 +732,127 @@ if __name__ == '__main__':
     if os.path.exists(result_file):
         os.remove(result_file)
 
+    def solve_level(level, stats, heuristic_mode, monitor=None, macros=False, corral=False, open_list="heap"):
+        budget = SearchBudget(**limits)
+        if use_bidir:
+            return bidirectional_sokoban(level, stats, budget, monitor)
+        if use_ida:
+            return ida_star_sokoban(level, stats, heuristic_mode, budget=budget, monitor=monitor)
+        if use_beam:
+            return beam_search(level, beam_width or BEAM_WIDTH, stats, heuristic_mode, budget, monitor)
+        search_weight = None if use_gbfs else (weight or WEIGHT) if use_weighted else 1
+        return a_star_sokoban(level, push_search, stats, heuristic_mode, budget, monitor, macros, corral, open_list, search_weight, closed)
+
     i = 0
     
-    print(f"Loading A* algorithm results from testcase {i+1}")
+    print(f"Loading {algo_name} algorithm results from testcase {i+1}")
 
     for j in range(i, 80):
         map_name = map_list[int(j/40)]
         level_num = j%40 + 1
-        filepath = f"./Testcases/{map_name}/{level_num}.txt"
+        filepath = testcase_path(map_name, level_num)
         
         if not os.path.exists(filepath):
             print(f"File not found: {filepath}")
             continue
             
-        grid, start, boxes, goals = read_sokoban_map(filepath)
+        level = Level.from_file(filepath)
         
         print(f"\nSolving testcase {j+1} ({map_name} {level_num}): ")
         
-        # Đo lường
-        startTime = time.time()
-        itemMemory = psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
-        
-        (path, pushed, node_generated, nodes_repeated, node_explored) = a_star_sokoban(grid, start, boxes, goals)
-        
-        times = time.time() - startTime
-        memo_info = abs(psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024) - itemMemory)
-
-        if path is not None:
-            step = len(path)
+        # Lời giải đã có trong cache: dùng lại số liệu của lần giải đã lưu
+        entry = None
+        if cache is not None:
+            options = cache_options(engine, push_level, heuristic_mode, use_macros, use_corral, open_list, weight, beam_width, closed)
+            cache_key = cache.key(level, engine, options, trace_memory)
+            entry = cache.get(cache_key)
+        if entry is not None:
+            print("(từ cache)")
+            (path, pushed, node_generated, nodes_repeated, node_explored) = entry_result(entry)
+            stats, metrics = entry['stats'], entry['metrics']
         else:
-            step = 0
+            # Đo lường: thời gian, đỉnh bộ nhớ cấp phát, kích thước frontier/visited
+            stats = {}
+            with SolveMonitor(trace_memory) as monitor:
+                (path, pushed, node_generated, nodes_repeated, node_explored) = solve_level(level, stats, heuristic_mode, monitor, use_macros, use_corral, open_list)
+            metrics = monitor.report(node_generated)
+            if cache is not None and "aborted" not in stats:
+                cache.put(cache_key, make_entry((path, pushed, node_generated, nodes_repeated, node_explored), stats, metrics))
+        times = metrics['time']
+        memo_info = metrics['peak_memory_mb']
+
+        # PDB / macro / corral: mức giảm node so với Hungarian thuần, cùng mức tìm
+        # kiếm, không macro, không corral (đo trong cùng chế độ monitor để so thời gian)
+        pdb_columns = ",,"
+        pdb_report = None
+        macro_report = None
+        corral_report = None
+        open_list_report = None
+        if ("pdb_entries" in stats or use_macros or use_corral) and entry is None:
+            with SolveMonitor(trace_memory) as base_monitor:
+                baseline = solve_level(level, None, "matching", base_monitor)[2]
+            base_time = base_monitor.report(baseline)['time']
+            reduction = 100.0 * (baseline - node_generated) / baseline
+            pdb_columns = f",,{reduction:0.2f}"
+            if "pdb_entries" in stats:
+                pdb_columns = f"{stats['pdb_entries']},{stats['pdb_build_time']:0.6f},{reduction:0.2f}"
+                source = "cache" if stats["pdb_cached"] else f"build {stats['pdb_build_time']:0.3f}s"
+                pdb_report = (f"PDB k={stats['pdb_size']}: {stats['pdb_entries']} entries ({source}), "
+                              f"nodes {baseline} -> {node_generated} ({reduction:0.2f}% fewer)")
+            if use_macros:
+                macro_report = (f"Macros: tunnel={stats['tunnel_macros']}, room={stats['room_macros']}, "
+                                f"nodes {baseline} -> {node_generated} ({reduction:0.2f}% fewer)")
+            if use_corral:
+                corral_report = (f"PI-corral: {stats['corral_pruned']} successors pruned at {stats['corral_nodes']} nodes, "
+                                 f"nodes {baseline} -> {node_generated} ({reduction:0.2f}% fewer), "
+                                 f"time {base_time:0.3f} -> {times:0.3f} s")
+
+        # Bucket queue: so với heap trên cùng cấu hình (số node duyệt và thời gian)
+        if open_list != "heap" and entry is None:
+            with SolveMonitor(trace_memory) as heap_monitor:
+                heap_explored = solve_level(level, None, heuristic_mode, heap_monitor, use_macros, use_corral)[4]
+            heap_time = heap_monitor.report(heap_explored)['time']
+            open_list_report = (f"Open list: {open_list} vs heap, explored {heap_explored} -> {node_explored}, "
+                                f"time {heap_time:0.3f} -> {times:0.3f} s")
+
+        # Không có lời giải thì Step để trống; Status tách hết budget khỏi không có lời giải
+        status = result_status(path, stats)
+        step = len(path) if path is not None else ""
 
         # Ghi vào file CSV
         with open(output_csv, 'a+') as f:
-            f.write(f"{map_name},{level_num},A*,"
-                    f"{node_generated},{node_explored},{step},"
-                    f"{times:0.6f},{memo_info:0.6f}\n")
+            f.write(f"{map_name},{level_num},{algo_name},"
+                    f"{node_generated},{node_explored},{step},{status},{'yes' if entry is not None else 'no'},"
+                    f"{times:0.6f},{memo_info:0.6f},{pdb_columns},{metric_columns(metrics)}\n")
             
         print(f"Results testcase {j+1}. Node generated: {node_generated}, "
-              f"Node explored: {node_explored}, Step: {step}, "
+              f"Node explored: {node_explored}, Step: {step}, Status: {status}, "
               f"Time: {times:0.6f} s, Memory: {memo_info:0.6f} MB")
 
         # Ghi vào file result
         with open(result_file, "a+", encoding="utf-8") as rf:
              rf.write(f"=== Testcase {j+1} ({map_name} {level_num}) ===\n")
+             if pdb_report is not None:
+                rf.write(pdb_report + "\n")
+             if macro_report is not None:
+                rf.write(macro_report + "\n")
+             if corral_report is not None:
+                rf.write(corral_report + "\n")
+             if open_list_report is not None:
+                rf.write(open_list_report + "\n")
+             rf.write("\n".join(metric_lines(metrics)) + "\n")
+             if "closed_states" in stats:
+                rf.write(f"Closed set: {stats['closed_set']}, {stats['closed_states']} states, "
+                         f"{stats['closed_bytes_per_state']:0.1f} bytes/state\n")
+             if "iterations" in stats:
+                rf.write(f"IDA*: {stats['iterations']} iterations, transposition table "
+                         f"{stats['table_bytes']} bytes ({stats['table_replaced']} replacements)\n")
+             if "forward_nodes" in stats:
+                rf.write(f"Bidirectional: forward {stats['forward_nodes']} nodes / {stats['forward_depth']} layers, "
+                         f"backward {stats['backward_nodes']} nodes / {stats['backward_depth']} layers\n")
              if path is not None:
                 rf.write(f"Path: {path}\n")
              else:
-                rf.write("No solution found.\n")
+                rf.write((budget_line(stats) or "No solution found.") + "\n")
 
-    print("\nSolving A* algorithm results Completed")
+    print(f"\nSolving {algo_name} algorithm results Completed")
@@ -0,0 +1,351 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+import signal
+import time
+
+import dfs as dfs_engine
+from budget import SearchBudget, budget_line, result_status
+from external import RAM_MB, external_bfs
+from Heuristic import BEAM_WIDTH, WEIGHT, a_star_sokoban, beam_search, bidirectional_sokoban, ida_star_sokoban
+from instrument import METRIC_COLUMNS, SolveMonitor, metric_columns, metric_lines
+from level import Level
+from solution_cache import SolutionCache, cache_options, entry_result, make_entry
+from solver_worker import ENGINES as WORKER_ENGINES, PORTFOLIO, PortfolioJob
+from testcases import all_testcases, testcase_path
+
+# =============================== BENCHMARK ===============================
+# Chạy các level trên một process pool: mỗi level là một task, mỗi worker chỉ nhận
+# một task (maxtasksperchild=1) nên bộ nhớ của level trước không lẫn vào số đo
+# của level sau, và một level khó không chặn cả lượt chạy. Kết quả được ghi theo
+# thứ tự level, cùng định dạng A_star.csv / DFS.csv của các driver.
+# Riêng 'portfolio' chạy tuần tự từng level, mỗi level đua song song các engine
+# PORTFOLIO (solver_worker.PortfolioJob) với cấu hình mặc định của từng engine.
+
+A_STAR_HEADER = ("Map,Level,Algorithm,Node generated,Node explored,Step,Status,Cached,Time (s),Memory (MB),"
+                 "PDB entries,PDB build (s),Node reduction (%)," + ",".join(METRIC_COLUMNS) + "\n")
+# Cached: số đo của dòng là của lần giải đã lưu trong Cache/solutions, không phải đo lại
+DFS_HEADER = "Map,Level,Algorithm,Node generated,Step,Status,Cached,Time (s),Memory (MB)," + ",".join(METRIC_COLUMNS) + "\n"
+
+ENGINES = ('astar', 'ida', 'bidir', 'dfs', 'wastar', 'gbfs', 'beam', 'external', 'portfolio')
+BEST_FIRST = ('astar', 'wastar', 'gbfs')
+# SIGALRM chỉ là chốt chặn cuối (dựng PDB, macro...): engine tự dừng theo SearchBudget
+# đúng timeout và còn giữ được số liệu, nên alarm đặt muộn hơn một chút
+ALARM_GRACE = 2.0
+
+
+class LevelTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise LevelTimeout()
+
+
+def algorithm_name(engine, push_level, heuristic_mode, macros=False, open_list='heap', weight=None, beam_width=None,
+                   closed='builtin'):
+    """Tên thuật toán ghi vào cột Algorithm, giống các driver __main__."""
+    if engine == 'portfolio':
+        return "Portfolio"
+    macros = macros and engine in BEST_FIRST + ('dfs',)
+    push_level = push_level or macros
+    if engine == 'dfs':
+        name = "DFS-push" if push_level else "DFS"
+    else:
+        name = {'bidir': "Bidirectional", 'ida': "IDA*", 'beam': "Beam search", 'gbfs': "Greedy BFS",
+                'wastar': "Weighted A*", 'astar': "A*", 'external': "External BFS"}[engine]
+        if push_level and engine in BEST_FIRST:
+            name += "-push"
+        if engine == 'wastar':
+            name += f" (w={weight or WEIGHT})"
+        if engine == 'beam':
+            name += f" (width {beam_width or BEAM_WIDTH})"
+        if heuristic_mode != "matching" and engine not in ('bidir', 'external'):
+            name += f" ({heuristic_mode})"
+    if macros:
+        name += " + macro"
+    if open_list != 'heap' and engine in BEST_FIRST:
+        name += f" + {open_list}"
+    if closed != 'builtin' and engine in BEST_FIRST + ('dfs',):
+        name += f" + {closed}"
+    return name
+
+
+def solve(engine, level, push_level, heuristic_mode, budget, stats, monitor, macros=False, open_list='heap',
+          weight=None, beam_width=None, closed='builtin', ram_mb=RAM_MB):
+    """
+    Giải level (Level.from_file), trả về bộ 5 (path hoặc None, cú đẩy, sinh ra, lặp lại, duyệt) như a_star_sokoban.
+    macros chỉ có tác dụng với BEST_FIRST và 'dfs', open_list chỉ với BEST_FIRST; weight / beam_width
+    = None là mặc định của 'wastar' / 'beam'; closed (closedset.py) với BEST_FIRST và 'dfs';
+    ram_mb: bộ đệm successor của 'external' (external.py).
+    """
+    if engine == 'dfs':
+        generated, step, _, _, actions = dfs_engine.dfs(level, push_level, stats, budget, monitor, macros, closed)
+        path = "".join(d.get_char() for d in actions) if step > 0 else None
+        return path, 0, generated, 0, generated
+
+    if engine == 'bidir':
+        result = bidirectional_sokoban(level, stats, budget, monitor)
+    elif engine == 'ida':
+        result = ida_star_sokoban(level, stats, heuristic_mode, budget=budget, monitor=monitor)
+    elif engine == 'external':
+        result = external_bfs(level, stats, budget, monitor, ram_mb)
+    elif engine == 'beam':
+        result = beam_search(level, beam_width or BEAM_WIDTH, stats, heuristic_mode, budget, monitor)
+    else:
+        search_weight = {'gbfs': None, 'wastar': weight or WEIGHT}.get(engine, 1)
+        result = a_star_sokoban(level, push_level, stats, heuristic_mode, budget, monitor, macros,
+                                open_list=open_list, weight=search_weight, closed=closed)
+    return result
+
+
+def empty_row(index, map_name, level_num, status='solved'):
+    metrics = {'time': 0.0, 'peak_memory_mb': 0.0, 'peak_frontier': 0, 'peak_visited': 0,
+               'bytes_per_state': 0.0, 'nodes_per_sec': 0.0, 'first_solution': None}
+    return {'index': index, 'map': map_name, 'level': level_num, 'path': None, 'generated': 0, 'explored': 0,
+            'time': 0.0, 'memory': 0.0, 'status': status, 'stats': {}, 'metrics': metrics, 'cached': False}
+
+
+def run_level(task):
+    """
+    Chạy trong worker. Giới hạn thời gian bằng SIGALRM (ngắt ngay trong vòng lặp
+    tìm kiếm); trên nền tảng không có SIGALRM thì process cha chờ có hạn thay.
+    """
+    index, map_name, level_num, options = task
+    row = empty_row(index, map_name, level_num)
+    filepath = testcase_path(map_name, level_num)
+    if not os.path.exists(filepath):
+        row['status'] = 'missing'
+        return row
+
+    level = Level.from_file(filepath)
+    cache = SolutionCache() if options['cache'] else None
+    if cache is not None:
+        engine_options = cache_options(options['engine'], options['push_level'], options['heuristic_mode'],
+                                       options['macros'], open_list=options['open_list'],
+                                       weight=options['weight'], beam_width=options['beam_width'],
+                                       closed=options['closed'], ram_mb=options['ram_mb'])
+        cache_key = cache.key(level, options['engine'], engine_options, options['trace'])
+        entry = cache.get(cache_key)
+        if entry is not None:
+            row['path'], _, row['generated'], _, row['explored'] = entry_result(entry)
+            row['stats'], row['metrics'] = entry['stats'], entry['metrics']
+            row['time'], row['memory'] = row['metrics']['time'], row['metrics']['peak_memory_mb']
+            row['status'] = 'solved' if row['path'] is not None else 'no solution'
+            row['cached'] = True
+            return row
+
+    timeout = options['timeout']
+    use_alarm = timeout and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout + ALARM_GRACE)
+
+    monitor = SolveMonitor(options['trace'])
+    try:
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, \
+                (contextlib.nullcontext() if options['verbose'] else contextlib.redirect_stdout(devnull)), monitor:
+            budget = SearchBudget(options['max_nodes'], timeout or None, options['max_memory'])
+            result = solve(options['engine'], level, options['push_level'], options['heuristic_mode'],
+                           budget, row['stats'], monitor, options['macros'], options['open_list'],
+                           options['weight'], options['beam_width'], options['closed'], options['ram_mb'])
+        row['path'], _, row['generated'], _, row['explored'] = result
+        row['status'] = result_status(row['path'], row['stats'])
+    except LevelTimeout:
+        row['status'] = 'timeout'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    row['metrics'] = monitor.report(row['generated'])
+    row['time'] = row['metrics']['time']
+    row['memory'] = row['metrics']['peak_memory_mb']
+    if cache is not None and row['status'] in ('solved', 'no solution'):
+        cache.put(cache_key, make_entry(result, row['stats'], row['metrics']))
+    return row
+
+
+def run_benchmark(tasks, workers, timeout):
+    """Chạy các task trên pool, trả về các dòng kết quả đã sắp theo thứ tự level."""
+    rows = []
+    with multiprocessing.Pool(workers, maxtasksperchild=1) as pool:
+        pending = [(task, pool.apply_async(run_level, (task,))) for task in tasks]
+        for task, result in pending:
+            index, map_name, level_num, _ = task
+            try:
+                # Dự phòng khi worker không tự ngắt được: chờ thêm một khoảng rồi bỏ qua
+                row = result.get(timeout * 2 + 5 if timeout else None)
+            except multiprocessing.TimeoutError:
+                row = empty_row(index, map_name, level_num, 'timeout')
+                row['time'] = float(timeout)
+            print(f"Testcase {index + 1} ({map_name} {level_num}): {row['status']}{' (cache)' if row['cached'] else ''}, "
+                  f"Node generated: {row['generated']}, Time: {row['time']:0.3f} s")
+            rows.append(row)
+        pool.terminate()
+    rows.sort(key=lambda r: r['index'])
+    return rows
+
+
+def run_portfolio(tasks, timeout, engines=PORTFOLIO):
+    """
+    Giải lần lượt từng level bằng PortfolioJob; stats['portfolio'] ghi engine thắng và
+    thời gian (wall) tới lời giải đầu tiên, cũng là cột Time. Chỉ giới hạn thời gian.
+    """
+    rows = []
+    for index, map_name, level_num, options in tasks:
+        row = empty_row(index, map_name, level_num)
+        filepath = testcase_path(map_name, level_num)
+        if not os.path.exists(filepath):
+            row['status'] = 'missing'
+            rows.append(row)
+            continue
+        cache = SolutionCache() if options['cache'] else None
+        job = PortfolioJob(Level.from_file(filepath), engines, cache)
+        while job.poll() == 'running':
+            if timeout and job.elapsed > timeout:
+                job.cancel()
+                row['status'] = 'timeout'
+                row['time'] = float(timeout)
+                break
+            time.sleep(0.01)
+        if job.status == 'done':
+            result = job.result
+            row['path'], _, row['generated'], _, row['explored'] = entry_result(result)
+            row['stats'], row['metrics'] = result['stats'], result['metrics']
+            row['memory'] = row['metrics']['peak_memory_mb']
+            row['cached'] = job.cached
+            if result['winner'] is None:
+                row['status'] = 'no solution'
+                row['time'] = job.elapsed
+            else:
+                row['time'] = result['winner_time'] if not job.cached else row['metrics']['time']
+                row['stats'] = dict(row['stats'], portfolio={'winner': result['winner'], 'time': row['time']})
+        elif job.status == 'error':
+            row['status'] = 'error'
+            print(job.error)
+        winner = row['stats'].get('portfolio', {}).get('winner')
+        print(f"Testcase {index + 1} ({map_name} {level_num}): {row['status']}{' (cache)' if row['cached'] else ''}"
+              f"{f', winner: {winner}' if winner else ''}, Node generated: {row['generated']}, Time: {row['time']:0.3f} s")
+        rows.append(row)
+    return rows
+
+
+def portfolio_winner(stats):
+    """Tên engine thắng của một dòng portfolio (cột Algorithm), '' nếu không có."""
+    winner = stats.get('portfolio', {}).get('winner')
+    return f" ({algorithm_name(winner, False, 'matching')})" if winner else ""
+
+
+def write_results(rows, options):
+    algo_name = algorithm_name(options['engine'], options['push_level'], options['heuristic_mode'], options['macros'],
+                               options['open_list'], options['weight'], options['beam_width'], options['closed'])
+    is_dfs = options['engine'] == 'dfs'
+    output_csv = "DFS.csv" if is_dfs else "A_star.csv"
+    result_file = "result.txt" if is_dfs else "result_A_star.txt"
+
+    with open(output_csv, "w") as f:
+        f.write(DFS_HEADER if is_dfs else A_STAR_HEADER)
+        for row in rows:
+            if row['status'] == 'missing':
+                continue
+            # Không có lời giải thì Step để trống, Status ghi lý do (timeout, node limit...)
+            step = len(row['path']) if row['path'] is not None else ""
+            cached = "yes" if row['cached'] else "no"
+            if is_dfs:
+                f.write(f"{row['map']},{row['level']},{algo_name},{row['generated']},{step},{row['status']},{cached},"
+                        f"{row['time']:0.6f},{row['memory']:0.6f},{metric_columns(row['metrics'])}\n")
+            else:
+                stats = row['stats']
+                pdb_columns = ",,"
+                if "pdb_entries" in stats:
+                    pdb_columns = f"{stats['pdb_entries']},{stats['pdb_build_time']:0.6f},"
+                f.write(f"{row['map']},{row['level']},{algo_name}{portfolio_winner(stats)},{row['generated']},"
+                        f"{row['explored']},{step},{row['status']},{cached},"
+                        f"{row['time']:0.6f},{row['memory']:0.6f},{pdb_columns},{metric_columns(row['metrics'])}\n")
+
+    with open(result_file, "w", encoding="utf-8") as rf:
+        for row in rows:
+            rf.write(f"=== Testcase {row['index'] + 1} ({row['map']} {row['level']}) ===\n")
+            if row['status'] != 'missing':
+                rf.write("\n".join(metric_lines(row['metrics'])) + "\n")
+            if "portfolio" in row['stats']:
+                rf.write(f"Winner: {row['stats']['portfolio']['winner']} after {row['stats']['portfolio']['time']:0.3f} s\n")
+            if "closed_states" in row['stats']:
+                rf.write(f"Closed set: {row['stats']['closed_set']}, {row['stats']['closed_states']} states, "
+                         f"{row['stats']['closed_bytes_per_state']:0.1f} bytes/state\n")
+            if "external_layers" in row['stats']:
+                rf.write(f"External: {row['stats']['external_layers']} layers, {row['stats']['external_runs']} runs, "
+                         f"peak disk {row['stats']['external_peak_disk'] / (1024 * 1024):0.3f} MB\n")
+            if "tunnel_macros" in row['stats']:
+                rf.write(f"Macros: tunnel={row['stats']['tunnel_macros']}, room={row['stats']['room_macros']}\n")
+            if row['path'] is not None:
+                rf.write(f"Path: {row['path']}\n")
+            elif budget_line(row['stats']):
+                rf.write(budget_line(row['stats']) + "\n")
+            elif row['status'] == 'timeout':
+                rf.write(f"Timed out after {options['timeout']} s.\n")
+            elif row['status'] == 'missing':
+                rf.write("Testcase file not found.\n")
+            else:
+                rf.write("No solution found.\n")
+    print(f"\nWrote {output_csv} and {result_file}")
+
+
+def parse_levels(text):
+    """"1-40,45" -> {1, ..., 40, 45} (số thứ tự testcase 1..80)."""
+    levels = set()
+    for part in text.split(","):
+        low, _, high = part.partition("-")
+        levels.update(range(int(low), int(high or low) + 1))
+    return levels
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Chạy song song các testcase trên process pool.")
+    parser.add_argument("--engine", choices=ENGINES, default="astar",
+                        help="portfolio: đua song song các engine --portfolio trên từng level")
+    parser.add_argument("--portfolio", default=",".join(PORTFOLIO),
+                        help=f"engine của portfolio, cách nhau bởi dấu phẩy (mặc định {','.join(PORTFOLIO)})")
+    parser.add_argument("--push", action="store_true", help="tìm kiếm mức cú đẩy (A*, DFS)")
+    parser.add_argument("--macro", action="store_true", help="macro tunnel / goal room, mức cú đẩy (A*, DFS)")
+    parser.add_argument("--open-list", choices=("heap", "bucket"), default="heap", help="open list của A* (openlist.py)")
+    parser.add_argument("--closed", choices=("builtin", "packed"), default="builtin",
+                        help="tập đã duyệt của A* / DFS (closedset.py)")
+    parser.add_argument("--ram", type=float, default=RAM_MB,
+                        help=f"MB RAM cho bộ đệm successor của external trước khi ghi ra đĩa (mặc định {RAM_MB:g})")
+    parser.add_argument("--weight", type=float, default=None, help=f"hệ số h của wastar (mặc định {WEIGHT})")
+    parser.add_argument("--beam-width", type=int, default=None, help=f"số node mỗi tầng của beam (mặc định {BEAM_WIDTH})")
+    parser.add_argument("--heuristic", choices=("matching", "greedy", "pdb", "pdb3"), default="matching")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--timeout", type=float, default=60.0, help="giây cho mỗi level, 0 = không giới hạn")
+    parser.add_argument("--max-nodes", type=int, default=None, help="số node sinh ra tối đa cho mỗi level")
+    parser.add_argument("--max-memory", type=float, default=None, help="MB cấp phát thêm tối đa cho mỗi level")
+    parser.add_argument("--levels", default="1-80", help="testcase cần chạy, ví dụ 1-40,45")
+    parser.add_argument("--verbose", action="store_true", help="giữ output của solver")
+    parser.add_argument("--no-cache", action="store_true", help="luôn giải lại, không đọc/ghi Cache/solutions")
+    parser.add_argument("--no-trace", action="store_true",
+                        help="không dùng tracemalloc (nhanh hơn nhiều lần); bộ nhớ đo bằng đỉnh RSS của worker")
+    args = parser.parse_args()
+
+    options = {'engine': args.engine, 'push_level': args.push, 'heuristic_mode': args.heuristic,
+               'timeout': args.timeout, 'max_nodes': args.max_nodes, 'max_memory': args.max_memory, 'verbose': args.verbose,
+               'trace': not args.no_trace, 'cache': not args.no_cache, 'macros': args.macro,
+               'open_list': args.open_list, 'weight': args.weight, 'beam_width': args.beam_width,
+               'closed': args.closed, 'ram_mb': args.ram}
+    selected = parse_levels(args.levels)
+    tasks = [(j, map_name, level_num, options) for j, map_name, level_num in all_testcases() if j + 1 in selected]
+
+    portfolio = tuple(args.portfolio.split(","))
+    unknown = [engine for engine in portfolio if engine not in WORKER_ENGINES]
+    if unknown:
+        parser.error(f"unknown portfolio engine(s): {', '.join(unknown)}")
+    workers = len(portfolio) if args.engine == 'portfolio' else args.workers
+    print(f"Running {len(tasks)} testcases on {workers} workers "
+          f"({algorithm_name(args.engine, args.push, args.heuristic, args.macro, args.open_list, args.weight, args.beam_width, args.closed)})")
+    start = time.time()
+    if args.engine == 'portfolio':
+        rows = run_portfolio(tasks, args.timeout, portfolio)
+    else:
+        rows = run_benchmark(tasks, args.workers, args.timeout)
+    write_results(rows, options)
+    print(f"Benchmark completed in {time.time() - start:0.3f} s")
@@ -0,0 +1,119 @@
+import sys
+import time
+import tracemalloc
+
+from instrument import current_rss
+
+# =============================== SEARCH BUDGET ===============================
+# Giới hạn tài nguyên cho một lần giải: số node sinh ra, số giây và số MB bộ nhớ
+# cấp phát thêm. Mọi engine gọi exhausted() mỗi lần lấy một node ra khỏi frontier;
+# so số node là một phép so sánh số nguyên, còn đồng hồ và bộ nhớ chỉ được đọc
+# mỗi CHECK_INTERVAL lần gọi nên vòng lặp tìm kiếm gần như không chậm đi.
+# Hết budget thì engine dừng như khi không có lời giải, stats nhận
+# aborted = 'nodes' | 'time' | 'memory' và budget = số liệu tại lúc dừng.
+
+CHECK_INTERVAL = 256
+STATUS = {'nodes': 'node limit', 'time': 'timeout', 'memory': 'memory limit'}
+
+
+class SearchBudget:
+    """
+    max_nodes: số node sinh ra tối đa, max_seconds: giây kể từ khi tạo budget,
+    max_memory_mb: MB cấp phát thêm kể từ khi tạo (tracemalloc nếu đang bật, không
+    thì RSS hiện tại của process). None = không giới hạn. Tạo mới cho mỗi lần giải.
+    """
+
+    def __init__(self, max_nodes=None, max_seconds=None, max_memory_mb=None):
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+        self.max_memory_mb = max_memory_mb
+        self.reason = None
+        self.start = time.perf_counter()
+        self._memory_base = _memory_bytes()
+        self._countdown = CHECK_INTERVAL
+        self._timed = max_seconds is not None or max_memory_mb is not None
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def memory_mb(self):
+        return (_memory_bytes() - self._memory_base) / (1024 * 1024)
+
+    def exhausted(self, nodes, stats=None, now=False):
+        """
+        True khi đã vượt một giới hạn; lần đầu vượt thì ghi lý do vào stats.
+        now=True đọc đồng hồ / bộ nhớ ngay, cho vòng lặp gọi thưa (bộ điều phối HDA*).
+        """
+        if self.reason is not None:
+            return True
+        if self.max_nodes is not None and nodes >= self.max_nodes:
+            return self._stop('nodes', nodes, stats)
+        if not self._timed:
+            return False
+        self._countdown -= 1
+        if self._countdown and not now:
+            return False
+        self._countdown = CHECK_INTERVAL
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return self._stop('time', nodes, stats)
+        if self.max_memory_mb is not None and self.memory_mb() >= self.max_memory_mb:
+            return self._stop('memory', nodes, stats)
+        return False
+
+    def _stop(self, reason, nodes, stats):
+        self.reason = reason
+        report = self.report(nodes)
+        print(f"⛔ Dừng ({STATUS[reason]}): {nodes} node, {report['elapsed']:0.3f} s, {report['memory_mb']:0.3f} MB")
+        if stats is not None:
+            stats['aborted'] = reason
+            stats['budget'] = report
+        return True
+
+    def report(self, nodes):
+        return {'reason': self.reason, 'nodes': nodes, 'elapsed': round(self.elapsed(), 6),
+                'memory_mb': round(self.memory_mb(), 6)}
+
+
+def _memory_bytes():
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return current_rss()
+
+
+def budget_exhausted(budget, nodes, stats=None, now=False):
+    """budget có thể là None (không giới hạn)."""
+    return budget is not None and budget.exhausted(nodes, stats, now)
+
+
+def result_status(path, stats):
+    """'solved' | 'no solution' | 'node limit' | 'timeout' | 'memory limit'."""
+    if path is not None:
+        return 'solved'
+    if stats and stats.get('aborted') in STATUS:
+        return STATUS[stats['aborted']]
+    return 'no solution'
+
+
+def budget_limits(argv=None):
+    """
+    Giới hạn từ dòng lệnh của các driver: --max-nodes=N, --timeout=S, --max-memory=MB.
+    Trả về dict dùng cho SearchBudget(**limits).
+    """
+    limits = {'max_nodes': None, 'max_seconds': None, 'max_memory_mb': None}
+    flags = {'--max-nodes': ('max_nodes', int), '--timeout': ('max_seconds', float),
+             '--max-memory': ('max_memory_mb', float)}
+    for arg in sys.argv[1:] if argv is None else argv:
+        flag, _, value = arg.partition("=")
+        if flag in flags and value:
+            name, kind = flags[flag]
+            limits[name] = kind(value)
+    return limits
+
+
+def budget_line(stats):
+    """Dòng mô tả lần giải bị dừng vì hết budget (file kết quả), None nếu không bị dừng."""
+    report = (stats or {}).get('budget')
+    if report is None:
+        return None
+    return (f"Budget exhausted ({STATUS[report['reason']]}): {report['nodes']} nodes, "
+            f"{report['elapsed']:0.3f} s, {report['memory_mb']:0.3f} MB.")
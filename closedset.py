@@ -0,0 +1,148 @@
+import sys
+from array import array
+
+# =============================== CLOSED SET ===============================
+# Tập trạng thái đã duyệt của A* / DFS. Khóa trạng thái là khóa Zobrist 64 bit
+# (zobrist.py), nên thay vì set/dict của Python – mỗi khóa là một object int riêng
+# (~36 byte) cộng ô bảng băm (8–16 byte cho set, ~30 byte cho dict) – có thể lưu
+# thẳng các khóa trong array('Q') theo kiểu open addressing (dò tuyến tính), g đi
+# kèm trong array('i') song song. Bảng gấp đôi khi đầy quá MAX_LOAD.
+#
+# Khóa Zobrist đã ngẫu nhiên đều nên chỉ số ô = key & mask, không cần hash thêm.
+# Ô trống có khóa 0; trạng thái có khóa đúng bằng 0 được giữ riêng.
+#
+# Dò bảng bằng vòng lặp Python chậm hơn set/dict (viết bằng C), nên đây là lựa chọn
+# khi bộ nhớ là giới hạn: make_closed_set('builtin') vẫn là mặc định.
+
+MAX_LOAD = 0.7
+INITIAL_BITS = 8
+# Một khóa Zobrist 64 bit là int Python cỡ này (không phải int nhỏ được cache)
+INT_BYTES = sys.getsizeof(1 << 63)
+
+
+class PackedKeySet:
+    """Thay thế set các khóa 64 bit: add, in, len."""
+
+    def __init__(self, capacity_bits=INITIAL_BITS):
+        self.count = 0
+        self.has_zero = False
+        self._allocate(1 << capacity_bits)
+
+    def _allocate(self, size):
+        self.mask = size - 1
+        self.limit = int(size * MAX_LOAD)
+        self.keys = array('Q', bytes(8 * size))
+
+    def _slot(self, key):
+        """Ô chứa key, hoặc ô trống đầu tiên trên dãy dò của nó."""
+        keys, mask = self.keys, self.mask
+        i = key & mask
+        k = keys[i]
+        while k and k != key:
+            i = (i + 1) & mask
+            k = keys[i]
+        return i
+
+    def __len__(self):
+        return self.count + self.has_zero
+
+    def __contains__(self, key):
+        if not key:
+            return self.has_zero
+        return self.keys[self._slot(key)] == key
+
+    def add(self, key):
+        if not key:
+            self.has_zero = True
+            return
+        i = self._slot(key)
+        if self.keys[i] != key:
+            self.keys[i] = key
+            self.count += 1
+            if self.count > self.limit:
+                self._grow()
+
+    def _grow(self):
+        old = self.keys
+        self._allocate(2 * len(old))
+        keys = self.keys
+        for key in old:
+            if key:
+                keys[self._slot(key)] = key
+
+    @property
+    def nbytes(self):
+        return self.keys.itemsize * len(self.keys)
+
+
+class PackedKeyMap(PackedKeySet):
+    """Thay thế dict khóa 64 bit -> g (int 32 bit): get, [] =, in, len."""
+
+    def __init__(self, capacity_bits=INITIAL_BITS):
+        self.zero_value = None
+        super().__init__(capacity_bits)
+
+    def _allocate(self, size):
+        super()._allocate(size)
+        self.values = array('i', bytes(4 * size))
+
+    def get(self, key, default=None):
+        if not key:
+            return self.zero_value if self.has_zero else default
+        i = self._slot(key)
+        return self.values[i] if self.keys[i] == key else default
+
+    def __setitem__(self, key, value):
+        if not key:
+            self.has_zero, self.zero_value = True, value
+            return
+        i = self._slot(key)
+        self.values[i] = value
+        if self.keys[i] != key:
+            self.keys[i] = key
+            self.count += 1
+            if self.count > self.limit:
+                self._grow()
+
+    def _grow(self):
+        old_keys, old_values = self.keys, self.values
+        self._allocate(2 * len(old_keys))
+        keys, values = self.keys, self.values
+        for key, value in zip(old_keys, old_values):
+            if key:
+                i = self._slot(key)
+                keys[i] = key
+                values[i] = value
+
+    @property
+    def nbytes(self):
+        return super().nbytes + self.values.itemsize * len(self.values)
+
+
+def make_closed_set(kind='builtin', values=False):
+    """'builtin' (set / dict) hoặc 'packed'; values=True cho bảng khóa -> g của A*."""
+    if kind == 'builtin':
+        return {} if values else set()
+    if kind == 'packed':
+        return PackedKeyMap() if values else PackedKeySet()
+    raise ValueError(f"Unknown closed set: {kind}")
+
+
+def closed_set_bytes(closed):
+    """
+    Số byte của closed set. Với set/dict là bảng băm cộng các object int của khóa –
+    cận dưới, vì g của dict (int > 256 không được Python cache) không được tính.
+    """
+    if isinstance(closed, PackedKeySet):
+        return closed.nbytes
+    return sys.getsizeof(closed) + len(closed) * INT_BYTES
+
+
+def report_closed_set(closed, stats):
+    """Ghi closed_states và closed_bytes_per_state vào stats; trả về dòng mô tả."""
+    states = len(closed)
+    per_state = closed_set_bytes(closed) / states if states else 0.0
+    if stats is not None:
+        stats.update(closed_set='packed' if isinstance(closed, PackedKeySet) else 'builtin',
+                     closed_states=states, closed_bytes_per_state=per_state)
+    return f"{states} states, {per_state:0.1f} bytes/state"
@@ -0,0 +1,78 @@
+from level import bits
+from movegen import reachable, shift
+
+
+class CorralPruner:
+    """
+    Cắt tỉa theo PI-corral cho tìm kiếm mức cú đẩy. Corral là một vùng sàn trống
+    người chơi không tới được (bị thùng ngăn cách); barrier là các thùng kề vùng đó.
+    Corral là PI-corral nếu:
+      - I: thùng barrier chỉ có thể bị đẩy vào trong corral (hướng ra ngoài bị tường
+           hoặc thùng barrier chặn, hoặc dẫn vào dead square),
+      - P: người chơi tới được mọi ô cần đứng để đẩy thùng barrier vào corral,
+    và corral chưa xong (còn goal trống bên trong hoặc barrier có thùng chưa ở goal).
+    Khi có PI-corral, chỉ các cú đẩy thùng barrier của nó cần được xét: nội dung
+    corral phải được xử lý trước, mọi cú đẩy khác có thể để sau mà không mất lời giải.
+    Các corral chỉ ngăn cách nhau bởi thùng không được gộp lại (bản đơn giản).
+
+    pruned: số successor bị cắt, nodes: số node có PI-corral giới hạn successor.
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self.pruned = 0
+        self.nodes = 0
+
+    def prune(self, reach, boxes, pushes):
+        """pushes: danh sách (ô thùng, hướng, ô đích) từ push_moves(level, reach, boxes)."""
+        level = self.level
+        rest = level.floor & ~boxes & ~reach
+        best = None
+        while rest:
+            start = (rest & -rest).bit_length() - 1
+            corral = reachable(level, start, boxes)
+            rest &= ~corral
+            barrier = 0
+            for offset, _ in level.dirs:
+                barrier |= shift(corral, offset)
+            barrier &= boxes
+            if not barrier & ~level.goals and not corral & level.goals:
+                continue
+            if not self._is_pi(reach, boxes, corral, barrier):
+                continue
+            moves = [push for push in pushes if barrier >> push[0] & 1]
+            if moves and (best is None or len(moves) < len(best)):
+                best = moves
+        if best is None:
+            return pushes
+        self.nodes += 1
+        self.pruned += len(pushes) - len(best)
+        return best
+
+    def _is_pi(self, reach, boxes, corral, barrier):
+        """
+        Chỉ thùng barrier đứng yên cho tới cú đẩy vào corral đầu tiên, nên chúng được
+        coi như tường: cú đẩy bị chặn bởi thùng khác (ngoài barrier) vẫn tính là có thể.
+        """
+        level = self.level
+        fixed = level.walls | barrier
+        for box in bits(barrier):
+            for offset, _ in level.dirs:
+                behind, ahead = box - offset, box + offset
+                # Người chơi không vào được corral khi barrier chưa bị đẩy
+                if (fixed | corral) >> behind & 1:
+                    continue
+                if corral >> ahead & 1:
+                    if not reach >> behind & 1:
+                        return False
+                elif not (fixed | level.dead) >> ahead & 1:
+                    # Cú đẩy ra ngoài corral; đẩy vào dead square thì không tính
+                    return False
+        return True
+
+    def report(self, stats):
+        if stats is not None:
+            stats.update(corral_pruned=self.pruned, corral_nodes=self.nodes)
+
+    def summary(self):
+        return f"{self.pruned} successor(s) pruned at {self.nodes} node(s)"
@@ -0,0 +1,102 @@
+# Các luật của detector, cũng là các khóa của pruned lúc khởi tạo
+RULES = ('block2x2', 'wall', 'freeze')
+
+
+class DeadlockDetector:
+    """
+    Phát hiện deadlock động sau mỗi cú đẩy, chỉ xét vùng quanh thùng vừa đẩy:
+      - block2x2: ô vuông 2x2 chứa thùng vừa đẩy toàn thùng/tường, có thùng chưa ở goal
+      - wall:     thùng nằm trên một đoạn sát tường không thể rời ra, và đoạn đó có
+                  nhiều thùng hơn số goal (đoạn không có goal đã là dead square)
+      - freeze:   thùng bị chặn cả hai trục (đệ quy qua các thùng kề) mà cụm thùng
+                  bị đóng băng còn thùng chưa ở goal
+    pruned đếm số node bị cắt theo từng luật.
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self.pruned = dict.fromkeys(RULES, 0)
+        w = level.width
+        self.squares = [()] * level.size
+        self.lines = [()] * level.size
+        for i in level.cells:
+            self.squares[i] = tuple(
+                (1 << i) | (1 << (i + dx)) | (1 << (i + dy)) | (1 << (i + dx + dy))
+                for dx in (-1, 1) for dy in (-w, w)
+            )
+            self.lines[i] = tuple(self._wall_lines(i))
+
+    def _wall_lines(self, i):
+        """Các đoạn sát tường chứa ô i mà thùng trên đó không thể rời ra."""
+        level = self.level
+        w = level.width
+        for along, side in ((1, w), (w, 1)):
+            for s in (side, -side):
+                segment = 0
+                trapped = True
+                for step in (along, -along):
+                    cell = i
+                    while level.floor >> cell & 1:
+                        if level.floor >> (cell + s) & 1:
+                            trapped = False
+                            break
+                        segment |= 1 << cell
+                        cell += step
+                    if not trapped:
+                        break
+                if trapped:
+                    yield segment, (segment & level.goals).bit_count()
+
+    def is_deadlock(self, boxes, box):
+        """boxes: mask sau cú đẩy, box: ô thùng vừa được đẩy tới."""
+        level = self.level
+        obstacles = level.walls | boxes
+        off_goal = boxes & ~level.goals
+
+        for square in self.squares[box]:
+            if obstacles & square == square and off_goal & square:
+                self.pruned['block2x2'] += 1
+                return True
+
+        for segment, goal_count in self.lines[box]:
+            if (boxes & segment).bit_count() > goal_count:
+                self.pruned['wall'] += 1
+                return True
+
+        self._cluster = 0
+        if self._frozen(box, boxes, 0) and self._cluster & off_goal:
+            self.pruned['freeze'] += 1
+            return True
+        return False
+
+    def _frozen(self, box, boxes, visiting):
+        """
+        Thùng bị đóng băng nếu bị chặn theo cả trục ngang lẫn dọc. Các thùng đang
+        được xét (visiting) coi như tường để tránh đệ quy vô hạn.
+        """
+        visiting |= 1 << box
+        for offset in (1, self.level.width):
+            if not self._blocked(box, offset, boxes, visiting):
+                return False
+        self._cluster |= 1 << box
+        return True
+
+    def _blocked(self, box, offset, boxes, visiting):
+        level = self.level
+        a, b = box - offset, box + offset
+        solid = level.walls | visiting
+        if solid >> a & 1 or solid >> b & 1:
+            return True
+        if level.dead >> a & 1 and level.dead >> b & 1:
+            return True
+        for side in (a, b):
+            if boxes >> side & 1 and self._frozen(side, boxes, visiting):
+                return True
+        return False
+
+    def count(self, rule):
+        """Ghi nhận một node bị cắt bởi luật ngoài detector (vd. heuristic = INF)."""
+        self.pruned[rule] = self.pruned.get(rule, 0) + 1
+
+    def summary(self):
+        return ", ".join(f"{rule}={count}" for rule, count in self.pruned.items())
@@ -1,14 +1,24 @@
 import time
 import os
-import psutil
+import sys
 from queue import Queue
 from copy import copy, deepcopy
 from datetime import datetime
 import math
 from sortedcontainers import SortedList
 import numpy as np
-from scipy.optimize import linear_sum_assignment
 import pandas as pd
+from budget import SearchBudget, budget_exhausted, budget_limits, budget_line, result_status
+from closedset import make_closed_set, report_closed_set
+from deadlock import RULES, DeadlockDetector
+from instrument import METRIC_COLUMNS, SolveMonitor, metric_columns, metric_lines
+from level import Level, bits
+from macro import MacroMoves, add_pushes
+from movegen import encode_push, is_solved, normalize, push_moves, rebuild_path, step_moves, step_path
+from nodestore import NodeStore
+from solution_cache import SolutionCache, cache_options, make_entry
+from testcases import testcase_path
+from zobrist import ZobristTable
 
 
 class Direction:
@@ -26,146 +36,160 @@ R = Direction((1, 0), 'R')
 U = Direction((0, -1), 'U')
 D = Direction((0, 1), 'D')
 directions = [U, L, D, R]
-
-
-def set_distance():
-    distanceToGoal = dict()
-    dead_squares = set()
-    for goal in goals:
-        distanceToGoal[goal] = dict()
-        for path in paths:
-            distanceToGoal[goal][path] = 1e9
-    queue = Queue()
-    for goal in goals:
-        distanceToGoal[goal][goal] = 0
-        queue.put(goal)
-        while not queue.empty():
-            position = queue.get()
-            for direction in directions:
-                boxPosition = (position[0] + direction.vector[0], position[1] + direction.vector[1])
-                playerPosition = (position[0] + 2 * direction.vector[0], position[1] + 2 * direction.vector[1])
-                if boxPosition in paths:
-                    if distanceToGoal[goal][boxPosition] == 1e9:
-                        if (boxPosition not in walls) and (playerPosition not in walls):
-                            distanceToGoal[goal][boxPosition] = distanceToGoal[goal][position] + 1
-                            queue.put(boxPosition)
-    for path in paths:
-        ok = 1
-        for goal in goals:
-            if distanceToGoal[goal][path] != 1e9:
-                ok = 0
-                break
-        if ok == 1:
-            dead_squares.add(path)
-    return distanceToGoal, dead_squares
-
-
-def set_available_moves(player, boxes):
-    available_moves = []
-    for direction in directions:
-        if (player[0] + direction.vector[0], player[1] + direction.vector[1]) not in walls:
-            if (player[0] + direction.vector[0], player[1] + direction.vector[1]) in boxes:
-                if ((player[0] + 2 * direction.vector[0], player[1] + 2 * direction.vector[1]) not in walls) and \
-                        ((player[0] + 2 * direction.vector[0], player[1] + 2 * direction.vector[1]) not in boxes):
-                    available_moves.append(direction)
-            else:
-                available_moves.append(direction)
-    return available_moves
-
-
-def move(player, boxes, direction):
-    temp = (player[0] + direction.vector[0], player[1] + direction.vector[1])
-    res = True
-    boxes = set(boxes)
-    if temp in boxes:
-        boxes.remove(temp)
-        boxes.add((player[0] + 2 * direction.vector[0], player[1] + 2 * direction.vector[1]))
-
-        if (player[0] + 2 * direction.vector[0], player[1] + 2 * direction.vector[1]) in dead_squares:
-            res = False
-    boxes = tuple(boxes)
-    player = temp
-    return res, player, boxes
-
-
-def is_win(goals, boxes):
-    return goals.issubset(boxes)
-
-
-def set_value(filename):
-    walls = set()
-    goals = set()
-    boxes = []
-    paths = set()
-    player = None
-    x = 0
-    y = 0
-    with open(filename, 'r') as f:
-        read_data = f.read()
-        lines = read_data.split('\n')
-        for line in lines:
-            x = 0
-            for char in line:
-                if char == '#':
-                    walls.add((x, y))
-                elif char == 'x':
-                    boxes.append((x, y))
-                    paths.add((x, y))
-                elif char == '?':
-                    goals.add((x, y))
-                    paths.add((x, y))
-                elif char == '@':
-                    player = (x, y)
-                    paths.add((x, y))
-                elif char == '-':
-                    goals.add((x, y))
-                    player = (x, y)
-                    paths.add((x, y))
-                elif char == '+':
-                    goals.add((x, y))
-                    boxes.append((x, y))
-                    paths.add((x, y))
-                elif char == '.':
-                    paths.add((x, y))
-                x += 1
-            y += 1
-    return walls, goals, tuple(boxes), paths, player
+char_to_direction = {d.char: d for d in directions}
 
 
 # =============================== DFS ===============================
-map_list = ['MINI COSMOS', 'MICRO COSMOS']
-itemMemory = psutil.Process(os.getpid()).memory_info().rss/(1024*1024)
-def dfs(curr_player, curr_boxes):
+def dfs(level, push_level=False, stats=None, budget=None, monitor=None, macros=False, closed='builtin'):
+    """
+    level: Level (Level.from_file), giải từ level.start / level.start_boxes.
+    budget: SearchBudget tùy chọn (budget.py); hết budget thì dừng như không có lời giải.
+    monitor: SolveMonitor đang chạy; không truyền thì dfs tự đo trong monitor riêng.
+    macros: dùng macro tunnel / goal room (macro.py), luôn tìm ở mức cú đẩy.
+    closed: tập đã duyệt 'builtin' (set) hoặc 'packed' (closedset.py); stats nhận
+    closed_states và closed_bytes_per_state.
+    Bộ nhớ trả về là đỉnh cấp phát trong lúc giải (tracemalloc), không phải RSS.
+    """
+    if monitor is None:
+        with SolveMonitor() as monitor:
+            return dfs(level, push_level, stats, budget, monitor, macros, closed)
+    if push_level or macros:
+        return dfs_pushes(level, stats, budget, monitor, macros, closed)
+
     node_generated = 0
-    frontier = [(curr_player, curr_boxes, 0, [])]  
-    explored = set()
-    explored.add((curr_player, curr_boxes))
+    deadlocks = DeadlockDetector(level)
+    zobrist = ZobristTable(level.cells)
+    player = level.start
+    boxes = level.start_boxes
+    boxes_key = zobrist.boxes_key(bits(boxes))
+    store = NodeStore()
+    frontier = [(player, boxes, boxes_key, 0, store.add(-1, 0))]  
+    explored = make_closed_set(closed)
+    explored.add(zobrist.state_key(boxes_key, player))
 
     node_generated += 1
     startTime = time.time()
 
     while frontier:
-        now_player, now_boxes, step, actions = frontier.pop()  
-        moves = set_available_moves(now_player, now_boxes)
-        for m in moves:
-            res, new_player, new_boxes = move(now_player, now_boxes, m)
-            if res and (new_player, new_boxes) not in explored:
-                explored.add((new_player, new_boxes))
+        if budget_exhausted(budget, node_generated, stats):
+            break
+        now_player, now_boxes, now_key, step, node = frontier.pop()  
+        monitor.observe(len(frontier), len(explored))
+        for d, new_player, new_boxes, box_from, box_to in step_moves(level, now_player, now_boxes):
+            new_key = now_key
+            if box_from is not None:
+                if level.dead >> box_to & 1 or deadlocks.is_deadlock(new_boxes, box_to):
+                    continue
+                new_key = zobrist.move_box(now_key, box_from, box_to)
+            state_key = zobrist.state_key(new_key, new_player)
+            if state_key not in explored:
+                explored.add(state_key)
                 node_generated += 1
 
-                if is_win(goals, new_boxes):
+                new_node = store.add(node, d)
+                if is_solved(level, new_boxes):
+                    monitor.solution_found()
                     end = time.time() - startTime
-                    memo_info = abs(psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024) - itemMemory)
-                    return (node_generated, step + 1, end, memo_info, actions + [m])
+                    memo_info = monitor.peak_memory_mb
+                    if stats is not None:
+                        stats.update(deadlocks.pruned)
+                    report_closed_set(explored, stats)
+                    return (node_generated, step + 1, end, memo_info, [char_to_direction[c] for c in step_path(level, store.moves(new_node))])
+
+                frontier.append((new_player, new_boxes, new_key, step + 1, new_node))
+
+    end = time.time() - startTime
+    memo_info = monitor.peak_memory_mb
+    if stats is not None:
+        stats.update(deadlocks.pruned)
+    report_closed_set(explored, stats)
+    return (node_generated, 0, end, memo_info, [])
+
+
+def dfs_pushes(level, stats=None, budget=None, monitor=None, macros=False, closed='builtin'):
+    """DFS mức cú đẩy: trạng thái = (ô chuẩn hóa của vùng người chơi, thùng)."""
+    node_generated = 0
+    deadlocks = DeadlockDetector(level)
+    zobrist = ZobristTable(level.cells)
+    start = level.start
+    start_boxes = level.start_boxes
+    boxes_key = zobrist.boxes_key(bits(start_boxes))
+    _, canon = normalize(level, start, start_boxes)
+    store = NodeStore('I')
+    macro = MacroMoves(level) if macros else None
+    frontier = [(start, start_boxes, boxes_key, store.add(-1, 0))]
+    explored = make_closed_set(closed)
+    explored.add(zobrist.state_key(boxes_key, canon))
+
+    node_generated += 1
+    startTime = time.time()
+
+    while frontier:
+        if budget_exhausted(budget, node_generated, stats):
+            break
+        now_player, now_boxes, now_key, node = frontier.pop()
+        monitor.observe(len(frontier), len(explored))
+        region, _ = normalize(level, now_player, now_boxes)
+        for box_pos, d, target in push_moves(level, region, now_boxes):
+            if level.dead >> target & 1:
+                continue
+            new_boxes = now_boxes ^ (1 << box_pos) ^ (1 << target)
+            codes, new_player = [encode_push(box_pos, d)], box_pos
+            if macro is not None:
+                codes, new_player, target, new_boxes = macro.extend(new_boxes, box_pos, d, target)
+            if deadlocks.is_deadlock(new_boxes, target):
+                continue
+            new_key = zobrist.move_box(now_key, box_pos, target)
+            _, new_canon = normalize(level, new_player, new_boxes)
+            state_key = zobrist.state_key(new_key, new_canon)
+            if state_key in explored:
+                continue
+            explored.add(state_key)
+            node_generated += 1
+
+            new_node = add_pushes(store, node, codes)
+            if is_solved(level, new_boxes):
+                monitor.solution_found()
+                path = rebuild_path(level, start, start_boxes, store.moves(new_node))
+                end = time.time() - startTime
+                memo_info = monitor.peak_memory_mb
+                if stats is not None:
+                    stats.update(deadlocks.pruned)
+                report_closed_set(explored, stats)
+                if macro is not None:
+                    macro.report(stats)
+                return (node_generated, len(path), end, memo_info, [char_to_direction[c] for c in path])
 
-                frontier.append((new_player, new_boxes, step + 1, actions + [m]))
+            frontier.append((new_player, new_boxes, new_key, new_node))
 
     end = time.time() - startTime
-    memo_info = abs(psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024) - itemMemory)
-    return (node_generated, step, end, memo_info, [m.get_char() for m in actions])
+    memo_info = monitor.peak_memory_mb
+    if stats is not None:
+        stats.update(deadlocks.pruned)
+    report_closed_set(explored, stats)
+    if macro is not None:
+        macro.report(stats)
+    return (node_generated, 0, end, memo_info, [])
 # =============================== DFS ===============================
 if __name__ == '__main__':
     map_list = ['MINI COSMOS', 'MICRO COSMOS']
+    # --push: tìm kiếm mức cú đẩy
+    push_level = "--push" in sys.argv
+    # --macro: DFS mức cú đẩy với macro tunnel / goal room (macro.py)
+    use_macros = "--macro" in sys.argv
+    algo_name = "DFS-push" if push_level or use_macros else "DFS"
+    if use_macros:
+        algo_name += " + macro"
+    # --packed: tập đã duyệt là bảng khóa 64 bit đóng gói (closedset.py) thay cho set
+    closed = "packed" if "--packed" in sys.argv else "builtin"
+    if closed != "builtin":
+        algo_name += f" + {closed}"
+    # --no-trace: không bật tracemalloc (thời gian sạch hơn, bộ nhớ lấy theo đỉnh RSS)
+    trace_memory = "--no-trace" not in sys.argv
+    # --no-cache: luôn giải lại, không đọc/ghi Cache/solutions
+    cache = None if "--no-cache" in sys.argv else SolutionCache()
+    # --max-nodes=N, --timeout=S, --max-memory=MB: giới hạn cho mỗi level (budget.py)
+    limits = budget_limits()
     i = -1
     if not os.path.exists("DFS.csv"):
          header_mode = "w+"
@@ -173,7 +197,7 @@ if __name__ == '__main__':
          header_mode = "w"  # Ghi đè file cũ luôn
 
     with open("DFS.csv", header_mode) as f:
-        f.write("Map,Level,Algorithm,Node generated,Step,Time (s),Memory (MB)\n")
+        f.write("Map,Level,Algorithm,Node generated,Step,Status,Cached,Time (s),Memory (MB)," + ",".join(METRIC_COLUMNS) + "\n")
 
     i = 0
     
@@ -182,21 +206,53 @@ if __name__ == '__main__':
     for j in range(i, 80):
         map_name = map_list[int(j/40)]
         level_num = j%40 + 1
-        walls, goals, boxes, paths, player = set_value("./Testcases/{}/{}.txt".format(map_list[int(j/40)], j%40+1))
-        distanceToGoal, dead_squares = set_distance()
+        filepath = testcase_path(map_name, level_num)
+        level = Level.from_file(filepath)
         print(f"\nSolving testcase {j+1} ({map_name} {level_num}): ")
-        (node_created, step, times, memo, actions) = dfs(player, boxes)
+        entry = None
+        if cache is not None:
+            cache_key = cache.key(level, "dfs", cache_options("dfs", push_level, macros=use_macros, closed=closed), trace_memory)
+            entry = cache.get(cache_key)
+        if entry is not None:
+            print("(từ cache)")
+            stats, metrics = entry['stats'], entry['metrics']
+            node_created, times, memo = entry['generated'], metrics['time'], metrics['peak_memory_mb']
+            actions = [char_to_direction[c] for c in entry['path'] or ""]
+            step = len(actions)
+        else:
+            stats = {}
+            with SolveMonitor(trace_memory) as monitor:
+                (node_created, step, times, memo, actions) = dfs(level, push_level, stats, SearchBudget(**limits), monitor, use_macros, closed)
+            metrics = monitor.report(node_created)
+            if use_macros:
+                # Mức giảm node so với DFS mức cú đẩy không macro
+                baseline = dfs(level, True, budget=SearchBudget(**limits), monitor=SolveMonitor(trace=False))[0]
+                stats['node_reduction'] = round(100.0 * (baseline - node_created) / baseline, 2)
+            if cache is not None and "aborted" not in stats:
+                path = "".join(d.get_char() for d in actions) if step > 0 else None
+                cache.put(cache_key, make_entry((path, 0, node_created, 0, node_created), stats, metrics))
 
+        # Không có lời giải thì Step để trống; Status tách hết budget khỏi không có lời giải
+        status = result_status("".join(d.get_char() for d in actions) if step > 0 else None, stats)
         f = open("DFS.csv", 'a+')
-        f.write("{},{},DFS,{},{},{:0.6f},{:0.6f}\n".format(map_list[int(j/40)], j%40+1, node_created, step, times, memo))
-        print("Results testcase {}. Node generated: {}, Step: {}, Time: {:0.6f} s, Memory: {:0.6f} MB\n".format(j+1, node_created, step, times, memo))
+        f.write("{},{},{},{},{},{},{},{:0.6f},{:0.6f},{}\n".format(map_list[int(j/40)], j%40+1, algo_name, node_created, step if step > 0 else "", status, "yes" if entry is not None else "no", times, memo, metric_columns(metrics)))
+        print("Results testcase {}. Node generated: {}, Step: {}, Status: {}, Time: {:0.6f} s, Memory: {:0.6f} MB".format(j+1, node_created, step, status, times, memo))
+        # stats còn chứa budget / macro / closed set: chỉ in số node bị cắt theo từng luật
+        print("Deadlock pruned: {}\n".format(", ".join("{}={}".format(k, stats[k]) for k in RULES if k in stats)))
         f.close()
 
         with open("result.txt", "a+") as rf:
              rf.write("=== Testcase {} ({} {}) ===\n".format(j+1, map_list[int(j/40)], j%40+1))
+             rf.write("\n".join(metric_lines(metrics)) + "\n")
+             if "closed_states" in stats:
+                rf.write("Closed set: {}, {} states, {:0.1f} bytes/state\n".format(
+                    stats['closed_set'], stats['closed_states'], stats['closed_bytes_per_state']))
+             if "node_reduction" in stats:
+                rf.write("Macros: tunnel={}, room={}, nodes {:0.2f}% fewer than DFS-push\n".format(
+                    stats['tunnel_macros'], stats['room_macros'], stats['node_reduction']))
              if step > 0:
                 rf.write("Path: {}\n".format("".join([d.get_char() for d in actions])))
              else:
-                rf.write("No solution found.\n")
+                rf.write((budget_line(stats) or "No solution found.") + "\n")
 
     print("\nSolving DFS algorithm results Completed")
\ No newline at end of file
@@ -0,0 +1,258 @@
+import argparse
+import heapq
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from budget import SearchBudget, budget_exhausted, budget_limits, budget_line
+from deadlock import DeadlockDetector
+from instrument import SolveMonitor, metric_lines
+from level import Level
+from movegen import encode_push, is_solved, normalize, push_moves, rebuild_path
+
+# =============================== EXTERNAL-MEMORY BFS ===============================
+# BFS mức cú đẩy theo tầng, frontier và tập đã duyệt nằm trên đĩa (thư mục scratch),
+# cho các level tự tạo lớn hơn RAM. Mỗi trạng thái là một bản ghi độ dài cố định:
+#   ô chuẩn hóa của người chơi (4 byte) + mask thùng (level.size bit) + cú đẩy dẫn tới nó (4 byte)
+# nên thứ tự byte của bản ghi cũng là thứ tự của trạng thái.
+#
+# Tầng d được đọc qua mmap; successor gom trong RAM tới khi vượt ram_mb thì được
+# sắp xếp, bỏ trùng rồi ghi thành một run. Hết tầng: trộn các run (heapq.merge),
+# bỏ trùng và trừ đi tập đã duyệt (file đã sắp xếp, trộn tuyến tính – phát hiện
+# trùng lặp trễ bằng sorted run) để được tầng d + 1; tập đã duyệt mới = trộn của tập
+# cũ với tầng d. RAM vì thế chỉ giữ bộ đệm successor, không phụ thuộc số trạng thái.
+#
+# Tầng đầu tiên chứa trạng thái đích cho lời giải tối ưu số cú đẩy. Đường đi được
+# dựng ngược: cú đẩy lưu trong bản ghi cho biết trạng thái cha, trạng thái cha được
+# tìm bằng tìm kiếm nhị phân trên file tập đã duyệt.
+
+CODE_BYTES = 4
+PLAYER_BYTES = 4
+RAM_MB = 64.0
+
+
+class ExternalBFS:
+    """
+    Một lần giải: các file của lần giải nằm trong scratch (tự tạo và tự xóa nếu không
+    truyền vào). live: các file đã tạo mà chưa xóa – scratch do người gọi truyền vào
+    được dọn hết kể cả khi lần giải bị ngắt giữa tầng (vd. LevelTimeout của benchmark).
+    runs: số run đã ghi, peak_disk: tổng byte file lớn nhất cùng lúc.
+    """
+
+    def __init__(self, level, ram_mb=RAM_MB, scratch=None):
+        self.level = level
+        self.box_bytes = (level.size + 7) // 8
+        self.state_size = PLAYER_BYTES + self.box_bytes
+        self.size = self.state_size + CODE_BYTES
+        # Bộ nhớ thật của một bản ghi trong list: object bytes + con trỏ của list
+        self.buffer_limit = max(1, int(ram_mb * 1024 * 1024 / (sys.getsizeof(bytes(self.size)) + 8)))
+        self.owns_scratch = scratch is None
+        self.scratch = tempfile.mkdtemp(prefix="sokoban-external-") if scratch is None else scratch
+        os.makedirs(self.scratch, exist_ok=True)
+        self.files = 0
+        self.live = set()
+        self.runs = 0
+        self.peak_disk = 0
+
+    # ---------------- Bản ghi ----------------
+    def pack(self, player, boxes, code):
+        return (player.to_bytes(PLAYER_BYTES, 'big') + boxes.to_bytes(self.box_bytes, 'big')
+                + code.to_bytes(CODE_BYTES, 'big'))
+
+    def unpack(self, record):
+        player = int.from_bytes(record[:PLAYER_BYTES], 'big')
+        boxes = int.from_bytes(record[PLAYER_BYTES:self.state_size], 'big')
+        return player, boxes, int.from_bytes(record[self.state_size:], 'big')
+
+    # ---------------- File ----------------
+    def new_file(self, records):
+        """Ghi các bản ghi (đã sắp xếp) ra file mới; trả về (đường dẫn, số bản ghi)."""
+        path = os.path.join(self.scratch, f"{self.files}.bin")
+        self.files += 1
+        self.live.add(path)
+        count = 0
+        with open(path, "wb", buffering=1 << 20) as f:
+            for record in records:
+                f.write(record)
+                count += 1
+        return path, count
+
+    def records(self, path):
+        """Đọc tuần tự các bản ghi của file qua mmap."""
+        size = self.size
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset in range(0, len(mm), size):
+                    yield mm[offset:offset + size]
+
+    def find(self, path, state):
+        """Tìm nhị phân bản ghi có phần trạng thái = state trong file đã sắp xếp."""
+        size, state_size = self.size, self.state_size
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            low, high = 0, len(mm) // size
+            while low < high:
+                mid = (low + high) // 2
+                if mm[mid * size:mid * size + state_size] < state:
+                    low = mid + 1
+                else:
+                    high = mid
+            record = mm[low * size:(low + 1) * size]
+        if record[:state_size] != state:
+            raise KeyError("state not found in closed file")
+        return record
+
+    def remove(self, path):
+        self.live.discard(path)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def disk_usage(self):
+        total = sum(entry.stat().st_size for entry in os.scandir(self.scratch))
+        self.peak_disk = max(self.peak_disk, total)
+        return total
+
+    # ---------------- Trộn ----------------
+    def unique(self, records):
+        """Bỏ các bản ghi trùng trạng thái (đầu vào đã sắp xếp), giữ bản ghi đầu."""
+        state_size = self.state_size
+        last = None
+        for record in records:
+            state = record[:state_size]
+            if state != last:
+                last = state
+                yield record
+
+    def subtract(self, records, closed):
+        """Các bản ghi của records (đã sắp xếp, không trùng) có trạng thái không nằm trong closed."""
+        state_size = self.state_size
+        closed = iter(closed)
+        seen = next(closed, None)
+        for record in records:
+            state = record[:state_size]
+            while seen is not None and seen[:state_size] < state:
+                seen = next(closed, None)
+            if seen is None or seen[:state_size] != state:
+                yield record
+            else:
+                self.repeated += 1
+
+    def spill(self, buffer, runs):
+        buffer.sort()
+        runs.append(self.new_file(self.unique(buffer))[0])
+        self.runs += 1
+        buffer.clear()
+
+    # ---------------- Tìm kiếm ----------------
+    def solve(self, stats=None, budget=None, monitor=None):
+        level = self.level
+        monitor = monitor or SolveMonitor(trace=False)
+        deadlocks = DeadlockDetector(level)
+        dirs = level.dirs
+        start, start_boxes = level.start, level.start_boxes
+        _, canon = normalize(level, start, start_boxes)
+
+        layer, layer_size = self.new_file([self.pack(canon, start_boxes, 0)])
+        closed, closed_size = self.new_file([])
+        generated, explored, depth = 1, 0, 0
+        self.repeated = 0
+        goal = None
+        try:
+            while layer_size and goal is None:
+                buffer, runs = [], []
+                for record in self.records(layer):
+                    if budget_exhausted(budget, generated, stats):
+                        break
+                    monitor.observe(layer_size + len(buffer), closed_size)
+                    explored += 1
+                    player, boxes, _ = self.unpack(record)
+                    if is_solved(level, boxes):
+                        monitor.solution_found()
+                        goal = record
+                        break
+                    region, _ = normalize(level, player, boxes)
+                    for box_pos, d, target in push_moves(level, region, boxes):
+                        if level.dead >> target & 1:
+                            continue
+                        new_boxes = boxes ^ (1 << box_pos) ^ (1 << target)
+                        if deadlocks.is_deadlock(new_boxes, target):
+                            continue
+                        _, new_canon = normalize(level, box_pos, new_boxes)
+                        buffer.append(self.pack(new_canon, new_boxes, encode_push(box_pos, d)))
+                        generated += 1
+                        if len(buffer) >= self.buffer_limit:
+                            self.spill(buffer, runs)
+                else:
+                    if buffer:
+                        self.spill(buffer, runs)
+                    # Tầng mới = (trộn các run) - đã duyệt - tầng hiện tại; đã duyệt += tầng hiện tại
+                    new_closed, closed_size = self.new_file(heapq.merge(self.records(closed), self.records(layer)))
+                    children = self.unique(heapq.merge(*(self.records(run) for run in runs)))
+                    next_layer, layer_size = self.new_file(self.subtract(children, self.records(new_closed)))
+                    self.disk_usage()
+                    for path in runs + [layer, closed]:
+                        self.remove(path)
+                    layer, closed = next_layer, new_closed
+                    depth += 1
+                    continue
+                break  # đích hoặc hết budget
+
+            if stats is not None:
+                stats.update(deadlocks.pruned)
+                stats.update(external_layers=depth, external_runs=self.runs, external_peak_disk=self.peak_disk)
+            if goal is None:
+                print(f"❌ Không tìm được lời giải. Tổng explored: {explored}, generated: {generated}")
+                return None, 0, generated, self.repeated, explored
+
+            # Dựng ngược: cú đẩy (ô thùng, hướng) của bản ghi cho biết trạng thái cha
+            codes = []
+            record = goal
+            for _ in range(depth):
+                player, boxes, code = self.unpack(record)
+                codes.append(code)
+                box, d = code >> 2, code & 3
+                parent_boxes = boxes ^ (1 << box) ^ (1 << (box + dirs[d][0]))
+                _, parent_canon = normalize(level, box - dirs[d][0], parent_boxes)
+                record = self.find(closed, self.pack(parent_canon, parent_boxes, 0)[:self.state_size])
+            path = rebuild_path(level, start, start_boxes, codes[::-1])
+            print(f"✅ Giải thành công sau {explored} trạng thái duyệt, {generated} node sinh ra ({depth} tầng).")
+            return path, depth, generated, self.repeated, explored
+        finally:
+            if self.owns_scratch:
+                shutil.rmtree(self.scratch, ignore_errors=True)
+            else:
+                for path in list(self.live):
+                    self.remove(path)
+
+
+def external_bfs(level, stats=None, budget=None, monitor=None, ram_mb=RAM_MB, scratch=None):
+    """
+    BFS mức cú đẩy với frontier / tập đã duyệt trên đĩa (xem đầu file); lời giải tối
+    ưu số cú đẩy, cùng kiểu trả về với a_star_sokoban. ram_mb: RAM tối đa cho bộ đệm
+    successor; scratch: thư mục cho các file tạm (mặc định thư mục tạm của hệ thống).
+    stats nhận external_layers, external_runs và external_peak_disk (byte).
+    """
+    return ExternalBFS(level, ram_mb, scratch).solve(stats, budget, monitor)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Giải một file level bằng BFS mức cú đẩy trên đĩa.")
+    parser.add_argument("level", help="file bản đồ (cùng ký hiệu với Testcases)")
+    parser.add_argument("--ram", type=float, default=RAM_MB, help=f"MB RAM cho bộ đệm successor (mặc định {RAM_MB:g})")
+    parser.add_argument("--scratch", default=None, help="thư mục cho file tạm (mặc định thư mục tạm của hệ thống)")
+    args, rest = parser.parse_known_args()
+
+    level = Level.from_file(args.level)
+    stats = {}
+    with SolveMonitor(trace=False) as monitor:
+        path, pushes, generated, repeated, explored = external_bfs(
+            level, stats, SearchBudget(**budget_limits(rest)), monitor, args.ram, args.scratch)
+    metrics = monitor.report(generated)
+    print("\n".join(metric_lines(metrics)))
+    print(f"Layers: {stats['external_layers']}, runs: {stats['external_runs']}, "
+          f"peak disk: {stats['external_peak_disk'] / (1024 * 1024):0.3f} MB")
+    print(f"Path: {path}" if path is not None else budget_line(stats) or "No solution found.")
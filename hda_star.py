@@ -0,0 +1,339 @@
+import argparse
+import contextlib
+import heapq
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import traceback
+
+from budget import budget_exhausted
+from deadlock import DeadlockDetector
+from Heuristic import a_star_sokoban, make_estimator
+from instrument import SolveMonitor
+from level import INF, Level, bits
+from movegen import encode_push, is_solved, normalize, push_moves, rebuild_path
+from testcases import all_testcases, testcase_path
+from zobrist import ZobristTable
+
+# =============================== HDA* ===============================
+# A* mức cú đẩy phân tán theo hash (Hash Distributed A*): mỗi trạng thái thuộc về
+# đúng một worker, chọn bằng khóa Zobrist % số worker (bảng Zobrist có seed cố định
+# nên mọi process tính cùng khóa). Mỗi worker giữ open list / closed set riêng cho
+# các trạng thái của mình; successor được tính h ngay tại worker sinh ra nó rồi gom
+# thành lô gửi cho worker sở hữu qua Queue.
+#
+# Lời giải đầu tiên chưa chắc tối ưu: chi phí của nó thành cận trên (incumbent) được
+# phát cho mọi worker, node có f >= incumbent bị bỏ. Process gọi hda_star điều phối:
+# nó phát hiện kết thúc bằng các đợt probe (phương pháp bốn bộ đếm của Mattern) –
+# mọi worker rảnh, tổng lô đã gửi bằng tổng lô đã nhận, và hai đợt liên tiếp cho
+# cùng số đếm – rồi lần ngược con trỏ cha qua các worker sở hữu để dựng đường đi.
+#
+# Không dùng được trong process daemon (worker của benchmark.py, solver_worker.py)
+# vì process daemon không được mở process con.
+
+BATCH = 64          # số successor gom lại trước khi gửi cho một worker
+POLL = 64           # số node duyệt giữa hai lần đọc hộp thư khi đang bận
+PROBE_INTERVAL = 0.01
+SCALING_LEVELS = "42,45,57,59,62"  # các level Micro Cosmos duyệt nhiều node nhất với A*-push
+
+
+def owner(key, workers):
+    return key % workers
+
+
+class HdaWorker:
+    """Một worker HDA*; run() chạy trong process con tới khi nhận 'stop'."""
+
+    def __init__(self, wid, workers, level, heuristic_mode, inboxes, outbox):
+        self.wid = wid
+        self.workers = workers
+        self.level = level
+        self.inboxes = inboxes
+        self.inbox = inboxes[wid]
+        self.outbox = outbox
+        self.deadlocks = DeadlockDetector(level)
+        self.estimator = make_estimator(level, heuristic_mode)
+        self.zobrist = ZobristTable(level.cells)
+        self.open = []       # (f, g, key, player, boxes, boxes_key, khóa cha, mã cú đẩy)
+        self.best = {}       # khóa -> g tốt nhất đã duyệt
+        self.parents = {}    # khóa -> (khóa cha, mã cú đẩy) của lần duyệt với g tốt nhất
+        self.buffers = [[] for _ in range(workers)]
+        self.incumbent = INF
+        self.sent = 0
+        self.received = 0
+        self.explored = 0
+        self.generated = 0
+        self.repeated = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            if not self.open:
+                self.flush()
+                self.handle(self.inbox.get())
+                continue
+            self.drain()
+            for _ in range(POLL):
+                if not self.open:
+                    break
+                self.expand_next()
+            self.flush()
+
+    # ---------------- Hộp thư ----------------
+    def drain(self):
+        try:
+            while self.running:
+                self.handle(self.inbox.get_nowait())
+        except queue.Empty:
+            pass
+
+    def handle(self, message):
+        kind = message[0]
+        if kind == 'states':
+            self.received += 1
+            for entry in message[1]:
+                self.push(entry)
+        elif kind == 'incumbent':
+            self.incumbent = min(self.incumbent, message[1])
+        elif kind == 'probe':
+            idle = not self.open and not any(self.buffers)
+            self.outbox.put(('probe', self.wid, message[1], idle, self.sent, self.received, self.explored,
+                             self.generated, self.repeated, len(self.open), len(self.best)))
+        elif kind == 'trace':
+            parent, code = self.parents[message[1]]
+            self.outbox.put(('parent', message[1], parent, code))
+        elif kind == 'stop':
+            self.running = False
+
+    def push(self, entry):
+        f, g, key = entry[0], entry[1], entry[2]
+        if f >= self.incumbent or self.best.get(key, INF) <= g:
+            self.repeated += 1
+            return
+        heapq.heappush(self.open, entry)
+
+    def flush(self):
+        for target, batch in enumerate(self.buffers):
+            if batch:
+                self.inboxes[target].put(('states', batch))
+                self.buffers[target] = []
+                self.sent += 1
+
+    # ---------------- Duyệt ----------------
+    def expand_next(self):
+        level = self.level
+        f, g, key, player, boxes, boxes_key, parent, code = heapq.heappop(self.open)
+        if f >= self.incumbent:
+            # Mọi node còn lại trong heap đều không tốt hơn incumbent
+            self.open.clear()
+            return
+        # Đếm cả node lặp lấy ra từ heap, giống explored của a_star_pushes
+        self.explored += 1
+        if self.best.get(key, INF) <= g:
+            self.repeated += 1
+            return
+        self.best[key] = g
+        self.parents[key] = (parent, code)
+
+        if is_solved(level, boxes):
+            self.incumbent = g
+            self.outbox.put(('solution', g, key))
+            return
+
+        estimator, zobrist = self.estimator, self.zobrist
+        estimator.expand(boxes)
+        region, _ = normalize(level, player, boxes)
+        for box_pos, d, target in push_moves(level, region, boxes):
+            if level.dead >> target & 1:
+                continue
+            new_boxes = boxes ^ (1 << box_pos) ^ (1 << target)
+            if self.deadlocks.is_deadlock(new_boxes, target):
+                continue
+            new_boxes_key = zobrist.move_box(boxes_key, box_pos, target)
+            _, new_canon = normalize(level, box_pos, new_boxes)
+            new_key = zobrist.state_key(new_boxes_key, new_canon)
+            h_val = estimator.estimate(new_canon, new_boxes, box_pos, target)
+            if h_val >= INF or g + 1 + h_val >= self.incumbent:
+                continue
+            entry = (g + 1 + h_val, g + 1, new_key, box_pos, new_boxes, new_boxes_key, key, encode_push(box_pos, d))
+            self.generated += 1
+            target_worker = owner(new_key, self.workers)
+            if target_worker == self.wid:
+                self.push(entry)
+            else:
+                batch = self.buffers[target_worker]
+                batch.append(entry)
+                if len(batch) >= BATCH:
+                    self.inboxes[target_worker].put(('states', batch))
+                    self.buffers[target_worker] = []
+                    self.sent += 1
+
+
+def _run_worker(wid, workers, level, heuristic_mode, inboxes, outbox):
+    sys.stdout = open(os.devnull, 'w', encoding='utf-8')  # make_estimator in thông tin PDB
+    try:
+        HdaWorker(wid, workers, level, heuristic_mode, inboxes, outbox).run()
+    except Exception:
+        outbox.put(('error', wid, traceback.format_exc()))
+
+
+def _receive(outbox, processes):
+    """Đọc một thông điệp từ các worker; báo lỗi nếu có worker chết mà không gửi gì."""
+    while True:
+        try:
+            return outbox.get(timeout=1.0)
+        except queue.Empty:
+            if not all(process.is_alive() for process in processes):
+                raise RuntimeError("HDA* worker exited unexpectedly")
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+
+
+def hda_star(level, workers=2, stats=None, heuristic_mode='matching', budget=None, monitor=None):
+    """
+    HDA* mức cú đẩy trên workers process; lời giải tối ưu số cú đẩy như
+    a_star_sokoban(push_level=True) và cùng kiểu trả về. Số node là tổng của mọi
+    worker; stats nhận hda_workers, hda_explored (số node duyệt của từng worker,
+    để xem cân bằng tải) và hda_batches (số lô successor đã gửi).
+    """
+    monitor = monitor or SolveMonitor(trace=False)
+    ctx = _context()
+    inboxes = [ctx.Queue() for _ in range(workers)]
+    outbox = ctx.Queue()
+    processes = [ctx.Process(target=_run_worker, args=(wid, workers, level, heuristic_mode, inboxes, outbox), daemon=True)
+                 for wid in range(workers)]
+    for process in processes:
+        process.start()
+
+    zobrist = ZobristTable(level.cells)
+    start, start_boxes = level.start, level.start_boxes
+    boxes_key = zobrist.boxes_key(bits(start_boxes))
+    _, canon = normalize(level, start, start_boxes)
+    start_key = zobrist.state_key(boxes_key, canon)
+    # h của trạng thái đầu không ảnh hưởng thứ tự (chỉ có một node), f = 0 là đủ
+    inboxes[owner(start_key, workers)].put(('states', [(0, 0, start_key, start, start_boxes, boxes_key, None, 0)]))
+    coordinator_sent = 1
+
+    incumbent, goal_key = INF, None
+    previous, seq = None, 0
+    replies = {}
+    totals = (0, 0, 0)
+    try:
+        while True:
+            seq += 1
+            for inbox in inboxes:
+                inbox.put(('probe', seq))
+            replies = {}
+            while len(replies) < workers:
+                message = _receive(outbox, processes)
+                if message[0] == 'probe':
+                    if message[2] == seq:
+                        replies[message[1]] = message[3:]
+                elif message[0] == 'solution':
+                    monitor.solution_found()
+                    if message[1] < incumbent:
+                        incumbent, goal_key = message[1], message[2]
+                        for inbox in inboxes:
+                            inbox.put(('incumbent', incumbent))
+                elif message[0] == 'error':
+                    raise RuntimeError(f"HDA* worker {message[1]} failed:\n{message[2]}")
+
+            counts = tuple(replies[wid][:3] for wid in range(workers))
+            totals = tuple(sum(reply[k] for reply in replies.values()) for k in (3, 4, 5))
+            monitor.observe(sum(reply[6] for reply in replies.values()), sum(reply[7] for reply in replies.values()))
+            idle = all(idle for idle, _, _ in counts)
+            balanced = sum(sent for _, sent, _ in counts) + coordinator_sent == sum(received for _, _, received in counts)
+            if idle and balanced and counts == previous:
+                break
+            previous = counts if idle and balanced else None
+            if budget_exhausted(budget, totals[1] + 1, stats, now=True):
+                goal_key = None
+                break
+            time.sleep(PROBE_INTERVAL)
+
+        explored, generated, repeated = totals
+        generated += 1
+        if stats is not None:
+            stats.update(hda_workers=workers, hda_explored=[replies[wid][3] for wid in range(workers)],
+                         hda_batches=coordinator_sent + sum(reply[1] for reply in replies.values()))
+        if goal_key is None:
+            print(f"❌ Không tìm được lời giải. Tổng explored: {explored}, generated: {generated}")
+            return None, 0, generated, repeated, explored
+
+        # Lần ngược con trỏ cha: mỗi khóa hỏi worker sở hữu nó
+        codes, key = [], goal_key
+        while True:
+            inboxes[owner(key, workers)].put(('trace', key))
+            message = _receive(outbox, processes)
+            while message[0] != 'parent':
+                message = _receive(outbox, processes)
+            _, _, key, code = message
+            if key is None:
+                break
+            codes.append(code)
+        path = rebuild_path(level, start, start_boxes, codes[::-1])
+        print(f"✅ Giải thành công sau {explored} trạng thái duyệt, {generated} node sinh ra ({workers} worker).")
+        return path, incumbent, generated, repeated, explored
+    finally:
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        for process in processes:
+            process.join(1.0)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+def scaling_benchmark(levels, worker_counts, heuristic_mode='matching'):
+    """
+    Giải các level bằng a_star_sokoban(push_level=True) rồi bằng HDA* với từng số
+    worker; trả về các dòng (tên, số worker, số level giải được, tổng thời gian, tổng
+    node duyệt, speedup so với 1 worker HDA*).
+    """
+    rows = []
+    runs = [("A*-push", 0)] + [("HDA*", n) for n in worker_counts]
+    for name, workers in runs:
+        solved, elapsed, explored = 0, 0.0, 0
+        for filepath in levels:
+            level = Level.from_file(filepath)
+            start = time.perf_counter()
+            with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+                if workers:
+                    path, _, _, _, nodes = hda_star(level, workers, heuristic_mode=heuristic_mode)
+                else:
+                    path, _, _, _, nodes = a_star_sokoban(level, True, heuristic_mode=heuristic_mode)
+            elapsed += time.perf_counter() - start
+            solved += path is not None
+            explored += nodes
+        rows.append([name, workers or 1, solved, elapsed, explored])
+        print(f"{name:8} workers={workers or 1:<3} solved={solved}/{len(levels)} time={elapsed:0.3f} s explored={explored}")
+    base = next((row[3] for row in rows if row[0] == "HDA*" and row[1] == 1), rows[0][3])
+    for row in rows:
+        row.append(base / row[3] if row[3] else 0.0)
+    return rows
+
+
+if __name__ == '__main__':
+    from benchmark import parse_levels
+
+    parser = argparse.ArgumentParser(description="Đo speedup của HDA* theo số worker.")
+    parser.add_argument("--workers", default="1,2,4,8", help="các số worker cần đo, ví dụ 1,2,4,8,16")
+    parser.add_argument("--levels", default=SCALING_LEVELS, help="testcase cần chạy (1..80)")
+    parser.add_argument("--heuristic", choices=("matching", "greedy", "pdb", "pdb3"), default="matching")
+    args = parser.parse_args()
+
+    selected = parse_levels(args.levels)
+    levels = [testcase_path(map_name, level_num) for j, map_name, level_num in all_testcases() if j + 1 in selected]
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    print(f"HDA* scaling on {len(levels)} levels, {os.cpu_count()} CPU core(s)")
+    rows = scaling_benchmark(levels, worker_counts, args.heuristic)
+    with open("HDA_scaling.csv", "w") as f:
+        f.write("Algorithm,Workers,Solved,Time (s),Node explored,Speedup\n")
+        for name, workers, solved, elapsed, explored, speedup in rows:
+            f.write(f"{name},{workers},{solved},{elapsed:0.6f},{explored},{speedup:0.3f}\n")
+    print("\nWrote HDA_scaling.csv")
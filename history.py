@@ -0,0 +1,165 @@
+import json
+import os
+import sys
+from datetime import datetime
+
+from instrument import metric_lines
+
+# =============================== HISTORY STORE ===============================
+# Lịch sử các lần giải, chỉ ghi nối (append-only) nên mỗi lần ghi là O(1) bất kể
+# log dài bao nhiêu:
+#   Results/history.jsonl – mỗi dòng một bản ghi JSON
+#   Results/history.idx   – mỗi dòng "offset<TAB>timestamp<TAB>problem<TAB>algorithm"
+# Đọc theo chỉ mục: lọc theo problem/algorithm/thời gian trên file idx rồi chỉ seek
+# tới các bản ghi cần, mới nhất trước. Lọc là một lượt quét tuyến tính file idx –
+# O(n) theo số lần giải đã ghi, nhưng mỗi dòng idx ngắn và chỉ các bản ghi khớp
+# mới được đọc và parse từ history.jsonl. Nếu chương trình dừng giữa hai lần ghi,
+# phần bản ghi chưa có trong idx được bổ sung ở lần mở sau.
+
+HISTORY_DIR = "Results"
+SEPARATOR = "\n\n" + "=" * 51 + "\n" + "=" * 51 + "\n\n\n"
+TIME_FORMAT = "%d/%m/%Y %H:%M:%S %p"
+
+
+class HistoryStore:
+    def __init__(self, directory=HISTORY_DIR):
+        self.directory = directory
+        self.data_path = os.path.join(directory, "history.jsonl")
+        self.index_path = os.path.join(directory, "history.idx")
+        self._synced = False
+
+    def append(self, problem, algorithm, solution, steps, generated, repeated, explored, memory, duration,
+               metrics=None, timestamp=None):
+        """Ghi thêm một bản ghi; trả về bản ghi (dict)."""
+        record = {
+            'timestamp': (timestamp or datetime.now()).isoformat(timespec='seconds'),
+            'problem': problem,
+            'algorithm': algorithm,
+            'solution': solution,
+            'steps': steps,
+            'generated': generated,
+            'repeated': repeated,
+            'explored': explored,
+            'memory': memory,
+            'duration': duration,
+            'metrics': metrics,
+        }
+        self._sync_index()
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.data_path, "ab") as data:
+            offset = data.tell()
+            data.write(line)
+        self._append_index(offset, record)
+        return record
+
+    def query(self, problem=None, algorithm=None, since=None, limit=None):
+        """
+        Bản ghi mới nhất trước, lọc theo problem / algorithm / timestamp >= since (ISO).
+        Quét toàn bộ history.idx: O(n) theo số bản ghi, chỉ đọc history.jsonl cho các bản ghi khớp.
+        """
+        self._sync_index()
+        matches = []
+        for offset, timestamp, rec_problem, rec_algorithm in self._read_index():
+            if problem is not None and rec_problem != problem:
+                continue
+            if algorithm is not None and rec_algorithm != algorithm:
+                continue
+            if since is not None and timestamp < since:
+                continue
+            matches.append((timestamp, offset))
+        matches.sort(reverse=True)
+        if limit is not None:
+            matches = matches[:limit]
+
+        records = []
+        if matches:
+            with open(self.data_path, "rb") as data:
+                for _, offset in matches:
+                    data.seek(offset)
+                    records.append(json.loads(data.readline()))
+        return records
+
+    def __len__(self):
+        self._sync_index()
+        return sum(1 for _ in self._read_index())
+
+    # ---------------- Chỉ mục ----------------
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as index:
+            for line in index:
+                offset, timestamp, problem, algorithm = line.rstrip("\n").split("\t")
+                yield int(offset), timestamp, problem, algorithm
+
+    def _append_index(self, offset, record):
+        fields = [str(offset), record['timestamp'], record['problem'], record['algorithm']]
+        with open(self.index_path, "a", encoding="utf-8") as index:
+            index.write("\t".join(f.replace("\t", " ").replace("\n", " ") for f in fields) + "\n")
+
+    def _sync_index(self):
+        """Đánh chỉ mục các bản ghi nằm sau offset cuối cùng trong idx (chỉ làm một lần mỗi phiên)."""
+        if self._synced:
+            return
+        self._synced = True
+        if not os.path.exists(self.data_path):
+            os.makedirs(self.directory, exist_ok=True)
+            return
+        start = 0
+        last = None
+        for last in self._read_index():
+            pass
+        if last is not None:
+            with open(self.data_path, "rb") as data:
+                data.seek(last[0])
+                data.readline()
+                start = data.tell()
+        with open(self.data_path, "rb") as data:
+            data.seek(start)
+            while True:
+                offset = data.tell()
+                line = data.readline()
+                if not line:
+                    break
+                try:
+                    self._append_index(offset, json.loads(line))
+                except ValueError:
+                    break  # dòng ghi dở ở cuối file
+
+
+def render(record):
+    """Một bản ghi theo định dạng văn bản cũ của history_log.txt."""
+    timestamp = datetime.fromisoformat(record['timestamp']).strftime(TIME_FORMAT)
+    lines = [
+        "Datatime (UTC+7): " + timestamp,
+        "Problem: " + record['problem'],
+        "Algorithm: " + record['algorithm'],
+        "Solution: " + record['solution'],
+        "Number of steps: " + str(record['steps']),
+        "Nodes generated: " + str(record['generated']),
+        "Nodes repeated: " + str(record['repeated']),
+        "Nodes explored: " + str(record['explored']),
+        "Memory: " + str(record['memory']) + " MB",
+        "Duration: " + str(record['duration']) + " secs",
+    ]
+    if record.get('metrics'):
+        lines += metric_lines(record['metrics'])
+    return "\n".join(lines)
+
+
+def render_all(records):
+    return "".join(render(record) + SEPARATOR for record in records)
+
+
+# =============================== MAIN ===============================
+if __name__ == '__main__':
+    # python history.py [--problem "Testcases/MICRO COSMOS/2.txt"] [--algorithm "A* Search"] [--limit N]
+    args = sys.argv[1:]
+
+    def option(flag):
+        return args[args.index(flag) + 1] if flag in args else None
+
+    limit = option("--limit")
+    records = HistoryStore().query(option("--problem"), option("--algorithm"), option("--since"),
+                                   int(limit) if limit else None)
+    sys.stdout.write(render_all(records))
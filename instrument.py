@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# =============================== INSTRUMENTATION ===============================
+# Đo cho mỗi lần giải: đỉnh bộ nhớ cấp phát (tracemalloc, chỉ tính phần cấp phát
+# trong lúc giải, không phụ thuộc RSS của cả process), kích thước lớn nhất của
+# frontier và tập visited, số byte trên mỗi trạng thái lưu, tốc độ node/s và
+# thời điểm tìm được lời giải đầu tiên.
+#
+# tracemalloc làm solver chậm đi nhiều lần (mỗi cấp phát đều bị ghi lại), nên khi
+# cần số đo thời gian sạch thì tắt trace: bộ nhớ khi đó là mức tăng của đỉnh RSS
+# (ru_maxrss) – chính xác khi mỗi lần giải chạy trong process mới như benchmark.py.
+
+METRIC_COLUMNS = ("Peak frontier", "Peak visited", "Bytes/state", "Nodes/s", "First solution (s)")
+
+
+class SolveMonitor:
+    """
+    Dùng với `with`: tracemalloc được bật (nếu chưa chạy) và đặt lại đỉnh khi vào,
+    tắt khi ra nếu chính monitor đã bật nó. Solver gọi observe() trong vòng lặp
+    chính và solution_found() khi gặp lời giải; driver gọi report() sau khi giải.
+    trace=False bỏ tracemalloc, bộ nhớ đo bằng mức tăng đỉnh RSS.
+    """
+
+    def __init__(self, trace=True):
+        self.trace = trace
+        self.peak_frontier = 0
+        self.peak_visited = 0
+        self.first_solution = None
+        self.start = None
+        self.elapsed = None
+        self.peak_bytes = 0
+        self._owns_trace = False
+        self._rss_base = 0
+
+    def __enter__(self):
+        if self.trace:
+            self._owns_trace = not tracemalloc.is_tracing()
+            if self._owns_trace:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        else:
+            self._rss_base = peak_rss()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        if self.trace:
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self._owns_trace:
+                tracemalloc.stop()
+        else:
+            self.peak_bytes = peak_rss() - self._rss_base
+        return False
+
+    def observe(self, frontier, visited):
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        if visited > self.peak_visited:
+            self.peak_visited = visited
+
+    def solution_found(self):
+        if self.first_solution is None and self.start is not None:
+            self.first_solution = time.perf_counter() - self.start
+
+    @property
+    def peak_memory_mb(self):
+        """Đỉnh bộ nhớ cấp phát (MB); đọc được cả khi đang giải."""
+        if self.elapsed is None and self.start is not None:
+            if self.trace and tracemalloc.is_tracing():
+                return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            if not self.trace:
+                return (peak_rss() - self._rss_base) / (1024 * 1024)
+        return self.peak_bytes / (1024 * 1024)
+
+    def report(self, nodes_generated):
+        """Số liệu của lần giải; gọi được cả trong khối with (lấy giá trị tới thời điểm đó)."""
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.start
+        peak_mb = self.peak_memory_mb
+        return {
+            'time': elapsed,
+            'peak_memory_mb': peak_mb,
+            'peak_frontier': self.peak_frontier,
+            'peak_visited': self.peak_visited,
+            'bytes_per_state': peak_mb * 1024 * 1024 / self.peak_visited if self.peak_visited else 0.0,
+            'nodes_per_sec': nodes_generated / elapsed if elapsed > 0 else 0.0,
+            'first_solution': self.first_solution,
+        }
+
+
+def peak_rss():
+    """Đỉnh RSS của process (byte); 0 nếu nền tảng không hỗ trợ."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux trả về KB
+
+
+def current_rss():
+    """RSS hiện tại của process (byte); không đọc được /proc thì dùng đỉnh RSS."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return peak_rss()
+
+
+def metric_columns(metrics):
+    """Các cột METRIC_COLUMNS cho một dòng CSV (rỗng nếu chưa có lời giải)."""
+    first = "" if metrics['first_solution'] is None else f"{metrics['first_solution']:0.6f}"
+    return (f"{metrics['peak_frontier']},{metrics['peak_visited']},{metrics['bytes_per_state']:0.1f},"
+            f"{metrics['nodes_per_sec']:0.1f},{first}")
+
+
+def metric_lines(metrics):
+    """Các dòng mô tả cho file kết quả / history log."""
+    first = "-" if metrics['first_solution'] is None else f"{metrics['first_solution']:0.6f} secs"
+    return [
+        f"Peak memory: {metrics['peak_memory_mb']:0.6f} MB",
+        f"Peak frontier: {metrics['peak_frontier']}",
+        f"Peak visited: {metrics['peak_visited']}",
+        f"Bytes per state: {metrics['bytes_per_state']:0.1f}",
+        f"Nodes per second: {metrics['nodes_per_sec']:0.1f}",
+        f"Time to first solution: {first}",
+    ]
@@ -0,0 +1,161 @@
+import hashlib
+from collections import deque
+
+INF = 10 ** 9
+
+
+class Level:
+    """
+    Bản đồ đã "biên dịch": mỗi ô là một chỉ số nguyên, tường, sàn, goal và dead
+    square là bitmask số nguyên (bit i bật <=> ô i thuộc tập). Bản đồ được bọc một
+    vòng ô không đi được, nên láng giềng (kể cả cách 2 ô) của một ô sàn luôn có
+    chỉ số hợp lệ và phép dịch bit trái/phải không tràn sang hàng kế bên.
+
+    floor, goals: tập ô dạng tuple, theo (hàng, cột) hoặc (x, y) nếu xy=True.
+    Dựng từ file testcase bằng Level.from_file, khi đó có thêm grid (các dòng của
+    file), start (ô người chơi) và start_boxes (mask thùng) của trạng thái đầu.
+    Mọi bảng tính trước là tuple/int và không đổi sau khi dựng, nên một Level được
+    dùng chung cho mọi solver và pickle gọn sang process worker.
+    """
+
+    def __init__(self, floor, goals, xy=False):
+        self.xy = xy
+        self.grid = None
+        self.start = None
+        self.start_boxes = 0
+        rc_floor = [self._rc(cell) for cell in floor]
+        self.rows = max(r for r, _ in rc_floor) + 3  # +2 hàng đệm
+        self.width = max(c for _, c in rc_floor) + 3  # +2 cột đệm
+        self.size = self.rows * self.width
+
+        self.cells = tuple(sorted(self.index(cell) for cell in floor))
+        self.floor = self.mask_of_indices(self.cells)
+        self.walls = ((1 << self.size) - 1) & ~self.floor
+        self.goal_list = tuple(sorted(self.index(g) for g in goals))
+        self.goals = self.mask_of_indices(self.goal_list)
+
+        # Bảng offset: (độ dời chỉ số, ký tự hướng)
+        w = self.width
+        self.dirs = ((-w, 'U'), (w, 'D'), (-1, 'L'), (1, 'R'))
+        # Bảng láng giềng tính sẵn: neighbors[i] = ((j, hướng), ...) với j là sàn
+        neighbors = [()] * self.size
+        for i in self.cells:
+            neighbors[i] = tuple((i + o, ch) for o, ch in self.dirs if self.floor >> (i + o) & 1)
+        self.neighbors = tuple(neighbors)
+
+        # Tính trước một lần cho mỗi bản đồ, dùng chung cho mọi solver
+        self.distance = tuple(tuple(self._pull_distance(g)) for g in self.goal_list)
+        self.min_distance = tuple(min(col) for col in zip(*self.distance))
+        self.dead = self.floor & ~self.mask_of_indices(i for i in self.cells if self.min_distance[i] < INF)
+
+    # ---------------- Đọc bản đồ ----------------
+    @classmethod
+    def from_text(cls, text, xy=False):
+        """
+        Ký hiệu: # = tường, . hoặc khoảng trắng = sàn, x = thùng, ? = goal,
+        @ = người chơi, - = người chơi trên goal, + = thùng trên goal.
+        Sàn là các ô không phải tường đi tới được từ người chơi, nên khoảng trắng
+        bên ngoài tường bao không thuộc bản đồ.
+        """
+        grid = tuple(line.rstrip("\r") for line in text.split("\n"))
+        start, boxes, goals, open_cells = None, [], [], set()
+        for r, line in enumerate(grid):
+            for c, ch in enumerate(line):
+                if ch == '#':
+                    continue
+                open_cells.add((r, c))
+                if ch in "@-":
+                    start = (r, c)
+                if ch in "x+":
+                    boxes.append((r, c))
+                if ch in "?-+":
+                    goals.append((r, c))
+        if start is None:
+            raise ValueError("map has no player (@ or -)")
+
+        floor = {start}
+        queue = deque([start])
+        while queue:
+            r, c = queue.popleft()
+            for cell in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if cell in open_cells and cell not in floor:
+                    floor.add(cell)
+                    queue.append(cell)
+
+        def coords(cell):
+            return (cell[1], cell[0]) if xy else cell
+
+        level = cls([coords(cell) for cell in floor], [coords(g) for g in goals], xy)
+        level.grid = grid
+        level.start = level.index(coords(start))
+        level.start_boxes = level.mask(coords(b) for b in boxes)
+        return level
+
+    @classmethod
+    def from_file(cls, filename, xy=False):
+        with open(filename, "r", encoding="utf-8") as f:
+            return cls.from_text(f.read(), xy)
+
+    def digest(self):
+        """
+        Hash nội dung bản đồ (bỏ khoảng trắng cuối dòng, kể cả \\r của file CRLF),
+        dùng làm khóa cache PDB / lời giải. Level dựng trực tiếp (không có grid) thì
+        hash theo sàn và goal.
+        """
+        if self.grid is not None:
+            text = "\n".join(line.rstrip() for line in self.grid)
+        else:
+            text = f"{self.width}:{self.floor}:{self.goals}"
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    # ---------------- Chuyển đổi tọa độ ----------------
+    def _rc(self, cell):
+        return (cell[1], cell[0]) if self.xy else cell
+
+    def index(self, cell):
+        r, c = self._rc(cell)
+        return (r + 1) * self.width + c + 1
+
+    def cell(self, i):
+        r, c = divmod(i, self.width)
+        return (c - 1, r - 1) if self.xy else (r - 1, c - 1)
+
+    def mask_of_indices(self, indices):
+        mask = 0
+        for i in indices:
+            mask |= 1 << i
+        return mask
+
+    def mask(self, cells):
+        return self.mask_of_indices(self.index(c) for c in cells)
+
+    def cells_of(self, mask):
+        return [self.cell(i) for i in bits(mask)]
+
+    # ---------------- Tính trước ----------------
+    def _pull_distance(self, goal):
+        """
+        distance[i] = số cú đẩy tối thiểu đưa một thùng từ ô i tới goal (bỏ qua các
+        thùng khác), tính bằng BFS kéo ngược từ goal. INF nếu không thể.
+        """
+        dist = [INF] * self.size
+        dist[goal] = 0
+        queue = deque([goal])
+        while queue:
+            pos = queue.popleft()
+            for o, _ in self.dirs:
+                box, player = pos + o, pos + 2 * o
+                # Kéo thùng từ pos về box: người chơi đứng ở box rồi lùi sang player
+                if dist[box] < INF or not self.floor >> box & 1 or not self.floor >> player & 1:
+                    continue
+                dist[box] = dist[pos] + 1
+                queue.append(box)
+        return dist
+
+
+def bits(mask):
+    """Duyệt chỉ số các bit đang bật của mask (từ thấp đến cao)."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
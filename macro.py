@@ -0,0 +1,149 @@
+from collections import deque
+
+from movegen import encode_push, normalize, reachable
+
+# =============================== MACRO MOVES ===============================
+# Gộp các chuỗi cú đẩy "chỉ có một cách đi tiếp hợp lý" thành một cạnh tìm kiếm:
+#   - tunnel: thùng bị đẩy vào hành lang rộng một ô (cả ô thùng lẫn ô người chơi
+#     đứng đều bị tường chặn hai bên) thì đẩy tiếp thẳng tới cuối hành lang.
+#   - goal room: thùng bị đẩy qua lối vào duy nhất (ô hành lang) của một phòng
+#     chứa goal thì đẩy luôn tới goal còn trống sâu nhất theo thứ tự lấp phòng.
+# Các cú đẩy trung gian vẫn được ghi vào NodeStore (để dựng lại đường đi), nhưng
+# chỉ trạng thái cuối được đưa vào frontier / visited.
+# Tunnel macro giữ nguyên số cú đẩy tối ưu; goal-room macro cố định thứ tự lấp
+# phòng nên có thể bỏ lỡ lời giải ngắn hơn (hiếm) – vì vậy macro là tùy chọn.
+
+
+class MacroMoves:
+    """
+    Tính trước một lần cho mỗi Level:
+      tunnels[d]: mask các ô c mà c và c - offset(d) đều có tường ở hai bên vuông
+                  góc với hướng d.
+      rooms:      ô lối vào -> (hướng vào phòng, mask phòng, goal theo thứ tự lấp).
+    used đếm số cạnh macro đã sinh theo từng loại.
+    """
+
+    def __init__(self, level):
+        self.level = level
+        self.used = {'tunnel': 0, 'room': 0}
+        self.tunnels = [self._tunnel_mask(d) for d in range(len(level.dirs))]
+        self.rooms = dict(self._goal_rooms())
+
+    def _walled(self, cell, offset):
+        """Ô cell có tường ở cả hai bên vuông góc với độ dời offset."""
+        level = self.level
+        side = 1 if abs(offset) == level.width else level.width
+        return level.walls >> (cell - side) & 1 and level.walls >> (cell + side) & 1
+
+    def _tunnel_mask(self, d):
+        offset = self.level.dirs[d][0]
+        return self.level.mask_of_indices(
+            c for c in self.level.cells
+            if self.level.floor >> (c - offset) & 1 and self._walled(c, offset) and self._walled(c - offset, offset)
+        )
+
+    def _goal_rooms(self):
+        """
+        Lối vào là ô sàn không phải goal có đúng hai láng giềng đối diện nhau; bỏ ô
+        đó đi, phía bên kia là phòng nếu chỉ nối với phần còn lại qua lối vào và chủ
+        yếu là goal (số ô sàn thường không quá số goal, để không coi cả nửa bản đồ
+        là phòng). Goal được lấp từ xa lối vào nhất tới gần nhất.
+        """
+        level = self.level
+        for e in level.cells:
+            if level.goals >> e & 1 or len(level.neighbors[e]) != 2:
+                continue
+            for d, (offset, _) in enumerate(level.dirs):
+                if not level.floor >> (e + offset) & 1 or not level.floor >> (e - offset) & 1:
+                    continue
+                room = reachable(level, e + offset, 1 << e)
+                goal_count = (room & level.goals).bit_count()
+                if room >> (e - offset) & 1 or not goal_count or (room & ~level.goals).bit_count() > goal_count:
+                    continue
+                room_goals = [k for k, g in enumerate(level.goal_list) if room >> g & 1]
+                order = sorted(room_goals, key=lambda k: -level.distance[k][e])
+                yield e, (d, room, [level.goal_list[k] for k in order])
+
+    def extend(self, boxes, box, d, target):
+        """
+        Nối dài cú đẩy box -> target (hướng d; boxes là mask sau cú đẩy) thành macro
+        nếu có. Trả về (danh sách mã cú đẩy, ô người chơi, ô thùng cuối, boxes mới);
+        ô người chơi là ô thùng trước cú đẩy cuối (xem normalize).
+        """
+        level = self.level
+        offset = level.dirs[d][0]
+        codes = [encode_push(box, d)]
+        player = box
+        while self.tunnels[d] >> target & 1 and not level.goals >> target & 1:
+            nxt = target + offset
+            if (level.walls | boxes | level.dead) >> nxt & 1:
+                break
+            boxes ^= (1 << target) | (1 << nxt)
+            codes.append(encode_push(target, d))
+            player, target = target, nxt
+        if len(codes) > 1:
+            self.used['tunnel'] += 1
+
+        room = self.rooms.get(target)
+        if room is not None and room[0] == d:
+            route = self._fill_route(boxes, player, target, room)
+            if route:
+                self.used['room'] += 1
+                codes += route
+                player = route[-1] >> 2
+                final = player + level.dirs[route[-1] & 3][0]
+                boxes ^= (1 << target) | (1 << final)
+                target = final
+        return codes, player, target, boxes
+
+    def _fill_route(self, boxes, player, box, room):
+        """
+        Đường đẩy (mã cú đẩy) đưa thùng ở lối vào tới goal trống đầu tiên theo thứ
+        tự lấp; None nếu trong phòng có thùng chưa ở goal hoặc không đẩy tới được.
+        """
+        level = self.level
+        _, mask, order = room
+        if boxes & mask & ~level.goals:
+            return None
+        goal = next((g for g in order if not boxes >> g & 1), None)
+        if goal is None:
+            return None
+
+        others = boxes & ~(1 << box)
+        start = (box, normalize(level, player, boxes)[1])
+        parent = {start: None}
+        queue = deque([start])
+        while queue:
+            state = queue.popleft()
+            box, canon = state
+            if box == goal:
+                route = []
+                while parent[state] is not None:
+                    state, code = parent[state]
+                    route.append(code)
+                route.reverse()
+                return route
+            reach = reachable(level, canon, others | (1 << box))
+            for d, (offset, _) in enumerate(level.dirs):
+                nxt = box + offset
+                if not reach >> (box - offset) & 1 or not mask >> nxt & 1 or (others | level.dead) >> nxt & 1:
+                    continue
+                child = (nxt, normalize(level, box, others | (1 << nxt))[1])
+                if child not in parent:
+                    parent[child] = (state, encode_push(box, d))
+                    queue.append(child)
+        return None
+
+    def report(self, stats):
+        if stats is not None:
+            stats.update(tunnel_macros=self.used['tunnel'], room_macros=self.used['room'])
+
+    def summary(self):
+        return f"tunnel={self.used['tunnel']}, room={self.used['room']}, {len(self.rooms)} goal room entrance(s)"
+
+
+def add_pushes(store, node, codes):
+    """Ghi chuỗi cú đẩy của một macro vào NodeStore, trả về node cuối."""
+    for code in codes:
+        node = store.add(node, code)
+    return node
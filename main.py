@@ -2,15 +2,17 @@ import pygame
 import time
 from pygame.locals import *
 import os
-import psutil
 from queue import Queue
 from copy import copy, deepcopy
 from datetime import datetime
 import math
 from sortedcontainers import SortedList
 import numpy as np
-from scipy.optimize import linear_sum_assignment
-from Heuristic import read_sokoban_map,a_star_sokoban
+from history import HistoryStore
+from level import Level
+from solution_cache import SolutionCache
+from solver_worker import start_job
+from testcases import testcase_path
 
 #General setup
 pygame.init()
@@ -20,7 +22,6 @@ pygame.display.set_caption("Sokoban Solver")
 running = True
 clock = pygame.time.Clock()
 FPS = 60
-itemMemory = psutil.Process(os.getpid()).memory_info().rss/(1024*1024)
 
 #---------------------
 # Setup Colors 
@@ -75,8 +76,12 @@ pushed = 0
 startTime = 0
 stepNode = 0
 visualized = 0
-moves = []
 history = 0
+job = None
+# Solutions shared with the batch drivers (Cache/solutions): a level solved before is answered instantly
+solution_cache = SolutionCache()
+# Solve records in Results/history.jsonl, indexed by problem, algorithm and time
+history_store = HistoryStore()
 name = ''
 actions = []
 ptr = -1
@@ -123,13 +128,18 @@ micro_rect = Rect(810 + 70, 145 + 45, 185, 35)
 up_arrow_rect = Rect(810 + 120, 235, 20, 20)
 down_arrow_rect = Rect(810 + 120, 255, 20, 20)
 
-manual_rect = Rect(830, 330, 100, 48)
-dfs_rect = Rect(830 + 120, 330, 100, 48)
-A_rect = Rect(830 + 240, 330, 100, 48)
-start_rect = Rect(820 + 86, 400, 185, 40)
+# Gameplay modes: (mode id, label), laid out 4 per row
+mode_buttons = [(1, "Manually"), (2, "DFS"), (3, "A*"), (4, "IDA*"), (5, "WA*"), (6, "Greedy"), (7, "Beam"), (8, "Portfolio")]
+mode_rects = {m: Rect(815 + 96 * (k % 4), 322 + 40 * (k // 4), 88, 34) for k, (m, _) in enumerate(mode_buttons)}
+# Search modes solved on a worker process: mode id -> (engine in solver_worker, name in history)
+search_modes = {2: ('dfs', "Depth First Search"), 3: ('astar', "A* Search"), 4: ('ida', "IDA* Search"),
+	5: ('wastar', "Weighted A* Search"), 6: ('gbfs', "Greedy Best-First Search"), 7: ('beam', "Beam Search"), 8: ('portfolio', "Portfolio")}
+engine_names = {engine: name for engine, name in search_modes.values()}
+start_rect = Rect(820 + 86, 406, 185, 38)
 
 restart_rect = Rect(820 + 130, 650, 100, 40)
 visualize_rect = Rect(820 + 100, 700 + 20, 161, 34)
+cancel_rect = Rect(820 + 100, 700 + 20, 161, 34)
 undo_rect = Rect(820 + 80, 650, 40, 40)
 redo_rect = Rect(820 + 240, 650, 40, 40)
 
@@ -204,36 +214,22 @@ def display_title_gameplay_selection(color = YELLOW):
 	title_gameplay_selection = helpFont.render("Gameplay Selection:", True, color)
 	surface.blit(title_gameplay_selection, [810, 290])
 
-def display_manual_button(mode_selected):
-	if mode_selected == 1:
-		pygame.draw.rect(surface, YELLOW, pygame.Rect(830 - 1, 330 - 1, 100 + 2, 48 + 2),  0, 6)
-	pygame.draw.rect(surface, BLACK, pygame.Rect(830, 330, 100, 48),  0, 6)
-	text_manual = buttonFont.render("Manually", True, YELLOW)
-	surface.blit(text_manual, [834, 342])
-
-def display_dfs_button(mode_selected):
-	if mode_selected == 2:
-		pygame.draw.rect(surface, YELLOW, pygame.Rect(830 + 120 - 1, 330 - 1, 100 + 2, 48 + 2),  0, 6)
-	pygame.draw.rect(surface, BLACK, pygame.Rect(830 + 120, 330, 100, 48),  0, 6)
-	text_dfs = buttonFont.render("DFS", True, YELLOW)
-	surface.blit(text_dfs, [834 + 120 + 25, 342])
-
-def display_A_button(mode_selected):
-	if mode_selected == 3:
-		pygame.draw.rect(surface, YELLOW, pygame.Rect(830 + 240 - 1, 330 - 1, 100 + 2, 48 + 2),  0, 6)
-	pygame.draw.rect(surface, BLACK, pygame.Rect(830 + 240, 330, 100, 48),  0, 6)
-	text_A = buttonFont.render("A*", True, YELLOW)
-	surface.blit(text_A, [834 + 240 + 35, 342])
+def display_mode_button(mode_selected, button_mode, label):
+	rect = mode_rects[button_mode]
+	if mode_selected == button_mode:
+		pygame.draw.rect(surface, YELLOW, rect.inflate(2, 2),  0, 6)
+	pygame.draw.rect(surface, BLACK, rect,  0, 6)
+	text_mode = buttonFont.render(label, True, YELLOW)
+	surface.blit(text_mode, text_mode.get_rect(center = rect.center))
 
 def display_start_button(step):
 	if step == 1:
-		pygame.draw.rect(surface, RED, pygame.Rect(820 + 86, 400, 185, 40),  0, 6)
+		pygame.draw.rect(surface, RED, start_rect,  0, 6)
 		start_button = buttonFont.render("START", True, YELLOW)
-		surface.blit(start_button, [820 + 85 + 60, 410])
 	else:
-		pygame.draw.rect(surface, GRAY_LIGHT, pygame.Rect(820 + 86, 400, 185, 40),  0, 6)
+		pygame.draw.rect(surface, GRAY_LIGHT, start_rect,  0, 6)
 		start_button = buttonFont.render("START", True, BLACK)
-		surface.blit(start_button, [820 + 85 + 60, 410])
+	surface.blit(start_button, start_button.get_rect(center = start_rect.center))
 
 def display_step_1():
 	display_title_map_selection(RED if step == 2 else GREEN_DARK)
@@ -246,9 +242,8 @@ def display_step_1():
 	display_down_arrow()
 	display_text_1_40()
 	display_title_gameplay_selection(RED if step == 2 else GREEN_DARK)
-	display_manual_button(mode)
-	display_dfs_button(mode)
-	display_A_button(mode)
+	for button_mode, label in mode_buttons:
+		display_mode_button(mode, button_mode, label)
 	display_start_button(step)
 
 def display_title_records(color = YELLOW):
@@ -287,6 +282,11 @@ def display_button_redo():
 def display_visualize():
 	surface.blit(visualize_button, [820 + 100, 700 + 20])
 
+def display_button_cancel():
+	pygame.draw.rect(surface, RED, cancel_rect,  0, 6)
+	button_cancel = buttonFont.render("CANCEL", True, BLACK)
+	surface.blit(button_cancel, button_cancel.get_rect(center = cancel_rect.center))
+
 def display_content_step_2():
 	status_str = ""
 	if win == -1:
@@ -301,11 +301,20 @@ def display_content_step_2():
 	elif win == 1:
 		status_str = "Win !!@@!!"
 		status_col = GREEN_DARK
+	elif win == 3:
+		status_str = "Cancelled"
+		status_col = ORANGE
 
 	statusText = wordFont.render(f"{status_str}", True, status_col)
 	surface.blit(statusText, [800 + 127, 495])
 
-	if not (mode >= 2 and win == 0):
+	if job is not None and job.running:
+		# Live progress reported by the solver worker
+		timeText = helpFont.render("{:0.1f} s".format(job.elapsed), True, GREEN_LIGHT)
+		nodesText = recordFont.render("{} nodes explored".format(job.progress['explored']), True, GREEN_LIGHT)
+		surface.blit(timeText, [800 + 110, 530])
+		surface.blit(nodesText, [800 + 135, 577])
+	elif not (mode >= 2 and win == 0):
 		timeText = helpFont.render("{:0.6f} s".format(timeTook), True, GREEN_LIGHT)
 		stepText = helpFont.render(f"{stepNode}", True, GREEN_LIGHT)
 		pushedText = helpFont.render(f"{pushed}", True, GREEN_LIGHT)
@@ -326,6 +335,8 @@ def display_step_2():
 	display_content_step_2()
 	if mode > 1 and win == 1:
 			display_visualize()
+	if job is not None and job.running:
+		display_button_cancel()
 
 
 def draw_menu():
@@ -363,15 +374,15 @@ def draw_board():
 # Refresh Data
 #-----------------
 def reset_data():
-	global numsCol, numsRow, numsUnit, lengthSquare, offsetX, offsetY, wall, box, goal, player_, walls, goals, boxes, paths, player, name, distanceToGoal, dead_squares, actions, ptr
+	global numsCol, numsRow, numsUnit, lengthSquare, offsetX, offsetY, wall, box, goal, player_, walls, goals, boxes, paths, player, name, current_level, actions, ptr
 	
 	wall = pygame.image.load('Items/wall.jpg')
 	box = pygame.image.load('Items/box.png')
 	goal = pygame.image.load('Items/goals.png')
 	player_ = pygame.image.load('Items/player.png')
-	name = "./Testcases/{}/{}.txt".format(map_list[map_index], level+1)
-	walls, goals, boxes, paths, player, numsRow, numsCol = set_value(name)
-	# distanceToGoal, dead_squares = set_distance()
+	name = testcase_path(map_list[map_index], level+1)
+	current_level = Level.from_file(name, xy=True)
+	walls, goals, boxes, paths, player, numsRow, numsCol = board_from_level(current_level)
 	actions = []
 	ptr = -1
 
@@ -417,6 +428,7 @@ R = Direction((1, 0), 'R')
 U = Direction((0, -1), 'U')
 D = Direction((0, 1), 'D')
 directions = [U, L, D, R] # clock-wise
+char_to_direction = {d.char: d for d in directions}
 
 #$$ Rule for moving in SOKOBAN map, the rules below will apply for 4 directions: UP, DOWN, LEFT, RIGHT
 # Rule 1: If the forward cell is empty, we literally can move
@@ -459,76 +471,16 @@ def move(player, boxes, direction):
 def is_win(goals, boxes):
 	return goals.issubset(boxes)
 
-def set_value(filename):
-	walls = set() # set of Point()
-	goals = set()
-	boxes = []
-	paths = set()
-	player = None
-	x = 0
-	y = 0
-	with open(filename, 'r') as f:
-		read_data = f.read()
-		lines = read_data.split('\n')	
-		for line in lines:
-			x = 0
-			for char in line:
-				if char == '#': # Wall
-					walls.add((x,y))
-				elif char == 'x': # Box
-					boxes.append((x,y))
-					paths.add((x,y))
-				elif char == '?': # Goal
-					goals.add((x,y))
-					paths.add((x,y))
-				elif char == '@': # Player
-					player = (x,y)
-					paths.add((x,y))
-				elif char == '-': # Player and Goal
-					goals.add((x,y))
-					player = (x,y)
-					paths.add((x,y))
-				elif char == '+': # Box and Goal
-					goals.add((x,y))
-					boxes.append((x,y))
-					paths.add((x,y))
-				elif char == '.': # Path - avaiable move
-					paths.add((x,y))
-				x += 1
-			y += 1
-	return walls, goals, tuple(boxes), paths, player, x, y
-
-def set_distance():
-	distanceToGoal = dict()
-	dead_squares = set()
-	for goal in goals:
-		distanceToGoal[goal] = dict()
-		for path in paths:
-			distanceToGoal[goal][path] = 1e9
-	queue = Queue()
-	for goal in goals:
-		distanceToGoal[goal][goal] = 0
-		queue.put(goal)
-		while not queue.empty():
-			position = queue.get()
-			for direction in directions:
-				boxPosition = (position[0] + direction.vector[0], position[1] + direction.vector[1])
-				playerPosition = (position[0] + 2*direction.vector[0], position[1] + 2*direction.vector[1])
-				if boxPosition in paths:
-					if distanceToGoal[goal][boxPosition] == 1e9:
-						if (boxPosition not in walls) and (playerPosition not in walls):
-							distanceToGoal[goal][boxPosition] = distanceToGoal[goal][position] + 1
-							queue.put(boxPosition)
-	# Add dead squares
-	for path in paths:
-		ok = 1
-		for goal in goals:	
-			if distanceToGoal[goal][path] != 1e9:
-				ok = 0
-				break
-		if ok == 1:
-			dead_squares.add(path)
-	return distanceToGoal, dead_squares
+def board_from_level(current_level):
+	# Drawing sets in (x, y) from a Level built with Level.from_file(name, xy=True)
+	grid = current_level.grid
+	walls = {(x, y) for y, line in enumerate(grid) for x, char in enumerate(line) if char == '#'}
+	paths = {(x, y) for y, line in enumerate(grid) for x, char in enumerate(line) if char in '.x?@-+'}
+	goals = set(current_level.cells_of(current_level.goals))
+	boxes = tuple(current_level.cells_of(current_level.start_boxes))
+	player = current_level.cell(current_level.start)
+	return walls, goals, boxes, paths, player, max(len(line) for line in grid), len(grid)
+
 #----------------------
 # Exporting The Results
 #----------------------
@@ -537,6 +489,8 @@ def print_results(board, gen, rep, expl, memo, dur):
 		print("\n-- Algorithm: Depth first search --")
 	elif mode == 3:
 		print("\n-- Algorithm: A star --")
+	elif mode == 4:
+		print("\n-- Algorithm: IDA star --")
 	print("Sequence: ", end="")
 	for ch in board.history_moves:
 		print(ch.direction.char, end=" ")
@@ -547,89 +501,85 @@ def print_results(board, gen, rep, expl, memo, dur):
 	print("Memory: ", str(memo), " MB")  # in megabytes
 	print('Duration: ' + str(dur) + ' secs')
 
-def line_prepender(filename, algo, sol, ste, gen, rep, expl, memo, dur):
-	if not os.path.exists('Results'):
-		os.mkdir('Results')
-	if not os.path.exists(filename):
-		open(filename, 'w+')
-	with open(filename, 'r+') as f:
-		content = f.read()
-		f.seek(0, 0)
-		dt_string = datetime.now().strftime("%d/%m/%Y %H:%M:%S %p")
-		f.write("Datatime (UTC+7): " + dt_string + '\n')
-		f.write("Problem: " + name.split('./')[-1] + '\n')
-		f.write("Algorithm: " + algo + '\n')
-		f.write("Solution: " + sol + '\n')
-		f.write("Number of steps: " + str(ste) + '\n')
-		f.write("Nodes generated: " + str(gen) + '\n')
-		f.write("Nodes repeated: " + str(rep) + '\n')
-		f.write("Nodes explored: " + str(expl) + '\n')
-		f.write("Memory: " + str(memo) + ' MB' + '\n')
-		f.write("Duration: " + str(dur) + " secs" + '\n')
-		f.write("\n\n")
-		f.write("===================================================" + '\n')
-		f.write("===================================================" + '\n')
-		f.write("\n\n")
-		f.write(content)
-
-def add_history(algo, sol, ste, gen, rep, expl, memo, dur):
-	line_prepender('Results/history_log.txt', algo, sol, ste, gen, rep, expl, memo, dur)
-	line_prepender('Results/Solution_{}_test {}'.format(name.split('/')[2], name.split('/')[3]), algo, sol, ste, gen, rep, expl, memo, dur)
+def add_history(algo, sol, ste, gen, rep, expl, memo, dur, metrics=None):
+	# Append-only: newest-first views come from history_store.query() / `python history.py`
+	problem = "Testcases/{}/{}.txt".format(map_list[map_index], level + 1)
+	history_store.append(problem, algo, sol, ste, gen, rep, expl, memo, dur, metrics)
 
 def get_history_moves(actions):
 	return ", ".join(list(map(lambda move: move[0].char, actions)))
 
 #-----------------
-# Setting Alogorithms
+# Background Solving
 #-----------------
-def dfs(curr_player, curr_boxes):
-	global win, timeTook, startTime
-	node_repeated = 0
-	node_generated = 0
-	frontier = [(curr_player, curr_boxes, 0, 0, [])]  
-	explored = set([(curr_player, curr_boxes)])
+def cancel_job():
+	global job
+	if job is not None:
+		job.cancel()
+		job = None
+
+def begin_solve():
+	# Reset the records of the current run; search modes start their worker on the next frame
+	global a_star_path, visualized, win, actions, ptr, step, startTime, stepNode, pushed, history
+	cancel_job()
+	a_star_path = []
+	visualized = 0
+	win = 0
+	actions = []
+	ptr = -1
+	stepNode = 0
+	pushed = 0
+	history = 0
+	step = 2
 	startTime = time.time()
 
-	while frontier:
-		now_player, now_boxes, steps, push, actions = frontier.pop()  
-
-		moves = set_available_moves(now_player, now_boxes)
-		for m in moves:
-			res, is_pushed, new_player, new_boxes = move(now_player, now_boxes, m)
-			node_generated += 1
-
-			if res and (new_player, new_boxes) not in explored:
-				explored.add((new_player, new_boxes))
-
-				if is_win(goals, new_boxes):
-					timeTook = time.time() - startTime
-					win = 1
-					memo_info = psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024) - itemMemory
-					add_history(
-						"Depth First Search",
-						get_history_moves(actions + [(m, is_pushed)]),
-						steps + 1,
-						node_generated,
-						node_repeated,
-						len(explored),
-						memo_info,
-						timeTook
-					)
-					return (node_generated, steps + 1, push + is_pushed, timeTook, memo_info, actions + [(m, is_pushed)])
-
-				frontier.append((new_player, new_boxes, steps + 1, push + is_pushed, actions + [(m, is_pushed)]))
-			else:
-				node_repeated += 1
-
-	return (node_generated, 0, timeTook, memo_info, [])
+def finish_job():
+	# Collect the worker result once it is no longer running
+	global job, a_star_path, win, stepNode, timeTook
+	algo_name = search_modes[mode][1]
+	winner = job.result.get('winner') if job.status == 'done' else None
+	if winner:
+		# Portfolio: record which engine found the solution first
+		algo_name += f" ({engine_names[winner]})"
+	if job.cached:
+		algo_name += " (cached)"
+	if job.status == 'done' and job.result['path']:
+		result = job.result
+		metrics = result['metrics']
+		path = result['path']
+		a_star_path = path
+		win = 1
+		stepNode = len(path)
+		# Portfolio time is wall time until the first engine answered
+		timeTook = result['winner_time'] if winner and not job.cached else metrics['time']
+		memo_info = metrics['peak_memory_mb']
+		add_history(
+			algo_name,
+			", ".join(path),
+			len(path),
+			result['generated'],
+			result['repeated'],
+			result['explored'],
+			memo_info,
+			timeTook,
+			metrics
+		)
+		print(f"✅ {algo_name} solved in {len(path)} steps, {timeTook:.3f}s, memory: {memo_info:.3f} MB")
+	else:
+		win = 2
+		timeTook = job.elapsed
+		if job.status == 'error':
+			print(job.error)
+		print(f"❌ No solution found by {algo_name}.")
+	job = None
 
 #-----------------
 # Run Program
 #-----------------
 if __name__ == '__main__':
-	name = "./Testcases/{}/{}.txt".format(map_list[0],1)
-	walls, goals, boxes, paths, player, _, _ = set_value(name)
-	distanceToGoal, dead_squares = set_distance()
+	name = testcase_path(map_list[0], 1)
+	current_level = Level.from_file(name, xy=True)
+	walls, goals, boxes, paths, player, _, _ = board_from_level(current_level)
 	while running:
 		clock.tick(FPS)
 
@@ -641,35 +591,12 @@ if __name__ == '__main__':
 
 		if step == 2 and win == 0 and mode == 1:
 			timeTook = time.time() - startTime
-		if step == 2 and mode == 3 and win == 0 and visualized == 0 and not a_star_path:
-			# 1️⃣ Giai đoạn tìm đường (chưa visualize)
-			grid, player1, boxes1, goals1 = read_sokoban_map(name)
-			start_time = time.time()
-			path, pushed, node_generated, node_repeated, node_explored = a_star_sokoban(grid, player1, boxes1, goals1)
-			stepNode = len(path)
-			timeTook = time.time() - start_time
-
-			if path:
-				a_star_path = path
-				win = 1
-
-				# 🧮 Thống kê & lưu lại
-				memo_info = psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024) - itemMemory
-				add_history(
-					"A* Search",
-					", ".join(path),                # chuỗi hướng đi
-					len(path),                      # số bước
-					node_generated,                              # node generated (không có, đặt 0)
-					node_repeated,                              # node repeated (không có, đặt 0)
-					node_explored,                              # node explored (không có, đặt 0)
-					memo_info,
-					timeTook
-				)
-				print(f"✅ A* solved in {len(path)} steps, {timeTook:.3f}s, memory: {memo_info:.3f} MB")
-
-			else:
-				win = 2
-				print("❌ No solution found by A*.")
+		if step == 2 and mode in search_modes and win == 0 and visualized == 0 and not a_star_path:
+			# 1️⃣ Giai đoạn tìm đường (chưa visualize): solver chạy trên worker, vòng lặp chỉ hỏi tiến độ
+			if job is None:
+				job = start_job(search_modes[mode][0], current_level, solution_cache)
+			if job.poll() != 'running':
+				finish_job()
 
 		if visualized == 1 and step == 2 :
 			if ptr + 1 < len(actions):
@@ -684,21 +611,11 @@ if __name__ == '__main__':
 				pygame.time.delay(150)  # dừng 100ms
 			else:
 				win = 1
-		if step == 2 and mode == 2 and win == 0:
-			(node_created, stepNode, pushed, times, memo, moves) = dfs(player, boxes)
-        
-		if len(moves) > 0 and visualized == 1:
-			(_, is_pushed, player, boxes) = move(player, boxes, moves[0][0])
-			actions.append(moves[0])
-			moves.pop(0)
-			stepNode += 1
-			pushed += is_pushed
-			ptr += 1
-			time.sleep(0.3)
 
 		for event in pygame.event.get():
 			keys_pressed = pygame.key.get_pressed()
 			if event.type == pygame.QUIT or keys_pressed[pygame.K_q]:
+				cancel_job()
 				pygame.quit()
 
 
@@ -745,59 +662,46 @@ if __name__ == '__main__':
 			if event.type == pygame.MOUSEBUTTONDOWN:
 				x, y = event.pos
 
+				# Switching level also works while solving: the running solve is cancelled
+				# and the new level starts in the same mode
+				level_switched = False
+				if up_arrow_rect.collidepoint(x, y):
+					level = (level + 1)%40
+					level_switched = True
+				if down_arrow_rect.collidepoint(x,y):
+					level = (level+39)%40
+					level_switched = True
+				if mini_rect.collidepoint(x,y):
+					map_index = 0
+					level_switched = True
+				if micro_rect.collidepoint(x,y):
+					map_index = 1
+					level_switched = True
+				if level_switched:
+					cancel_job()
+					reset_data()
+					if step == 2:
+						begin_solve()
+
 				if step == 1:
-					if up_arrow_rect.collidepoint(x, y):
-						level = (level + 1)%40
-						reset_data()
-					if down_arrow_rect.collidepoint(x,y):
-						level = (level+39)%40
-						reset_data()
-					if mini_rect.collidepoint(x,y):
-						map_index = 0
-						reset_data()
-					if micro_rect.collidepoint(x,y):
-						map_index = 1
-						reset_data()
-					
-					if manual_rect.collidepoint(x,y):
-						mode = 1
-						# startTime = time.time()
-					if dfs_rect.collidepoint(x,y): 
-						mode = 2
-						continue
-					if A_rect.collidepoint(x,y):
-						mode = 3
-						continue
+					for button_mode, rect in mode_rects.items():
+						if rect.collidepoint(x,y):
+							mode = button_mode
 					if start_rect.collidepoint(x,y):
 						if mode != 0:
-							a_star_path = []
-							visualized = 0
-							win = 0
-							actions = []
-							ptr = -1
-							moves = []
-							step = 2
-							startTime = time.time()
-				if step == 2:
+							begin_solve()
+				elif step == 2:
 					if restart_rect.collidepoint(x,y):
+						cancel_job()
 						init_data()
 						step = 1
 					if mode == 1:
 						pass
-					if mode == 2:
-						if restart_rect.collidepoint(x,y):
-							init_data()
-							step = 1
-						if win == 1:
-							if visualized == 0:
-								if visualize_rect.collidepoint(x,y):
-									stepNode = 0
-									pushed = 0
-									visualized = 1
-					if mode == 3:
-						if restart_rect.collidepoint(x, y):
-							init_data()
-							step = 1
+					if job is not None and job.running and cancel_rect.collidepoint(x, y):
+						cancel_job()
+						win = 3
+						timeTook = time.time() - startTime
+					elif mode in search_modes:
 						if win == 1 and a_star_path and visualize_rect.collidepoint(x, y):
 							# 2️⃣ Khi bấm "Visualize", bắt đầu chạy đường đi
 							actions = []
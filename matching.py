@@ -0,0 +1,82 @@
+# =============================== HUNGARIAN ===============================
+# Ghép cặp thùng-goal chi phí nhỏ nhất (thuật toán Hungarian dạng thế vị u/v).
+# Chỉ số 1-based như bản e-maxx: p[j] = hàng đang ghép với cột j (0 = chưa ghép),
+# cột 0 là cột giả. Hàng = thùng, cột = goal, số hàng <= số cột.
+
+
+def _augment(cost, u, v, p, i):
+    """Thêm hàng i vào matching hiện tại bằng một đường tăng ngắn nhất – O(n*m)."""
+    m = len(v) - 1
+    p[0] = i
+    j0 = 0
+    minv = [float('inf')] * (m + 1)
+    way = [0] * (m + 1)
+    used = [False] * (m + 1)
+    while True:
+        used[j0] = True
+        i0 = p[j0]
+        row = cost[i0 - 1]
+        ui0 = u[i0]
+        delta = float('inf')
+        j1 = 0
+        for j in range(1, m + 1):
+            if not used[j]:
+                cur = row[j - 1] - ui0 - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+        for j in range(m + 1):
+            if used[j]:
+                u[p[j]] += delta
+                v[j] -= delta
+            else:
+                minv[j] -= delta
+        j0 = j1
+        if p[j0] == 0:
+            break
+    while j0:
+        j1 = way[j0]
+        p[j0] = p[j1]
+        j0 = j1
+
+
+def _total(cost, p):
+    return sum(cost[p[j] - 1][j - 1] for j in range(1, len(p)) if p[j])
+
+
+def solve(cost):
+    """
+    Giải đầy đủ – O(n^2 * m). Trả về (tổng chi phí, trạng thái) với trạng thái
+    = (cost, u, v, p) dùng lại được cho replace_row.
+    """
+    n, m = len(cost), len(cost[0])
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    p = [0] * (m + 1)
+    for i in range(1, n + 1):
+        _augment(cost, u, v, p, i)
+    return _total(cost, p), (cost, u, v, p)
+
+
+def replace_row(state, i, row):
+    """
+    Cập nhật tăng dần khi chỉ hàng i (0-based) đổi chi phí, ví dụ khi một thùng
+    vừa được đẩy: bỏ ghép hàng i, đặt lại u[i] để giữ thế vị khả thi rồi tìm
+    một đường tăng – O(n*m) thay vì giải lại từ đầu.
+    Chỉ đúng khi số thùng = số goal: nếu còn cột trống thì cột vừa được giải phóng
+    có thể mang thế vị v < 0 làm sai điều kiện tối ưu, nên giải lại đầy đủ.
+    """
+    cost, u, v, p = state
+    cost = list(cost)
+    cost[i] = row
+    if len(cost) < len(v) - 1:
+        return solve(cost)
+    u, v, p = list(u), list(v), list(p)
+    i += 1
+    p[p.index(i, 1)] = 0
+    u[i] = min(row[j - 1] - v[j] for j in range(1, len(v)))
+    _augment(cost, u, v, p, i)
+    return _total(cost, p), (cost, u, v, p)
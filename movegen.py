@@ -0,0 +1,145 @@
+from collections import deque
+
+from level import bits
+
+
+# =============================== BITBOARD MOVEGEN ===============================
+# Trạng thái = (player: chỉ số ô, boxes: bitmask). Mọi phép kiểm tra tường/thùng
+# là phép toán bit trên các mask của Level (xem level.py).
+
+def shift(mask, offset):
+    """Dịch mask theo độ dời chỉ số (dương = sang phải/xuống, âm = ngược lại)."""
+    return mask << offset if offset > 0 else mask >> -offset
+
+
+def is_solved(level, boxes):
+    return level.goals & ~boxes == 0
+
+
+def step_moves(level, player, boxes):
+    """
+    Sinh các bước đi một ô của người chơi.
+    Mỗi phần tử: (chỉ số hướng trong level.dirs, ô mới của người chơi, boxes mới,
+    ô thùng cũ, ô thùng mới); hai phần tử cuối là None nếu bước đi không đẩy thùng.
+    """
+    free = level.floor & ~boxes
+    result = []
+    for d, (offset, _) in enumerate(level.dirs):
+        nxt = player + offset
+        if free >> nxt & 1:
+            result.append((d, nxt, boxes, None, None))
+        elif boxes >> nxt & 1:
+            target = nxt + offset
+            if free >> target & 1:
+                result.append((d, nxt, boxes ^ (1 << nxt) ^ (1 << target), nxt, target))
+    return result
+
+
+# =============================== PUSH-LEVEL ===============================
+
+def reachable(level, player, boxes):
+    """Vùng người chơi đi tới được mà không đẩy thùng (flood fill trên bitmask)."""
+    free = level.floor & ~boxes
+    width = level.width
+    reach = 1 << player
+    while True:
+        grown = (reach | reach << 1 | reach >> 1 | reach << width | reach >> width) & free
+        if grown == reach:
+            return reach
+        reach = grown
+
+
+def normalize(level, player, boxes):
+    """Trả về (vùng đi được, ô chuẩn hóa = ô trên-trái nhất = bit thấp nhất)."""
+    reach = reachable(level, player, boxes)
+    return reach, (reach & -reach).bit_length() - 1
+
+
+def push_moves(level, reach, boxes):
+    """
+    Sinh các cú đẩy hợp lệ từ vùng đi được hiện tại.
+    Mỗi phần tử: (ô thùng, chỉ số hướng trong level.dirs, ô thùng mới).
+    """
+    free = level.floor & ~boxes
+    pushes = []
+    for d, (offset, _) in enumerate(level.dirs):
+        # Thùng đẩy được theo hướng d <=> ô phía sau đi tới được và ô phía trước trống
+        movable = boxes & shift(reach, offset) & shift(free, -offset)
+        for box in bits(movable):
+            pushes.append((box, d, box + offset))
+    return pushes
+
+
+def pull_moves(level, reach, boxes):
+    """
+    Sinh các cú kéo hợp lệ cho tìm kiếm ngược từ goal (nghịch đảo của push_moves,
+    cùng luật với Level._pull_distance nhưng trên cả trạng thái nhiều thùng).
+    Mỗi phần tử: (ô thùng, chỉ số hướng d, ô thùng mới = ô thùng + offset của d);
+    người chơi đứng ở ô thùng mới rồi lùi thêm một ô theo hướng d.
+    """
+    free = level.floor & ~boxes
+    pulls = []
+    for d, (offset, _) in enumerate(level.dirs):
+        # Kéo được <=> ô kề theo hướng d đi tới được và ô kế tiếp sau nó trống
+        movable = boxes & shift(reach, -offset) & shift(free, -2 * offset)
+        for box in bits(movable):
+            pulls.append((box, d, box + offset))
+    return pulls
+
+
+def regions(level, boxes):
+    """Ô chuẩn hóa (bit thấp nhất) của từng vùng liên thông trong sàn trống."""
+    rest = level.floor & ~boxes
+    while rest:
+        start = (rest & -rest).bit_length() - 1
+        yield start
+        rest &= ~reachable(level, start, boxes)
+
+
+def walk_path(level, src, dst, boxes):
+    """BFS đường đi ngắn nhất của người chơi từ src tới dst, tránh thùng."""
+    if src == dst:
+        return ""
+    parent = {src: None}
+    queue = deque([src])
+    while queue:
+        cur = queue.popleft()
+        for nxt, char in level.neighbors[cur]:
+            if nxt in parent or boxes >> nxt & 1:
+                continue
+            parent[nxt] = (cur, char)
+            if nxt == dst:
+                path = []
+                while parent[nxt] is not None:
+                    nxt, char = parent[nxt]
+                    path.append(char)
+                return "".join(reversed(path))
+            queue.append(nxt)
+    return None
+
+
+def step_path(level, steps):
+    """Chuỗi ký tự hướng từ danh sách chỉ số hướng."""
+    return "".join(level.dirs[d][1] for d in steps)
+
+
+def encode_push(box, d):
+    """Mã hóa cú đẩy thành một số nguyên để lưu trong NodeStore('I')."""
+    return box << 2 | d
+
+
+def rebuild_path(level, start, boxes, pushes):
+    """
+    Dựng lại chuỗi bước đi đầy đủ từ danh sách cú đẩy đã mã hóa (encode_push).
+    Chỉ gọi một lần khi đã tìm được lời giải.
+    """
+    player = start
+    path = []
+    for code in pushes:
+        box, d = code >> 2, code & 3
+        offset, char = level.dirs[d]
+        path.append(walk_path(level, player, box - offset, boxes))
+        path.append(char)
+        boxes ^= (1 << box) | (1 << (box + offset))
+        player = box
+    return "".join(path)
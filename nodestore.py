@@ -0,0 +1,35 @@
+from array import array
+
+
+class NodeStore:
+    """
+    Kho node dạng mảng: node i chỉ lưu chỉ số node cha và mã nước đi dẫn tới nó,
+    thay vì mỗi node mang theo cả chuỗi/list đường đi. Đường đi chỉ được dựng lại
+    một lần bằng cách lần ngược con trỏ cha khi tới đích.
+
+    move_type: mã kiểu của array cho nước đi – 'B' (1 byte) cho bước đi/hướng,
+    'I' cho cú đẩy mã hóa ô thùng * 4 + hướng.
+    """
+
+    def __init__(self, move_type='B'):
+        self.parent = array('i')
+        self.move = array(move_type)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self, parent, move):
+        """Thêm node con của parent (-1 cho gốc) và trả về chỉ số của nó."""
+        self.parent.append(parent)
+        self.move.append(move)
+        return len(self.parent) - 1
+
+    def moves(self, node):
+        """Danh sách mã nước đi từ gốc tới node."""
+        result = []
+        parent, move = self.parent, self.move
+        while parent[node] != -1:
+            result.append(move[node])
+            node = parent[node]
+        result.reverse()
+        return result
@@ -0,0 +1,80 @@
+import heapq
+
+# =============================== OPEN LIST ===============================
+# Hàng đợi ưu tiên cho frontier của A*, thay thế được cho nhau qua make_open_list:
+#   - 'heap':   heapq trên bộ (f, g, entry), thứ tự như trước đây: f nhỏ, rồi g nhỏ,
+#               rồi các trường đầu của entry (số cú đẩy, khóa Zobrist).
+#   - 'bucket': f và g là số nguyên nhỏ (heuristic admissible nguyên) nên mỗi f là
+#               một bucket, trong bucket chia theo g; lấy ra f nhỏ nhất, trong đó g
+#               lớn nhất (= h nhỏ nhất, node gần đích hơn), cùng g thì LIFO.
+#               push/pop O(1) khấu hao, không so sánh tuple.
+# Cả hai có push(f, g, entry), pop() -> (f, g, entry) và len().
+
+
+class HeapOpenList:
+    def __init__(self):
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, f, g, entry):
+        heapq.heappush(self.heap, (f, g, entry))
+
+    def pop(self):
+        return heapq.heappop(self.heap)
+
+
+class BucketOpenList:
+    """
+    buckets[f][g] là stack các entry. Mỗi buckets[f] không có stack rỗng ở cuối, nên
+    buckets[f][-1] luôn là g lớn nhất còn entry. low là f nhỏ nhất có thể còn entry;
+    heuristic không nhất quán (PDB, mở lại node) có thể đẩy f nhỏ hơn low nên push
+    kéo low xuống.
+    """
+
+    def __init__(self):
+        self.buckets = []
+        self.low = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, f, g, entry):
+        buckets = self.buckets
+        if f >= len(buckets):
+            buckets.extend([] for _ in range(f + 1 - len(buckets)))
+        row = buckets[f]
+        if g >= len(row):
+            row.extend([] for _ in range(g + 1 - len(row)))
+        row[g].append(entry)
+        if f < self.low:
+            self.low = f
+        self.size += 1
+
+    def pop(self):
+        if not self.size:
+            raise IndexError("pop from empty open list")
+        buckets = self.buckets
+        f = self.low
+        while not buckets[f]:
+            f += 1
+        self.low = f
+        row = buckets[f]
+        g = len(row) - 1
+        stack = row[g]
+        entry = stack.pop()
+        if not stack:
+            row.pop()
+            while row and not row[-1]:
+                row.pop()
+        self.size -= 1
+        return f, g, entry
+
+
+OPEN_LISTS = {'heap': HeapOpenList, 'bucket': BucketOpenList}
+
+
+def make_open_list(kind='heap'):
+    return OPEN_LISTS[kind]()
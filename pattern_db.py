@@ -0,0 +1,105 @@
+import os
+import pickle
+import time
+from collections import deque
+from itertools import combinations
+
+from level import INF
+from movegen import pull_moves, reachable, regions
+
+# =============================== PATTERN DATABASE ===============================
+# PDB cho nhóm nhỏ k thùng (k = 2 hoặc 3): table[mask của k thùng] = số cú đẩy tối
+# thiểu để đưa k thùng đó vào k goal bất kỳ khi bỏ qua các thùng còn lại, lấy min
+# theo vị trí người chơi. Dựng bằng BFS ngược (kéo thùng) từ mọi cách đặt k thùng
+# lên goal. Nhóm thùng không có trong bảng => không thể về goal => deadlock.
+#
+# Các nhóm rời nhau cộng được với nhau (mỗi cú đẩy chỉ di chuyển một thùng) nên
+# tổng theo một phân hoạch thùng vẫn là cận dưới của số cú đẩy còn lại.
+
+PDB_VERSION = 1
+CACHE_DIR = os.path.join("Cache", "pdb")
+
+
+class PatternDatabase:
+    def __init__(self, size, table, build_time, cached):
+        self.size = size
+        self.table = table
+        self.build_time = build_time
+        self.cached = cached
+
+    def __len__(self):
+        return len(self.table)
+
+    def partition_cost(self, boxes, min_distance):
+        """
+        Tổng PDB theo một phân hoạch rời của các thùng: chọn tham lam các nhóm có
+        phần dư (giá trị PDB - tổng min_distance) lớn nhất; thùng lẻ còn lại tính
+        bằng min_distance. INF nếu có nhóm k thùng không về được goal.
+        """
+        groups = []
+        for group in combinations(boxes, self.size):
+            mask = 0
+            base = 0
+            for b in group:
+                mask |= 1 << b
+                base += min_distance[b]
+            value = self.table.get(mask)
+            if value is None:
+                return INF
+            groups.append((value - base, value, mask))
+        groups.sort(reverse=True)
+
+        total = 0
+        used = 0
+        for _, value, mask in groups:
+            if not used & mask:
+                used |= mask
+                total += value
+        return total + sum(min_distance[b] for b in boxes if not used >> b & 1)
+
+
+def build(level, size):
+    """BFS ngược từ mọi cách đặt `size` thùng lên goal, trả về bảng mask -> số cú đẩy."""
+    table = {}
+    seen = set()
+    queue = deque()
+    for group in combinations(level.goal_list, size):
+        boxes = level.mask_of_indices(group)
+        table[boxes] = 0
+        for canon in regions(level, boxes):
+            seen.add((boxes, canon))
+            queue.append((boxes, canon, 0))
+
+    while queue:
+        boxes, player, dist = queue.popleft()
+        reach = reachable(level, player, boxes)
+        for box, _, target in pull_moves(level, reach, boxes):
+            # Người chơi đứng ở target rồi lùi thêm một ô, kéo thùng theo sang target
+            new_boxes = boxes ^ (1 << box) ^ (1 << target)
+            canon_reach = reachable(level, 2 * target - box, new_boxes)
+            state = (new_boxes, (canon_reach & -canon_reach).bit_length() - 1)
+            if state in seen:
+                continue
+            seen.add(state)
+            if new_boxes not in table:
+                table[new_boxes] = dist + 1
+            queue.append((new_boxes, state[1], dist + 1))
+    return table
+
+
+def load_or_build(level, size=2, cache_dir=CACHE_DIR):
+    """Đọc PDB từ cache theo hash bản đồ (Level.digest), hoặc dựng mới rồi lưu lại."""
+    size = min(size, len(level.goal_list))
+    path = os.path.join(cache_dir, f"{level.digest()}_k{size}_v{PDB_VERSION}.pkl")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            table = pickle.load(f)
+        return PatternDatabase(size, table, 0.0, True)
+
+    start = time.time()
+    table = build(level, size)
+    build_time = time.time() - start
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return PatternDatabase(size, table, build_time, False)
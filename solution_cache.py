@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+
+from external import RAM_MB
+
+# =============================== SOLUTION CACHE ===============================
+# Lời giải đã tìm được lưu trên đĩa, mỗi mục một file JSON trong Cache/solutions,
+# tên file là hash của (nội dung bản đồ, solver, tùy chọn, cách đo bộ nhớ, CACHE_VERSION). GUI,
+# các driver và benchmark dùng chung nên lần giải lặp lại chỉ mất một lần đọc file.
+# Giới hạn số mục: khi vượt max_entries thì xóa các mục lâu nhất chưa được dùng
+# (thời gian sửa file được cập nhật mỗi lần đọc trúng).
+#
+# Chỉ lưu kết quả trọn vẹn: lời giải, hoặc "không có lời giải" khi solver duyệt
+# hết không gian; lần chạy bị dừng vì giới hạn node/thời gian không được lưu.
+# Số đo (thời gian, bộ nhớ) của mục lấy từ cache là của lần giải đã lưu: tracemalloc
+# và đỉnh RSS cho số không so được với nhau nên cách đo nằm trong khóa, và các bảng
+# kết quả đánh dấu những dòng lấy từ cache (cột Cached).
+
+# Tăng khi solver đổi kết quả (đường đi, số node) hoặc stats / metrics lưu trong mục đổi dạng để bỏ cache cũ
+CACHE_VERSION = 3
+CACHE_DIR = os.path.join("Cache", "solutions")
+MAX_ENTRIES = 1000
+
+
+class SolutionCache:
+    def __init__(self, directory=CACHE_DIR, max_entries=MAX_ENTRIES):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, level, solver, options=None, trace=True):
+        """
+        level: Level dựng từ file (Level.digest không phụ thuộc CRLF/khoảng trắng cuối dòng).
+        trace: SolveMonitor đo bộ nhớ bằng tracemalloc (True) hay đỉnh RSS (False).
+        """
+        memory = "trace" if trace else "rss"
+        text = json.dumps([level.digest(), solver, options or {}, memory, CACHE_VERSION], sort_keys=True)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        """Mục đã lưu (dict) hoặc None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        """Ghi nguyên tử (file tạm + replace) để các worker song song không đọc file dở."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        except OSError:
+            return
+        if len(names) <= self.max_entries:
+            return
+        entries = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        try:
+            return sum(1 for n in os.listdir(self.directory) if n.endswith(".json"))
+        except OSError:
+            return 0
+
+
+def cache_options(engine, push_level=False, heuristic_mode='matching', macros=False, corral=False, open_list='heap',
+                  weight=None, beam_width=None, closed='builtin', ram_mb=None):
+    """
+    Tùy chọn ảnh hưởng tới kết quả của từng engine (phần còn lại của khóa cache).
+    weight / beam_width = None là giá trị mặc định của engine (Heuristic.WEIGHT, BEAM_WIDTH);
+    giá trị bằng mặc định cho cùng khóa với None. closed: tập đã duyệt (closedset.py) –
+    không đổi lời giải nhưng đổi số đo bộ nhớ và stats closed_*. ram_mb của 'external'
+    (None = external.RAM_MB) cũng vậy, với external_runs / external_peak_disk.
+    """
+    import Heuristic  # Heuristic import module này
+    options = {}
+    if engine == 'astar':
+        options = {'push_level': push_level, 'heuristic': heuristic_mode}
+    elif engine == 'ida':
+        options = {'heuristic': heuristic_mode}
+    elif engine == 'dfs':
+        options = {'push_level': push_level}
+    elif engine in ('wastar', 'gbfs'):
+        options = {'push_level': push_level, 'heuristic': heuristic_mode}
+    elif engine == 'beam':
+        options = {'heuristic': heuristic_mode}
+    elif engine == 'external':
+        options = {'ram_mb': ram_mb or RAM_MB}
+    if engine == 'wastar' and (weight or Heuristic.WEIGHT) != Heuristic.WEIGHT:
+        options['weight'] = weight
+    if engine == 'beam' and (beam_width or Heuristic.BEAM_WIDTH) != Heuristic.BEAM_WIDTH:
+        options['beam_width'] = beam_width
+    # Chỉ thêm khi bật để khóa của các mục không macro/corral/bucket/packed giữ nguyên
+    if macros and engine in ('astar', 'wastar', 'gbfs', 'dfs'):
+        options.update(push_level=True, macros=True)
+    if corral and engine in ('astar', 'wastar', 'gbfs'):
+        options.update(push_level=True, corral=True)
+    if open_list != 'heap' and engine in ('astar', 'wastar', 'gbfs'):
+        options['open_list'] = open_list
+    if closed != 'builtin' and engine in ('astar', 'wastar', 'gbfs', 'dfs'):
+        options['closed'] = closed
+    return options
+
+
+def make_entry(result, stats, metrics):
+    """result: bộ 5 (path, pushes, generated, repeated, explored) như a_star_sokoban trả về."""
+    path, pushes, generated, repeated, explored = result
+    return {'path': path, 'pushes': pushes, 'generated': generated, 'repeated': repeated,
+            'explored': explored, 'stats': stats or {}, 'metrics': metrics}
+
+
+def entry_result(entry):
+    return entry['path'], entry['pushes'], entry['generated'], entry['repeated'], entry['explored']
@@ -0,0 +1,247 @@
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+from instrument import SolveMonitor
+from solution_cache import cache_options, make_entry
+
+# =============================== SOLVER WORKER ===============================
+# Chạy solver trong process riêng để vòng lặp pygame không bị treo. Worker gửi về
+# qua Pipe các thông điệp:
+#   ('progress', {'explored', 'visited', 'elapsed'})  – vài lần mỗi giây
+#   ('done', {'path', 'pushes', 'generated', 'repeated', 'explored', 'metrics'})
+#   ('error', traceback)
+# Hủy = kill process; UI không bao giờ chờ worker. Với cache, lời giải đã có được
+# trả về ngay mà không mở process, lời giải mới được worker ghi vào cache.
+# PortfolioJob chạy nhiều engine cùng lúc (mỗi engine một SolveJob) và giữ lời giải
+# về đầu tiên.
+
+PROGRESS_INTERVAL = 0.2
+
+
+class ProgressMonitor(SolveMonitor):
+    """SolveMonitor gửi số node đã duyệt về UI theo chu kỳ (kiểm tra đồng hồ mỗi 1024 node)."""
+
+    def __init__(self, conn, trace=True):
+        super().__init__(trace)
+        self.conn = conn
+        self.explored = 0
+        self.next_report = 0.0
+
+    def observe(self, frontier, visited):
+        super().observe(frontier, visited)
+        self.explored += 1
+        if self.explored & 1023 == 0:
+            now = time.perf_counter()
+            if now >= self.next_report:
+                self.next_report = now + PROGRESS_INTERVAL
+                self.conn.send(('progress', {'explored': self.explored, 'visited': self.peak_visited,
+                                             'elapsed': now - self.start}))
+
+
+def _solve_dfs(level, monitor):
+    import dfs as dfs_engine
+    generated, step, _, _, actions = dfs_engine.dfs(level, monitor=monitor)
+    path = "".join(d.get_char() for d in actions) if step > 0 else None
+    return path, 0, generated, 0, generated
+
+
+def _solve_with(solver_name):
+    def solve(level, monitor):
+        import Heuristic
+        return getattr(Heuristic, solver_name)(level, monitor=monitor)
+    return solve
+
+
+ENGINES = {
+    'dfs': _solve_dfs,
+    'astar': _solve_with('a_star_sokoban'),
+    'ida': _solve_with('ida_star_sokoban'),
+    'wastar': _solve_with('weighted_a_star'),
+    'gbfs': _solve_with('greedy_best_first'),
+    'beam': _solve_with('beam_search'),
+}
+# Engine mặc định của portfolio: DFS và họ A* bổ sung cho nhau (xem DFS.csv / A_star.csv)
+PORTFOLIO = ('dfs', 'astar', 'wastar', 'gbfs')
+
+
+def run_job(conn, engine, level, cache=None, cache_key=None):
+    """Hàm chạy trong process con; level (Level) được truyền nguyên qua fork/pickle."""
+    sys.stdout = open(os.devnull, 'w', encoding='utf-8')  # solver in rất nhiều, không cần trong GUI
+    if hasattr(os, 'nice'):
+        os.nice(10)  # nhường CPU cho vòng lặp vẽ khi máy ít nhân
+    try:
+        with ProgressMonitor(conn, trace=False) as monitor:
+            result = ENGINES[engine](level, monitor)
+        entry = make_entry(result, {}, monitor.report(result[2]))
+        if cache is not None:
+            cache.put(cache_key, entry)
+        conn.send(('done', entry))
+    except Exception:
+        conn.send(('error', traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def _context():
+    # fork khởi động tức thì; spawn (Windows/macOS) phải import lại script chính
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+
+
+class SolveJob:
+    """
+    Một lần giải đang chạy nền. UI gọi poll() mỗi frame (không chặn) và đọc
+    status / progress / result; cancel() dừng worker ngay lập tức.
+    """
+
+    def __init__(self, engine, level, cache=None):
+        self.started = time.time()
+        self.status = 'running'   # running | done | error | cancelled
+        self.progress = {'explored': 0, 'visited': 0, 'elapsed': 0.0}
+        self.result = None
+        self.error = None
+        self.cached = False
+        cache_key = None
+        if cache is not None:
+            cache_key = cache.key(level, engine, cache_options(engine), trace=False)
+            self.result = cache.get(cache_key)
+            if self.result is not None:
+                self.cached = True
+                self.status = 'done'
+                return
+
+        ctx = _context()
+        self.conn, child_conn = ctx.Pipe(duplex=False)
+        self.process = ctx.Process(target=run_job, args=(child_conn, engine, level, cache, cache_key), daemon=True)
+        if ctx.get_start_method() == 'spawn':
+            # Process con import lại main.py: không để nó mở thêm cửa sổ pygame
+            previous = os.environ.get('SDL_VIDEODRIVER')
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            try:
+                self.process.start()
+            finally:
+                if previous is None:
+                    del os.environ['SDL_VIDEODRIVER']
+                else:
+                    os.environ['SDL_VIDEODRIVER'] = previous
+        else:
+            self.process.start()
+        child_conn.close()
+
+    @property
+    def running(self):
+        return self.status == 'running'
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started
+
+    def poll(self):
+        """Đọc mọi thông điệp đang chờ; trả về status hiện tại."""
+        if not self.running:
+            return self.status
+        try:
+            while self.running and self.conn.poll():
+                kind, payload = self.conn.recv()
+                if kind == 'progress':
+                    self.progress = payload
+                elif kind == 'done':
+                    self.result = payload
+                    self.status = 'done'
+                else:
+                    self.error = payload
+                    self.status = 'error'
+        except EOFError:
+            # Worker chết trước khi gửi kết quả
+            self.status = 'error'
+            self.error = f"worker exited with code {self.process.exitcode}"
+        if not self.running:
+            self.process.join()
+            self.conn.close()
+        return self.status
+
+    def cancel(self):
+        if self.running:
+            # kill thay vì terminate: process fork từ pygame thừa hưởng handler SIGTERM của SDL
+            self.process.kill()
+            self.process.join()
+            self.conn.close()
+            self.status = 'cancelled'
+
+
+class PortfolioJob:
+    """
+    Chạy song song các engine trên cùng một level, lấy lời giải về trước nhất và hủy
+    các engine còn lại. Cùng giao diện với SolveJob; result có thêm 'winner' (engine
+    thắng) và 'winner_time' (giây từ lúc khởi động tới khi nhận lời giải, 0 nếu lấy từ
+    cache). Engine kết thúc mà không có lời giải (beam hẹp, lỗi) chỉ bị loại khỏi cuộc
+    đua; khi không còn engine nào chạy thì portfolio dừng.
+    """
+
+    def __init__(self, level, engines=PORTFOLIO, cache=None):
+        self.started = time.time()
+        self.status = 'running'
+        self.progress = {'explored': 0, 'visited': 0, 'elapsed': 0.0}
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.jobs = {}
+        for engine in engines:
+            job = self.jobs[engine] = SolveJob(engine, level, cache)
+            if job.cached and job.result['path']:
+                break  # đã có lời giải, không cần mở các engine sau
+        self.poll()
+
+    @property
+    def running(self):
+        return self.status == 'running'
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started
+
+    def poll(self):
+        if not self.running:
+            return self.status
+        for engine, job in self.jobs.items():
+            if job.poll() == 'done' and job.result['path']:
+                self._finish(engine, job)
+                return self.status
+        live = [job for job in self.jobs.values() if job.running]
+        if live:
+            self.progress = {'explored': sum(job.progress['explored'] for job in live),
+                             'visited': sum(job.progress['visited'] for job in live),
+                             'elapsed': self.elapsed}
+            return self.status
+        finished = [(engine, job) for engine, job in self.jobs.items() if job.status == 'done']
+        if finished:
+            # Mọi engine đều xong mà không có lời giải
+            self._finish(*finished[0])
+            self.result['winner'] = None
+        else:
+            self.status = 'error'
+            self.error = "\n".join(f"{engine}: {job.error}" for engine, job in self.jobs.items())
+        return self.status
+
+    def _finish(self, engine, job):
+        for other in self.jobs.values():
+            other.cancel()
+        self.result = dict(job.result, winner=engine, winner_time=0.0 if job.cached else self.elapsed)
+        self.cached = job.cached
+        self.status = 'done'
+
+    def cancel(self):
+        if self.running:
+            for job in self.jobs.values():
+                job.cancel()
+            self.status = 'cancelled'
+
+
+def start_job(engine, level, cache=None):
+    """SolveJob cho một engine, PortfolioJob (các engine PORTFOLIO) cho 'portfolio'."""
+    if engine == 'portfolio':
+        return PortfolioJob(level, PORTFOLIO, cache)
+    return SolveJob(engine, level, cache)
@@ -0,0 +1,28 @@
+import os
+
+# Tên bản đồ như ghi trong CSV/kết quả; thư mục trên đĩa có thể khác hoa thường
+# ("Mini Cosmos") nên luôn tìm qua testcase_path
+MAP_LIST = ['MINI COSMOS', 'MICRO COSMOS']
+LEVELS_PER_MAP = 40
+TESTCASE_DIR = "Testcases"
+
+
+def map_dir(map_name, root=TESTCASE_DIR):
+    """Thư mục của bản đồ, so khớp không phân biệt hoa thường (Linux phân biệt, Windows thì không)."""
+    exact = os.path.join(root, map_name)
+    if os.path.isdir(exact):
+        return exact
+    for entry in os.listdir(root):
+        if entry.lower() == map_name.lower():
+            return os.path.join(root, entry)
+    return exact
+
+
+def testcase_path(map_name, level_num, root=TESTCASE_DIR):
+    return os.path.join(map_dir(map_name, root), f"{level_num}.txt")
+
+
+def all_testcases():
+    """(chỉ số 0..79, tên bản đồ, số level) theo đúng thứ tự của các driver."""
+    for j in range(len(MAP_LIST) * LEVELS_PER_MAP):
+        yield j, MAP_LIST[j // LEVELS_PER_MAP], j % LEVELS_PER_MAP + 1
@@ -0,0 +1,62 @@
+import os
+import sys
+from collections import deque
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from level import Level  # noqa: E402
+from movegen import is_solved, normalize, push_moves  # noqa: E402
+
+TESTCASES = os.path.join(ROOT, "Testcases")
+
+
+def level_file(map_name, level_num):
+    """Đường dẫn file testcase, ví dụ level_file("Mini Cosmos", 1)."""
+    return os.path.join(TESTCASES, map_name, f"{level_num}.txt")
+
+
+def load_level(map_name, level_num):
+    return Level.from_file(level_file(map_name, level_num))
+
+
+def parse(text):
+    """Bản đồ dạng chuỗi với cùng ký hiệu như file testcase, tọa độ (hàng, cột)."""
+    return Level.from_text(text.strip("\n"))
+
+
+def replay(level, path):
+    """Chạy lại đường đi từ trạng thái đầu của level, kiểm tra hợp lệ và trả về số cú đẩy."""
+    offsets = {ch: offset for offset, ch in level.dirs}
+    player, boxes, pushes = level.start, level.start_boxes, 0
+    for ch in path:
+        nxt = player + offsets[ch]
+        assert level.floor >> nxt & 1, f"đi vào tường tại {level.cell(nxt)}"
+        if boxes >> nxt & 1:
+            target = nxt + offsets[ch]
+            assert level.floor >> target & 1 and not boxes >> target & 1, f"đẩy thùng bị chặn tại {level.cell(target)}"
+            boxes ^= (1 << nxt) | (1 << target)
+            pushes += 1
+        player = nxt
+    assert is_solved(level, boxes), "chưa giải xong"
+    return pushes
+
+
+def bfs_pushes(level):
+    """Số cú đẩy tối ưu bằng BFS thuần mức cú đẩy (không heuristic, không cắt tỉa)."""
+    boxes = level.start_boxes
+    _, canon = normalize(level, level.start, boxes)
+    seen = {(canon, boxes)}
+    queue = deque([(canon, boxes, 0)])
+    while queue:
+        player, boxes, dist = queue.popleft()
+        if is_solved(level, boxes):
+            return dist
+        region, _ = normalize(level, player, boxes)
+        for box, _, target in push_moves(level, region, boxes):
+            new_boxes = boxes ^ (1 << box) ^ (1 << target)
+            state = (normalize(level, box, new_boxes)[1], new_boxes)
+            if state not in seen:
+                seen.add(state)
+                queue.append((state[0], new_boxes, dist + 1))
+    return None
@@ -0,0 +1,56 @@
+import os
+
+from conftest import ROOT
+
+from benchmark import empty_row, parse_levels, run_benchmark, write_results
+import testcases
+
+
+def test_testcase_path_ignores_case(tmp_path):
+    (tmp_path / "Mini Cosmos").mkdir()
+    (tmp_path / "Mini Cosmos" / "1.txt").write_text("#")
+    assert testcases.testcase_path("MINI COSMOS", 1, str(tmp_path)) == os.path.join(str(tmp_path), "Mini Cosmos", "1.txt")
+
+
+def test_all_testcases_order():
+    cases = list(testcases.all_testcases())
+    assert len(cases) == 80
+    assert cases[0] == (0, 'MINI COSMOS', 1)
+    assert cases[40] == (40, 'MICRO COSMOS', 1)
+
+
+def test_parse_levels():
+    assert parse_levels("1-3,45") == {1, 2, 3, 45}
+
+
+def test_pool_rows_in_level_order_with_limits(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    options = {'engine': 'astar', 'push_level': True, 'heuristic_mode': 'matching',
+               'timeout': 30, 'max_nodes': 50, 'max_memory': None, 'verbose': False, 'trace': True,
+               'cache': False, 'macros': False, 'open_list': 'heap',
+               'weight': None, 'beam_width': None, 'closed': 'builtin', 'ram_mb': 64.0}
+    tasks = [(j, m, n, options) for j, m, n in testcases.all_testcases() if j in (41, 0, 1)]
+    rows = run_benchmark(tasks, 2, 30)
+    assert [row['index'] for row in rows] == [0, 1, 41]
+    assert rows[0]['status'] == 'solved' and rows[0]['path']
+    # Micro Cosmos 2 cần nhiều hơn 50 node
+    assert rows[2]['status'] == 'node limit' and rows[2]['path'] is None
+    assert rows[2]['stats']['budget']['nodes'] == 50
+
+
+def test_csv_marks_exhausted_budget(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    options = {'engine': 'astar', 'push_level': False, 'heuristic_mode': 'matching', 'macros': False,
+               'open_list': 'heap', 'weight': None, 'beam_width': None, 'closed': 'builtin', 'ram_mb': 64.0,
+               'timeout': 5, 'max_nodes': None}
+    solved, stopped = empty_row(0, 'MINI COSMOS', 1), empty_row(1, 'MINI COSMOS', 2, 'timeout')
+    solved['path'], solved['cached'] = "RR", True
+    stopped['stats'] = {'aborted': 'time', 'budget': {'reason': 'time', 'nodes': 900, 'elapsed': 5.0, 'memory_mb': 1.5}}
+    write_results([solved, stopped], options)
+    rows = [line.split(",") for line in (tmp_path / "A_star.csv").read_text().splitlines()]
+    status = rows[0].index("Status")
+    assert rows[0][status - 1] == "Step"
+    assert (rows[1][status - 1], rows[1][status]) == ("2", "solved")
+    assert (rows[2][status - 1], rows[2][status]) == ("", "timeout")
+    assert rows[0][status + 1] == "Cached" and (rows[1][status + 1], rows[2][status + 1]) == ("yes", "no")
+    assert "Budget exhausted (timeout): 900 nodes" in (tmp_path / "result_A_star.txt").read_text()
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from conftest import bfs_pushes, load_level, replay
+from Heuristic import a_star_sokoban, beam_search, greedy_best_first, weighted_a_star
+from solver_worker import SolveJob
+
+LEVELS = [("Mini Cosmos", 5), ("Mini Cosmos", 8), ("Micro Cosmos", 2)]
+
+
+@pytest.mark.parametrize("map_name, level_num", LEVELS)
+def test_weighted_push_count_bounded_by_weight(map_name, level_num):
+    level = load_level(map_name, level_num)
+    optimal = bfs_pushes(level)
+    for weight in (2, 3):
+        path, pushes, *_ = weighted_a_star(level, weight, push_level=True)
+        assert replay(level, path) == pushes <= weight * optimal
+
+
+@pytest.mark.parametrize("map_name, level_num", LEVELS)
+def test_greedy_solution_is_valid(map_name, level_num):
+    level = load_level(map_name, level_num)
+    path, pushes, *_ = greedy_best_first(level, push_level=True)
+    assert replay(level, path) == pushes >= bfs_pushes(level)
+    path, *_ = greedy_best_first(level)
+    replay(level, path)
+
+
+def test_weighted_explores_less_than_a_star():
+    level = load_level("Micro Cosmos", 2)
+    assert weighted_a_star(level, 3, push_level=True)[4] <= a_star_sokoban(level, True)[4]
+
+
+def test_bucket_needs_integer_weight():
+    level = load_level("Mini Cosmos", 1)
+    with pytest.raises(ValueError):
+        weighted_a_star(level, 1.5, push_level=True, open_list='bucket')
+    path, pushes, *_ = weighted_a_star(level, 2, push_level=True, open_list='bucket')
+    assert replay(level, path) == pushes
+
+
+def test_beam_solves_and_reports_layers():
+    level = load_level("Micro Cosmos", 2)
+    stats = {}
+    path, pushes, *_ = beam_search(level, 200, stats)
+    assert replay(level, path) == pushes == stats['beam_layers']
+    assert stats['beam_width'] == 200
+
+
+def test_narrow_beam_is_incomplete():
+    # Beam 20 cắt mất mọi nhánh dẫn tới lời giải của Micro Cosmos 2
+    level = load_level("Micro Cosmos", 2)
+    path, pushes, *_ = beam_search(level, 20)
+    assert path is None and pushes == 0
+
+
+@pytest.mark.parametrize("engine", ['wastar', 'gbfs', 'beam'])
+def test_gui_engines_run_in_worker(engine):
+    level = load_level("Mini Cosmos", 1)
+    job = SolveJob(engine, level)
+    deadline = time.time() + 60
+    while job.poll() == 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.status == 'done'
+    replay(level, job.result['path'])
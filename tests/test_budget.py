@@ -0,0 +1,51 @@
+from conftest import load_level
+
+from budget import SearchBudget, budget_limits, result_status
+from dfs import dfs
+from Heuristic import a_star_sokoban, bidirectional_sokoban, ida_star_sokoban
+from instrument import SolveMonitor
+
+
+def test_node_budget_returns_partial_stats():
+    stats = {}
+    path, pushes, generated, _, explored = a_star_sokoban(load_level("Micro Cosmos", 2), True, stats, budget=SearchBudget(max_nodes=100))
+    assert path is None and pushes == 0 and explored > 0
+    assert stats['aborted'] == 'nodes' and stats['budget']['nodes'] == generated >= 100
+    assert result_status(path, stats) == 'node limit'
+
+
+def test_time_budget_stops_every_engine():
+    level = load_level("Micro Cosmos", 2)
+    for solve in (lambda b, s: a_star_sokoban(level, False, s, budget=b),
+                  lambda b, s: ida_star_sokoban(level, s, budget=b),
+                  lambda b, s: bidirectional_sokoban(level, s, b)):
+        stats = {}
+        assert solve(SearchBudget(max_seconds=0), stats)[0] is None
+        assert stats['aborted'] == 'time' and result_status(None, stats) == 'timeout'
+    stats = {}
+    generated, step, *_ = dfs(level, stats=stats, budget=SearchBudget(max_seconds=0))
+    assert step == 0 and stats['budget']['reason'] == 'time'
+
+
+def test_memory_budget():
+    stats = {}
+    with SolveMonitor():
+        path, *_ = a_star_sokoban(load_level("Micro Cosmos", 2), False, stats, budget=SearchBudget(max_memory_mb=0.01))
+    assert path is None and stats['aborted'] == 'memory' and stats['budget']['memory_mb'] >= 0.01
+
+
+def test_unlimited_budget_does_not_change_result():
+    level = load_level("Mini Cosmos", 3)
+    assert a_star_sokoban(level, True, budget=SearchBudget()) == a_star_sokoban(level, True)
+
+
+def test_limits_from_argv():
+    assert budget_limits(["--push", "--max-nodes=500", "--timeout=2.5"]) == \
+        {'max_nodes': 500, 'max_seconds': 2.5, 'max_memory_mb': None}
+    assert result_status("", {}) == 'solved' and result_status(None, {}) == 'no solution'
+
+
+def test_now_reads_clock_between_intervals():
+    budget = SearchBudget(max_seconds=0)
+    assert not budget.exhausted(1)
+    assert budget.exhausted(1, now=True) and budget.reason == 'time'
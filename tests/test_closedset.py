@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from conftest import bfs_pushes, load_level, replay
+from closedset import PackedKeyMap, PackedKeySet, make_closed_set
+from Heuristic import a_star_sokoban
+
+
+def test_set_matches_builtin_through_resizes():
+    rng = random.Random(7)
+    keys = [rng.getrandbits(64) for _ in range(20000)] + [0, 5, 5 + (1 << 12)]
+    packed, plain = PackedKeySet(capacity_bits=4), set()
+    for key in keys:
+        packed.add(key)
+        plain.add(key)
+    packed.add(keys[0])
+    assert len(packed) == len(plain)
+    assert all(key in packed for key in plain)
+    assert not any(rng.getrandbits(64) in packed for _ in range(1000))
+    # 8 byte/ô, tải tối đa MAX_LOAD
+    assert packed.nbytes / len(packed) < 8 / 0.35
+
+
+def test_map_keeps_latest_value():
+    table = PackedKeyMap(capacity_bits=2)
+    for key in range(1, 100):
+        table[key * 4096] = key
+    table[4096] = 0
+    table[0] = 7
+    assert table.get(4096) == 0 and table.get(8192) == 2 and table.get(0) == 7
+    assert table.get(3, 10 ** 9) == 10 ** 9 and len(table) == 100
+
+
+def test_unknown_kind():
+    with pytest.raises(ValueError):
+        make_closed_set('tree')
+
+
+@pytest.mark.parametrize("push_level", [True, False])
+def test_packed_a_star_same_result_fewer_bytes(push_level):
+    level = load_level("Micro Cosmos", 2)
+    plain_stats, packed_stats = {}, {}
+    plain = a_star_sokoban(level, push_level, plain_stats)
+    packed = a_star_sokoban(level, push_level, packed_stats, closed='packed')
+    assert packed == plain
+    if push_level:
+        assert replay(level, packed[0]) == packed[1] == bfs_pushes(level)
+    assert packed_stats['closed_states'] == plain_stats['closed_states']
+    assert packed_stats['closed_bytes_per_state'] < plain_stats['closed_bytes_per_state'] / 2
+
+
+@pytest.mark.parametrize("push_level", [True, False])
+def test_packed_dfs_same_result(push_level):
+    import dfs
+    level = load_level("Micro Cosmos", 2)
+    stats = {}
+    plain = dfs.dfs(level, push_level)
+    packed = dfs.dfs(level, push_level, stats, closed='packed')
+    assert (packed[0], packed[1], packed[4]) == (plain[0], plain[1], plain[4])
+    assert stats['closed_set'] == 'packed' and stats['closed_states'] == plain[0]
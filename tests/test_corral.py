@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import bfs_pushes, load_level, parse, replay
+from corral import CorralPruner
+from Heuristic import a_star_sokoban
+from movegen import push_moves, reachable
+
+CORRAL = """
+########
+#?    ?#
+#      #
+###xx###
+#  @   #
+# x   ?#
+########
+"""
+
+
+def test_only_corral_barrier_pushes_are_kept():
+    level = parse(CORRAL)
+    boxes = level.start_boxes
+    reach = reachable(level, level.start, boxes)
+    pushes = push_moves(level, reach, boxes)
+    pruner = CorralPruner(level)
+    kept = pruner.prune(reach, boxes, pushes)
+    assert sorted(box for box, _, _ in kept) == [level.index((3, 3)), level.index((3, 4))]
+    assert pruner.pruned == len(pushes) - len(kept) > 0 and pruner.nodes == 1
+
+
+def test_no_pruning_without_corral():
+    # Mở hàng 3 bên trái: vùng phía trên nối với vùng người chơi, không còn corral
+    level = parse(CORRAL.replace("###xx###", "#  xx###"))
+    boxes = level.start_boxes
+    reach = reachable(level, level.start, boxes)
+    pushes = push_moves(level, reach, boxes)
+    assert CorralPruner(level).prune(reach, boxes, pushes) == pushes
+
+
+@pytest.mark.parametrize("map_name, level_num", [("Micro Cosmos", 6), ("Micro Cosmos", 10), ("Micro Cosmos", 28)])
+def test_corral_search_keeps_push_optimal_solutions(map_name, level_num):
+    level = load_level(map_name, level_num)
+    stats = {}
+    path, pushes, generated, *_ = a_star_sokoban(level, stats=stats, corral=True)
+    plain = a_star_sokoban(level, push_level=True)
+    assert replay(level, path) == pushes == bfs_pushes(level)
+    assert generated < plain[2] and stats['corral_pruned'] > 0
+
+
+def test_corral_level_solved():
+    level = parse(CORRAL)
+    stats = {}
+    path, pushes, *_ = a_star_sokoban(level, stats=stats, corral=True)
+    assert replay(level, path) == pushes == bfs_pushes(level)
+    assert stats['corral_pruned'] > 0
@@ -0,0 +1,82 @@
+from conftest import parse
+from deadlock import DeadlockDetector
+
+
+def detect(text, pushed):
+    """Chạy detector trên bản đồ text, với `pushed` là ô thùng vừa được đẩy tới."""
+    level = parse(text)
+    detector = DeadlockDetector(level)
+    return detector.is_deadlock(level.start_boxes, level.index(pushed)), detector.pruned
+
+
+def test_block2x2():
+    found, pruned = detect("""
+########
+#      #
+# xx   #
+# xx   #
+#  ????#
+#  @   #
+########
+""", (3, 3))
+    assert found and pruned['block2x2'] == 1
+
+
+def test_block2x2_all_on_goals_is_not_deadlock():
+    found, _ = detect("""
+#######
+#     #
+# ++  #
+# ++  #
+#  @  #
+#######
+""", (3, 3))
+    assert not found
+
+
+def test_wall_line_with_too_few_goals():
+    found, pruned = detect("""
+########
+# x x ?#
+#      #
+#   @  #
+#  ?   #
+########
+""", (1, 4))
+    assert found and pruned['wall'] == 1
+
+
+def test_wall_line_with_enough_goals_is_not_deadlock():
+    found, _ = detect("""
+########
+# x x??#
+#      #
+#   @  #
+########
+""", (1, 4))
+    assert not found
+
+
+def test_freeze_z_shape():
+    # A bị tường chặn phía trên, B bị tường chặn phía dưới, A và B chặn nhau theo
+    # chiều ngang: không phải khối 2x2 nhưng cả hai đều bị đóng băng
+    found, pruned = detect("""
+########
+# #  ? #
+# xx   #
+#  # ? #
+# @    #
+########
+""", (2, 3))
+    assert found and pruned['freeze'] == 1 and pruned['block2x2'] == 0
+
+
+def test_free_box_is_not_deadlock():
+    found, pruned = detect("""
+#######
+#     #
+#  x  #
+#   @?#
+#######
+""", (2, 3))
+    assert not found and not any(pruned.values())
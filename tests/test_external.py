@@ -0,0 +1,67 @@
+import os
+
+from conftest import bfs_pushes, load_level, parse, replay
+
+import pytest
+
+from budget import SearchBudget
+from external import external_bfs
+from instrument import SolveMonitor
+
+STUCK = """
+#####
+#@ x#
+#  ?#
+#####
+"""
+
+
+def test_push_optimal_with_tiny_ram(tmp_path):
+    level = load_level("Micro Cosmos", 2)
+    stats = {}
+    path, pushes, generated, repeated, explored = external_bfs(level, stats, ram_mb=0.01, scratch=str(tmp_path))
+    assert replay(level, path) == pushes == bfs_pushes(level)
+    assert stats['external_layers'] == pushes
+    # Bộ đệm nhỏ: mỗi tầng lớn phải ghi nhiều run
+    assert stats['external_runs'] > stats['external_layers']
+    assert stats['external_peak_disk'] > 0 and generated > explored > 0 and repeated > 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_same_result_regardless_of_ram():
+    level = load_level("Mini Cosmos", 5)
+    small, large = external_bfs(level, ram_mb=0.001), external_bfs(level)
+    assert small[1:] == large[1:] and replay(level, small[0]) == small[1]
+
+
+def test_unsolvable_level():
+    stats = {}
+    assert external_bfs(parse(STUCK), stats)[0] is None
+    assert stats['external_runs'] == 0
+
+
+def test_node_budget_stops_search(tmp_path):
+    stats = {}
+    result = external_bfs(load_level("Micro Cosmos", 2), stats, SearchBudget(max_nodes=500), scratch=str(tmp_path))
+    assert result[0] is None and stats['aborted'] == 'nodes'
+    assert os.listdir(tmp_path) == []
+
+
+class InterruptingMonitor(SolveMonitor):
+    """Ngắt lần giải giữa tầng như SIGALRM của benchmark."""
+
+    def __init__(self, after):
+        super().__init__(trace=False)
+        self.after = after
+
+    def observe(self, frontier, visited):
+        self.after -= 1
+        if self.after == 0:
+            raise KeyboardInterrupt
+
+
+def test_interrupted_solve_leaves_no_files(tmp_path):
+    with pytest.raises(KeyboardInterrupt):
+        external_bfs(load_level("Micro Cosmos", 2), monitor=InterruptingMonitor(5000), ram_mb=0.001,
+                     scratch=str(tmp_path))
+    assert os.listdir(tmp_path) == []
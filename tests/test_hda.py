@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import ROOT, bfs_pushes, load_level, parse, replay
+
+from budget import SearchBudget, result_status
+from hda_star import hda_star, scaling_benchmark
+import testcases
+
+STUCK = """
+#####
+#@ x#
+#  ?#
+#####
+"""
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+@pytest.mark.parametrize("map_name, level_num", [("Mini Cosmos", 5), ("Micro Cosmos", 2)])
+def test_push_optimal_for_any_worker_count(map_name, level_num, workers):
+    level = load_level(map_name, level_num)
+    stats = {}
+    path, pushes, generated, _, explored = hda_star(level, workers, stats)
+    assert replay(level, path) == pushes == bfs_pushes(level)
+    assert stats['hda_workers'] == workers and sum(stats['hda_explored']) == explored
+    if workers > 1:
+        # Trạng thái được chia theo hash nên worker nào cũng có việc
+        assert min(stats['hda_explored']) > 0 and stats['hda_batches'] > 1
+
+
+def test_unsolvable_level_terminates():
+    path, pushes, *_ = hda_star(parse(STUCK), 2)
+    assert path is None and pushes == 0
+
+
+def test_node_budget_stops_workers():
+    stats = {}
+    path, *_ = hda_star(load_level("Micro Cosmos", 2), 2, stats, budget=SearchBudget(max_nodes=500))
+    assert path is None and result_status(path, stats) == 'node limit'
+
+
+def test_scaling_rows_report_speedup(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    rows = scaling_benchmark([testcases.testcase_path("MINI COSMOS", 5)], [1, 2])
+    assert [(row[0], row[1], row[2]) for row in rows] == [("A*-push", 1, 1), ("HDA*", 1, 1), ("HDA*", 2, 1)]
+    assert rows[1][5] == 1.0 and all(row[5] > 0 for row in rows)
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from history import HistoryStore, render
+
+T0 = datetime(2025, 10, 24, 1, 0, 0)
+
+
+def add(store, problem, algorithm, minutes):
+    return store.append(problem, algorithm, "R, U", 2, 10, 1, 9, 0.5, 0.01, timestamp=T0 + timedelta(minutes=minutes))
+
+
+def test_newest_first_and_filters(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    add(store, "Testcases/MINI COSMOS/1.txt", "A* Search", 0)
+    add(store, "Testcases/MINI COSMOS/2.txt", "A* Search", 1)
+    add(store, "Testcases/MINI COSMOS/1.txt", "Depth First Search", 2)
+
+    assert [r['timestamp'][-5:] for r in store.query()] == ["02:00", "01:00", "00:00"]
+    assert [r['algorithm'] for r in store.query(problem="Testcases/MINI COSMOS/1.txt")] == ["Depth First Search", "A* Search"]
+    assert len(store.query(algorithm="A* Search")) == 2
+    assert len(store.query(since=(T0 + timedelta(minutes=1)).isoformat())) == 2
+    assert len(store.query(limit=1)) == 1
+    assert len(store) == 3
+
+
+def test_writes_only_append(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    add(store, "p", "a", 0)
+    data = (tmp_path / "history.jsonl").read_bytes()
+    add(store, "p", "a", 1)
+    assert (tmp_path / "history.jsonl").read_bytes().startswith(data)
+
+
+def test_index_rebuilt_for_unindexed_records(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    add(store, "p", "a", 0)
+    add(store, "q", "a", 1)
+    # Mất dòng idx cuối (dừng giữa hai lần ghi) và một dòng ghi dở ở cuối data
+    index = tmp_path / "history.idx"
+    index.write_text(index.read_text().splitlines(keepends=True)[0])
+    with open(tmp_path / "history.jsonl", "ab") as f:
+        f.write(b'{"timestamp": "2025')
+
+    reopened = HistoryStore(str(tmp_path))
+    assert [r['problem'] for r in reopened.query()] == ["q", "p"]
+
+
+def test_render_matches_legacy_layout(tmp_path):
+    record = add(HistoryStore(str(tmp_path)), "Testcases/MINI COSMOS/1.txt", "A* Search", 0)
+    lines = render(record).split("\n")
+    assert lines[0] == "Datatime (UTC+7): 24/10/2025 01:00:00 AM"
+    assert lines[1:3] == ["Problem: Testcases/MINI COSMOS/1.txt", "Algorithm: A* Search"]
+    assert lines[-1] == "Duration: 0.01 secs"
@@ -0,0 +1,36 @@
+from conftest import load_level
+
+from Heuristic import a_star_sokoban
+from instrument import SolveMonitor, metric_columns
+
+
+def test_monitor_tracks_peaks_and_traced_memory():
+    with SolveMonitor() as monitor:
+        data = [bytes(1024) for _ in range(1000)]
+        monitor.observe(3, 10)
+        monitor.observe(1, 20)
+        monitor.solution_found()
+        del data
+    metrics = monitor.report(100)
+    assert metrics['peak_memory_mb'] >= 1.0
+    assert (metrics['peak_frontier'], metrics['peak_visited']) == (3, 20)
+    assert metrics['first_solution'] is not None and metrics['first_solution'] <= metrics['time']
+    assert metrics['bytes_per_state'] == metrics['peak_memory_mb'] * 1024 * 1024 / 20
+
+
+def test_solver_reports_into_monitor():
+    level = load_level("Mini Cosmos", 1)
+    with SolveMonitor() as monitor:
+        path, _, generated, _, _ = a_star_sokoban(level, push_level=True, monitor=monitor)
+    metrics = monitor.report(generated)
+    assert path
+    assert 0 < metrics['peak_visited'] <= generated
+    assert metrics['peak_memory_mb'] > 0 and metrics['nodes_per_sec'] > 0
+    assert len(metric_columns(metrics).split(",")) == 5
+
+
+def test_unsolved_has_no_first_solution():
+    with SolveMonitor(trace=False) as monitor:
+        pass
+    assert monitor.report(0)['first_solution'] is None
+    assert metric_columns(monitor.report(0)).endswith(",")
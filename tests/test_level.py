@@ -0,0 +1,42 @@
+import pickle
+
+import pytest
+
+from conftest import level_file
+from level import Level
+
+MAP = "  ####\n###  #\n#@x ?#\n######"
+
+
+def test_crlf_and_lf_files_give_same_level(tmp_path):
+    lf, crlf = tmp_path / "lf.txt", tmp_path / "crlf.txt"
+    lf.write_bytes(MAP.encode())
+    crlf.write_bytes(MAP.replace("\n", "\r\n").encode())
+    a, b = Level.from_file(str(lf)), Level.from_file(str(crlf))
+    assert a.digest() == b.digest()
+    assert (a.floor, a.goals, a.start, a.start_boxes) == (b.floor, b.goals, b.start, b.start_boxes)
+
+
+def test_blank_outside_walls_is_not_floor():
+    level = Level.from_text(MAP)
+    # Khoảng trắng (0, 0), (0, 1) nằm ngoài tường bao
+    assert sorted(level.cells_of(level.floor)) == [(1, 3), (1, 4), (2, 1), (2, 2), (2, 3), (2, 4)]
+    assert level.cell(level.start) == (2, 1) and level.cells_of(level.start_boxes) == [(2, 2)]
+
+
+def test_xy_only_changes_coordinates():
+    rc, xy = Level.from_text(MAP), Level.from_text(MAP, xy=True)
+    assert (rc.floor, rc.goals, rc.start, rc.start_boxes) == (xy.floor, xy.goals, xy.start, xy.start_boxes)
+    assert xy.cell(xy.start) == (1, 2)
+
+
+def test_level_pickles_for_workers():
+    level = Level.from_file(level_file("Micro Cosmos", 2))
+    copy = pickle.loads(pickle.dumps(level))
+    assert copy.digest() == level.digest()
+    assert (copy.distance, copy.dead, copy.start_boxes) == (level.distance, level.dead, level.start_boxes)
+
+
+def test_missing_player_is_an_error():
+    with pytest.raises(ValueError):
+        Level.from_text("####\n#x?#\n####")
@@ -0,0 +1,87 @@
+import pytest
+
+from conftest import bfs_pushes, load_level, parse, replay
+from Heuristic import a_star_sokoban
+from macro import MacroMoves
+
+TUNNEL = """
+##########
+#@x     ?#
+###### ###
+     #.#
+     ###
+"""
+
+ROOM = """
+#######
+#    ?#
+#@x  ?#
+###  ##
+  #  #
+  ####
+"""
+
+GOAL_ROOM = """
+#######
+#     #
+#@x x #
+###.###
+  #?#
+  #?#
+  ###
+"""
+
+
+def test_tunnel_cells_need_walls_beside_box_and_player():
+    level = parse(TUNNEL)
+    macro = MacroMoves(level)
+    right = 3
+    # Hàng 1 là hành lang trừ ô (1, 6) có lối xuống
+    assert macro.tunnels[right] >> level.index((1, 4)) & 1
+    assert not macro.tunnels[right] >> level.index((1, 6)) & 1
+    assert not macro.tunnels[right] >> level.index((1, 7)) & 1
+
+
+def test_tunnel_macro_is_one_edge_and_keeps_push_count():
+    level = parse(TUNNEL)
+    plain, macro = {}, {}
+    base = a_star_sokoban(level, True, plain)
+    path, pushes, generated, *_ = a_star_sokoban(level, stats=macro, macros=True)
+    assert replay(level, path) == pushes == base[1]
+    assert macro['tunnel_macros'] > 0 and generated < base[2]
+
+
+def test_goal_room_filled_deepest_first():
+    level = parse(GOAL_ROOM)
+    macro = MacroMoves(level)
+    entrance = level.index((3, 3))
+    down = 1
+    assert list(macro.rooms) == [entrance] and macro.rooms[entrance][0] == down
+    assert macro.rooms[entrance][2] == [level.index((5, 3)), level.index((4, 3))]
+
+    stats = {}
+    path, pushes, *_ = a_star_sokoban(level, stats=stats, macros=True)
+    assert replay(level, path) == pushes == bfs_pushes(level)
+    assert stats['room_macros'] > 0
+
+
+def test_no_room_without_single_entrance():
+    assert MacroMoves(parse(ROOM)).rooms == {}
+
+
+@pytest.mark.parametrize("map_name, level_num", [("Mini Cosmos", 23), ("Mini Cosmos", 27), ("Micro Cosmos", 38)])
+def test_tunnel_levels_solved_push_optimal(map_name, level_num):
+    level = load_level(map_name, level_num)
+    stats = {}
+    path, pushes, *_ = a_star_sokoban(level, stats=stats, macros=True)
+    assert stats['tunnel_macros'] > 0 and stats['room_macros'] == 0
+    assert replay(level, path) == pushes == bfs_pushes(level)
+
+
+def test_dfs_with_macros():
+    import dfs
+    level = load_level("Micro Cosmos", 38)
+    stats = {}
+    generated, steps, _, _, actions = dfs.dfs(level, stats=stats, macros=True)
+    plain = dfs.dfs(level, push_level=True)[0]
+    assert steps == len(actions) > 0 and generated < plain and stats['tunnel_macros'] > 0
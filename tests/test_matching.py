@@ -0,0 +1,64 @@
+import random
+from itertools import permutations
+
+import pytest
+
+from conftest import load_level
+from Heuristic import MatchingEstimator
+from level import INF, bits
+from matching import replace_row, solve
+
+
+def brute_force(cost):
+    n, m = len(cost), len(cost[0])
+    return min(sum(cost[i][cols[i]] for i in range(n)) for cols in permutations(range(m), n))
+
+
+def random_matrix(rng, n, m):
+    return [[rng.randint(0, 20) for _ in range(m)] for _ in range(n)]
+
+
+@pytest.mark.parametrize("n, m", [(1, 1), (3, 3), (5, 5), (3, 5), (4, 6)])
+def test_solve_is_optimal(n, m):
+    rng = random.Random(n * 31 + m)
+    for _ in range(30):
+        cost = random_matrix(rng, n, m)
+        assert solve(cost)[0] == brute_force(cost)
+
+
+@pytest.mark.parametrize("n, m", [(2, 2), (4, 4), (6, 6), (3, 5)])
+def test_replace_row_matches_full_solve(n, m):
+    rng = random.Random(n * 17 + m)
+    for _ in range(30):
+        cost = random_matrix(rng, n, m)
+        _, state = solve(cost)
+        # Cập nhật liên tiếp nhiều hàng, giống chuỗi cú đẩy trong tìm kiếm
+        for _ in range(5):
+            i = rng.randrange(n)
+            row = [rng.randint(0, 20) for _ in range(m)]
+            total, state = replace_row(state, i, row)
+            cost[i] = row
+            assert total == solve(cost)[0] == brute_force(cost)
+
+
+def test_replace_row_with_infinite_costs():
+    cost = [[1, INF], [INF, 1]]
+    _, state = solve(cost)
+    total, _ = replace_row(state, 0, [INF, 2])
+    assert total >= INF
+
+
+def test_estimator_child_equals_fresh_expand():
+    level = load_level("Mini Cosmos", 5)
+    incremental, fresh = MatchingEstimator(level), MatchingEstimator(level)
+    boxes = level.start_boxes
+    incremental.expand(boxes)
+    for box in bits(boxes):
+        for offset, _ in level.dirs:
+            target = box + offset
+            if not level.floor >> target & 1 or boxes >> target & 1:
+                continue
+            new_boxes = boxes ^ (1 << box) ^ (1 << target)
+            fresh.expand(new_boxes)
+            # Mọi giá trị >= INF đều nghĩa là deadlock
+            assert min(incremental.estimate(None, new_boxes, box, target), INF) == min(fresh.estimate(None, new_boxes), INF)
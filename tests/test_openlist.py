@@ -0,0 +1,36 @@
+import heapq
+
+import pytest
+
+from conftest import bfs_pushes, load_level, replay
+from Heuristic import a_star_sokoban
+from openlist import BucketOpenList, HeapOpenList
+
+
+def test_bucket_pops_lowest_f_then_highest_g():
+    pq = BucketOpenList()
+    for f, g, name in [(5, 1, "a"), (4, 0, "b"), (5, 3, "c"), (5, 3, "d"), (6, 6, "e")]:
+        pq.push(f, g, name)
+    assert [pq.pop()[2] for _ in range(3)] == ["b", "d", "c"]
+    # f nhỏ hơn low (heuristic không nhất quán) vẫn được lấy ra trước
+    pq.push(2, 2, "f")
+    assert [pq.pop() for _ in range(len(pq))] == [(2, 2, "f"), (5, 1, "a"), (6, 6, "e")]
+    with pytest.raises(IndexError):
+        pq.pop()
+
+
+def test_heap_keeps_previous_tuple_order():
+    entries = [(3, 1, (2, 9)), (3, 1, (1, 7)), (2, 2, (0, 1)), (3, 0, (5, 5))]
+    pq, plain = HeapOpenList(), []
+    for f, g, entry in entries:
+        pq.push(f, g, entry)
+        heapq.heappush(plain, (f, g) + entry)
+    assert [(f, g) + entry for f, g, entry in (pq.pop() for _ in entries)] == \
+        [heapq.heappop(plain) for _ in entries]
+
+
+@pytest.mark.parametrize("map_name, level_num", [("Mini Cosmos", 5), ("Mini Cosmos", 8), ("Micro Cosmos", 2)])
+def test_bucket_a_star_push_optimal(map_name, level_num):
+    level = load_level(map_name, level_num)
+    path, pushes, *_ = a_star_sokoban(level, True, open_list='bucket')
+    assert replay(level, path) == pushes == bfs_pushes(level)
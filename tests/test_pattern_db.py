@@ -0,0 +1,70 @@
+from collections import deque
+from itertools import combinations
+
+from conftest import parse
+from level import INF, bits
+from movegen import normalize, push_moves
+from pattern_db import PatternDatabase, build, load_or_build
+
+MAP = """
+#######
+#     #
+# ?#? #
+#  @  #
+#######
+"""
+
+
+def pair_pushes(level, boxes, player):
+    """BFS thuần: số cú đẩy tối thiểu đưa mọi thùng trong `boxes` lên goal."""
+    start = (normalize(level, player, boxes)[1], boxes)
+    seen = {start}
+    queue = deque([(start[0], boxes, 0)])
+    while queue:
+        player, boxes, dist = queue.popleft()
+        if boxes & ~level.goals == 0:
+            return dist
+        region, _ = normalize(level, player, boxes)
+        for box, _, target in push_moves(level, region, boxes):
+            new_boxes = boxes ^ (1 << box) ^ (1 << target)
+            state = (normalize(level, box, new_boxes)[1], new_boxes)
+            if state not in seen:
+                seen.add(state)
+                queue.append((state[0], new_boxes, dist + 1))
+    return INF
+
+
+def test_pair_table_matches_brute_force():
+    level = parse(MAP)
+    table = build(level, 2)
+    for pair in combinations(level.cells, 2):
+        boxes = level.mask_of_indices(pair)
+        # min theo mọi vị trí người chơi
+        best = min(pair_pushes(level, boxes, p) for p in level.cells if not boxes >> p & 1)
+        assert table.get(boxes, INF) == best, [level.cell(b) for b in pair]
+    assert table[level.goals] == 0
+
+
+def test_partition_cost_is_bounded_by_single_box_distances():
+    level = parse(MAP)
+    table = build(level, 2)
+    pdb = PatternDatabase(2, table, 0.0, False)
+    for mask, value in table.items():
+        boxes = list(bits(mask))
+        assert pdb.partition_cost(boxes, level.min_distance) == value
+        assert value >= sum(level.min_distance[b] for b in boxes)
+    # Hai thùng cùng kẹt ở góc không có trong bảng => deadlock
+    corner = level.mask([(1, 1), (1, 5)])
+    assert corner not in table
+    assert pdb.partition_cost(list(bits(corner)), level.min_distance) == INF
+
+
+def test_cache_round_trip(tmp_path):
+    level = parse(MAP)
+    built = load_or_build(level, 2, cache_dir=str(tmp_path))
+    cached = load_or_build(level, 2, cache_dir=str(tmp_path))
+    assert not built.cached and cached.cached
+    assert cached.table == built.table
+    # Bản đồ khác (thêm một ô tường) phải có khóa cache khác
+    other = parse(MAP.replace("#     #", "#  #  #"))
+    assert not load_or_build(other, 2, cache_dir=str(tmp_path)).cached
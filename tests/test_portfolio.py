@@ -0,0 +1,68 @@
+import time
+
+from conftest import ROOT, load_level, parse, replay
+
+from benchmark import run_portfolio, write_results
+from solution_cache import SolutionCache
+from solver_worker import PORTFOLIO, PortfolioJob
+
+STUCK = """
+#####
+#@ x#
+#  ?#
+#####
+"""
+
+
+def wait(job, limit=60):
+    deadline = time.time() + limit
+    while job.poll() == 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+def test_first_solution_wins_and_others_are_killed():
+    level = load_level("Micro Cosmos", 1)
+    job = PortfolioJob(level)
+    assert wait(job) == 'done'
+    assert job.result['winner'] in PORTFOLIO and job.result['winner_time'] > 0
+    replay(level, job.result['path'])
+    assert not any(member.process.is_alive() for member in job.jobs.values() if not member.cached)
+
+
+def test_no_solution_when_every_engine_gives_up():
+    job = PortfolioJob(parse(STUCK), ('dfs', 'astar'))
+    assert wait(job) == 'done'
+    assert job.result['path'] is None and job.result['winner'] is None
+
+
+def test_cancel_stops_all_engines():
+    job = PortfolioJob(load_level("Micro Cosmos", 2), ('astar', 'ida'))
+    job.cancel()
+    assert job.status == 'cancelled' and job.poll() == 'cancelled'
+    assert not any(member.process.is_alive() for member in job.jobs.values())
+
+
+def test_cached_member_wins_without_starting_the_others(tmp_path):
+    level = load_level("Mini Cosmos", 1)
+    cache = SolutionCache(str(tmp_path))
+    assert wait(PortfolioJob(level, ('astar',), cache)) == 'done'
+    job = PortfolioJob(level, ('astar', 'dfs'), cache)
+    assert job.cached and job.status == 'done' and list(job.jobs) == ['astar']
+    assert job.result['winner'] == 'astar' and job.result['winner_time'] == 0.0
+
+
+def test_batch_rows_record_winner(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    options = {'engine': 'portfolio', 'push_level': False, 'heuristic_mode': 'matching', 'macros': False,
+               'open_list': 'heap', 'weight': None, 'beam_width': None, 'closed': 'builtin', 'ram_mb': 64.0,
+               'timeout': 30, 'cache': False}
+    rows = run_portfolio([(0, 'MINI COSMOS', 1, options), (40, 'MICRO COSMOS', 1, options)], 30, ('dfs', 'gbfs'))
+    assert [row['status'] for row in rows] == ['solved', 'solved']
+    assert all(row['stats']['portfolio']['winner'] in ('dfs', 'gbfs') for row in rows)
+
+    monkeypatch.chdir(tmp_path)
+    write_results(rows, options)
+    algorithms = [line.split(",")[2] for line in (tmp_path / "A_star.csv").read_text().splitlines()[1:]]
+    assert all(name in ("Portfolio (DFS)", "Portfolio (Greedy BFS)") for name in algorithms)
+    assert "Winner: " in (tmp_path / "result_A_star.txt").read_text()
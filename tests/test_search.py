@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import bfs_pushes, load_level, parse, replay
+from Heuristic import a_star_sokoban, bidirectional_sokoban
+from movegen import encode_push, rebuild_path
+
+LEVELS = [("Mini Cosmos", i) for i in range(1, 9)]
+
+
+def test_rebuild_path_replays_pushes():
+    level = parse("""
+#######
+#@ x ?#
+#######
+""")
+    box = level.index((1, 3))
+    right = 3  # chỉ số hướng 'R' trong level.dirs
+    path = rebuild_path(level, level.start, level.start_boxes, [encode_push(box, right), encode_push(box + 1, right)])
+    assert path == "RRR"
+    assert replay(level, path) == 2
+
+
+@pytest.mark.parametrize("map_name, level_num", LEVELS)
+@pytest.mark.parametrize("push_level", [False, True])
+def test_a_star_solution_is_valid(map_name, level_num, push_level):
+    level = load_level(map_name, level_num)
+    path, pushes, *_ = a_star_sokoban(level, push_level)
+    assert replay(level, path) == pushes
+
+
+@pytest.mark.parametrize("map_name, level_num", LEVELS)
+def test_push_level_a_star_is_push_optimal(map_name, level_num):
+    level = load_level(map_name, level_num)
+    _, pushes, *_ = a_star_sokoban(level, push_level=True)
+    assert pushes == bfs_pushes(level)
+
+
+@pytest.mark.parametrize("map_name, level_num", LEVELS + [("Micro Cosmos", 2)])
+def test_bidirectional_is_push_optimal(map_name, level_num):
+    level = load_level(map_name, level_num)
+    stats = {}
+    path, pushes, *_ = bidirectional_sokoban(level, stats)
+    assert replay(level, path) == pushes
+    assert pushes == bfs_pushes(level)
+    assert stats["forward_depth"] + stats["backward_depth"] >= pushes
+
+
+def test_unsolvable_level_returns_none():
+    level = parse("""
+######
+#x  ?#
+#  @ #
+######
+""")
+    path, pushes, *_ = a_star_sokoban(level, push_level=True)
+    assert path is None and pushes == 0
+    path, pushes, *_ = bidirectional_sokoban(level)
+    assert path is None and pushes == 0
@@ -0,0 +1,71 @@
+import os
+import time
+
+from conftest import load_level
+
+from external import RAM_MB
+from Heuristic import BEAM_WIDTH, WEIGHT
+from level import Level
+from solution_cache import SolutionCache, cache_options
+from solver_worker import SolveJob
+
+
+def test_key_ignores_line_endings_but_not_options(tmp_path):
+    lf, crlf = tmp_path / "lf.txt", tmp_path / "crlf.txt"
+    lf.write_bytes(b"####\n#@x?#\n####\n")
+    crlf.write_bytes(b"####\r\n#@x?#\r\n####\r\n")
+    cache = SolutionCache(str(tmp_path / "c"))
+    level = Level.from_file(str(lf))
+    key = cache.key(level, 'astar', cache_options('astar'))
+    assert key == cache.key(Level.from_file(str(crlf)), 'astar', cache_options('astar'))
+    assert key != cache.key(level, 'astar', cache_options('astar', push_level=True))
+    assert key != cache.key(level, 'ida', cache_options('ida'))
+    # Số đo tracemalloc và RSS không so được với nhau
+    assert key != cache.key(level, 'astar', cache_options('astar'), trace=False)
+
+
+def test_default_weight_and_width_share_the_key():
+    assert cache_options('wastar', weight=WEIGHT) == cache_options('wastar')
+    assert cache_options('wastar', weight=WEIGHT + 1) != cache_options('wastar')
+    assert cache_options('beam', beam_width=BEAM_WIDTH) == cache_options('beam')
+    assert cache_options('beam', beam_width=BEAM_WIDTH // 2)['beam_width'] == BEAM_WIDTH // 2
+
+
+def test_closed_set_in_key_only_when_packed():
+    assert cache_options('astar', closed='builtin') == cache_options('astar')
+    assert cache_options('dfs', closed='packed')['closed'] == 'packed'
+    assert 'closed' not in cache_options('ida', closed='packed')
+
+
+def test_external_key_follows_ram_budget():
+    assert cache_options('external') == cache_options('external', ram_mb=RAM_MB)
+    assert cache_options('external', ram_mb=0.5) != cache_options('external')
+
+
+def test_put_get_and_lru_eviction(tmp_path):
+    cache = SolutionCache(str(tmp_path), max_entries=2)
+    assert cache.get("a") is None
+    cache.put("a", {'path': "R"})
+    cache.put("b", {'path': "L"})
+    past = time.time() - 100
+    os.utime(tmp_path / "a.json", (past, past))
+    os.utime(tmp_path / "b.json", (past - 10, past - 10))
+    assert cache.get("b") == {'path': "L"}  # b vừa được dùng, a thành mục cũ nhất
+    cache.put("c", {'path': None})
+    assert len(cache) == 2
+    assert cache.get("a") is None and cache.get("c") == {'path': None}
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_gui_job_answered_from_cache(tmp_path):
+    cache = SolutionCache(str(tmp_path))
+    level = load_level("Mini Cosmos", 1)
+    first = SolveJob('astar', level, cache)
+    deadline = time.time() + 60
+    while first.poll() == 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    assert first.status == 'done' and not first.cached
+
+    second = SolveJob('astar', level, cache)
+    assert second.cached and second.poll() == 'done'
+    assert second.result['path'] == first.result['path']
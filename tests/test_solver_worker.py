@@ -0,0 +1,39 @@
+import time
+
+from conftest import load_level, replay
+
+from solver_worker import SolveJob
+
+
+def wait(job, limit=60):
+    deadline = time.time() + limit
+    while job.poll() == 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+def test_job_returns_result_and_metrics():
+    level = load_level("Mini Cosmos", 1)
+    job = SolveJob('astar', level)
+    assert wait(job) == 'done'
+    result = job.result
+    replay(level, result['path'])
+    assert result['generated'] > 0 and result['metrics']['peak_visited'] > 0
+
+
+def test_dfs_job():
+    job = SolveJob('dfs', load_level("Mini Cosmos", 2))
+    assert wait(job) == 'done' and job.result['path']
+
+
+def test_cancel_stops_worker_and_reports_progress():
+    job = SolveJob('astar', load_level("Micro Cosmos", 2))
+    deadline = time.time() + 30
+    while job.poll() == 'running' and job.progress['explored'] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.progress['explored'] > 0
+    job.cancel()
+    assert job.status == 'cancelled' and not job.process.is_alive()
+    # Hủy lần nữa không lỗi, poll giữ nguyên trạng thái
+    job.cancel()
+    assert job.poll() == 'cancelled'
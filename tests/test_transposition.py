@@ -0,0 +1,42 @@
+import pytest
+
+from conftest import bfs_pushes, load_level, replay
+from Heuristic import ida_star_sokoban
+from transposition import TranspositionTable
+
+
+def test_visit_prunes_deeper_and_same_iteration_repeats():
+    table = TranspositionTable(4)
+    table.new_iteration()
+    assert table.visit(42, 5)
+    assert not table.visit(42, 5)   # cùng lượt, cùng g
+    assert not table.visit(42, 7)   # đã biết đường ngắn hơn
+    assert table.visit(42, 3)       # đường ngắn hơn: duyệt lại
+    table.new_iteration()
+    assert table.visit(42, 3)       # lượt mới, cùng g tốt nhất
+    assert not table.visit(42, 4)   # g tốt nhất được giữ qua các lượt
+
+
+def test_colliding_keys_are_both_recorded():
+    table = TranspositionTable(4)
+    table.new_iteration()
+    a, b, c = 0x10, 0x20, 0x30       # cùng cặp ô 0/1
+    assert table.visit(a, 1)
+    assert table.visit(b, 9)          # ô đầu giữ a (nông hơn), b vào ô sau
+    assert not table.visit(a, 1)
+    assert not table.visit(b, 9)
+    assert table.visit(c, 9)          # ô sau luôn nhận mục mới
+    assert not table.visit(a, 1)
+    assert table.nbytes == 16 * len(table)
+
+
+@pytest.mark.parametrize("level_num", range(1, 9))
+@pytest.mark.parametrize("heuristic_mode", ["matching", "greedy"])
+def test_ida_star_solution(level_num, heuristic_mode):
+    level = load_level("Mini Cosmos", level_num)
+    stats = {}
+    path, pushes, *_ = ida_star_sokoban(level, stats, heuristic_mode)
+    assert replay(level, path) == pushes
+    assert stats["iterations"] >= 1
+    if heuristic_mode == "matching":
+        assert pushes == bfs_pushes(level)
@@ -0,0 +1,64 @@
+from array import array
+
+
+class TranspositionTable:
+    """
+    Bảng chuyển vị kích thước cố định cho IDA*: ô i = key & mask lưu khóa 64 bit,
+    g nhỏ nhất từng thấy của trạng thái (qua mọi lượt) và lượt lặp gần nhất nó
+    được duyệt. Bộ nhớ cố định 16 byte/ô bất kể bản đồ sâu đến đâu.
+
+    Trạng thái gặp lại với g lớn hơn g tốt nhất đã biết thì bỏ qua: đường đi ngắn
+    hơn tới nó vẫn nằm trong ngưỡng của lượt này nên cây con sẽ được duyệt từ đó.
+    Gặp lại với cùng g trong cùng lượt (chuyển vị, chu trình) cũng bỏ qua.
+
+    Mỗi khóa thuộc một cặp ô (2-way). Ô đầu ưu tiên độ sâu: chỉ bị đè bởi mục nông
+    hơn hoặc khi mục cũ chưa được dùng trong lượt này – trạng thái gần gốc còn
+    nhiều ngân sách f nên cắt được nhiều hơn. Ô sau luôn nhận mục mới, để trạng
+    thái vừa duyệt không bị duyệt lại liên tục chỉ vì đụng độ với một mục nông.
+    """
+
+    def __init__(self, size_bits=18):
+        size = 1 << size_bits
+        self.mask = size - 1
+        self.keys = array('Q', bytes(8 * size))
+        self.depth = array('i', bytes(4 * size))
+        self.stamp = array('i', bytes(4 * size))
+        self.iteration = 0
+        self.replaced = 0
+        self.used = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def new_iteration(self):
+        self.iteration += 1
+
+    def visit(self, key, g):
+        """
+        Ghi nhận trạng thái key được duyệt ở độ sâu g. Trả về False nếu nên bỏ qua:
+        đã biết đường ngắn hơn tới nó, hoặc lượt này đã duyệt nó với cùng g.
+        """
+        i = key & self.mask & ~1
+        for j in (i, i + 1):
+            if self.stamp[j] and self.keys[j] == key:
+                depth = self.depth[j]
+                if depth < g or (depth == g and self.stamp[j] == self.iteration):
+                    return False
+                break
+        else:
+            # Ô đầu giữ mục nông (ưu tiên độ sâu), ô sau luôn nhận mục mới
+            j = i
+            if self.stamp[i] == self.iteration and self.depth[i] < g:
+                j = i + 1
+            if self.stamp[j]:
+                self.replaced += 1
+            else:
+                self.used += 1
+        self.keys[j] = key
+        self.depth[j] = g
+        self.stamp[j] = self.iteration
+        return True
+
+    @property
+    def nbytes(self):
+        return sum(a.itemsize * len(a) for a in (self.keys, self.depth, self.stamp))
@@ -0,0 +1,32 @@
+import random
+from functools import reduce
+from operator import xor
+
+
+class ZobristTable:
+    """
+    Bảng Zobrist theo ô: mỗi ô có một số ngẫu nhiên 64 bit cho thùng và một cho
+    người chơi. Khóa trạng thái = XOR các số của thùng ^ số của ô người chơi, nên
+    không phụ thuộc thứ tự thùng và cập nhật O(1) khi một thùng di chuyển.
+    """
+
+    def __init__(self, cells, seed=2024):
+        rng = random.Random(seed)
+        self.box = {}
+        self.player = {}
+        # Sinh theo thứ tự đã sắp xếp để cùng một bản đồ luôn cho cùng một bảng
+        for cell in sorted(cells):
+            self.box[cell] = rng.getrandbits(64)
+            self.player[cell] = rng.getrandbits(64)
+
+    def boxes_key(self, boxes):
+        """Khóa của tập thùng (tính đầy đủ một lần cho trạng thái đầu)."""
+        return reduce(xor, (self.box[b] for b in boxes), 0)
+
+    def move_box(self, key, src, dst):
+        """Cập nhật khóa thùng khi một thùng đi từ src sang dst."""
+        return key ^ self.box[src] ^ self.box[dst]
+
+    def state_key(self, boxes_key, player):
+        """Khóa trạng thái = khóa thùng + ô người chơi (thật hoặc đã chuẩn hóa)."""
+        return boxes_key ^ self.player[player]